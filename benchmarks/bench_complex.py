@@ -0,0 +1,55 @@
+"""
+Benchmark the (..., 2) real layout against the complex-dtype mode on long spectrograms.
+
+Usage:
+    python benchmarks/bench_complex.py --minutes 10
+"""
+import argparse
+import math
+import timeit
+
+import torch
+
+from torchaudio_contrib.functional import stft, complex_norm, magphase, phase_vocoder
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--fft-len', type=int, default=2048)
+    parser.add_argument('--hop-len', type=int, default=512)
+    parser.add_argument('--sample-rate', type=int, default=44100)
+    parser.add_argument('--minutes', type=float, default=2.)
+    parser.add_argument('--channel', type=int, default=2)
+    parser.add_argument('--rate', type=float, default=1.3)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    window = torch.hann_window(args.fft_len)
+    waveforms = torch.randn(1, args.channel, int(args.minutes * 60 * args.sample_rate))
+    num_bins = args.fft_len // 2 + 1
+    phi_advance = torch.linspace(0, math.pi * args.hop_len, num_bins)[..., None]
+
+    specgrams = {
+        'real (..., 2)': stft(waveforms, args.fft_len, args.hop_len, window),
+        'complex dtype': stft(waveforms, args.fft_len, args.hop_len, window, return_complex=True),
+    }
+    ops = [
+        ('stft', lambda layout, x: stft(waveforms, args.fft_len, args.hop_len, window,
+                                        return_complex=layout == 'complex dtype')),
+        ('complex_norm', lambda layout, x: complex_norm(x)),
+        ('magphase', lambda layout, x: magphase(x)),
+        ('phase_vocoder', lambda layout, x: phase_vocoder(x, args.rate, phi_advance)),
+    ]
+
+    spec = specgrams['complex dtype']
+    print('spectrogram: {}, {:.1f} MB'.format(
+        tuple(spec.shape), spec.numel() * spec.element_size() / 2 ** 20))
+    print('{:15s}{:>16s}{:>16s}'.format('op', *specgrams.keys()))
+    for name, op in ops:
+        times = [min(timeit.repeat(lambda: op(layout, x), number=1, repeat=args.repeat))
+                 for layout, x in specgrams.items()]
+        print('{:15s}{:15.4f}s{:15.4f}s'.format(name, *times))
+
+
+if __name__ == '__main__':
+    main()
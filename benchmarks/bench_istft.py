@@ -0,0 +1,50 @@
+"""
+Benchmark `istft` throughput over multi-channel batch sizes.
+
+Usage:
+    python benchmarks/bench_istft.py --fft-len 2048 --seconds 10
+"""
+import argparse
+import timeit
+
+import torch
+
+from torchaudio_contrib.layers import STFT, ISTFT
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--fft-len', type=int, default=2048)
+    parser.add_argument('--hop-len', type=int, default=512)
+    parser.add_argument('--sample-rate', type=int, default=44100)
+    parser.add_argument('--seconds', type=float, default=10.)
+    parser.add_argument('--batches', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--channels', type=int, nargs='+', default=[1, 2, 8])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--device', default='cpu')
+    args = parser.parse_args()
+
+    pad = args.fft_len // 2
+    stft = STFT(args.fft_len, args.hop_len, pad=pad).to(args.device)
+    istft = ISTFT(args.fft_len, args.hop_len, pad=pad).to(args.device)
+    length = int(args.seconds * args.sample_rate)
+
+    print('batch  channel  time (s)  audio seconds / s')
+    for batch in args.batches:
+        for channel in args.channels:
+            waveforms = torch.randn(batch, channel, length, device=args.device)
+            complex_specgrams = stft(waveforms)
+
+            def _run():
+                istft(complex_specgrams, length=length)
+                if args.device.startswith('cuda'):
+                    torch.cuda.synchronize()
+
+            _run()
+            elapsed = min(timeit.repeat(_run, number=1, repeat=args.repeat))
+            print('{:5d}  {:7d}  {:8.4f}  {:17.1f}'.format(
+                batch, channel, elapsed, batch * channel * args.seconds / elapsed))
+
+
+if __name__ == '__main__':
+    main()
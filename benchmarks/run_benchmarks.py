@@ -0,0 +1,209 @@
+"""
+Benchmark suite of the layers and functionals, with json output and regression checks.
+
+Every op runs over the matrix of batch, channel, length, fft_len and thread count,
+and is reported as throughput (audio seconds processed per second) and real-time
+factor (processing time / audio duration). Ops with a librosa equivalent are also
+timed with librosa, looping over the (batch, channel) signals.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --ops stft hpss --threads 1 4 --baseline results.json --tolerance 10
+"""
+import argparse
+import itertools
+import json
+import math
+import platform
+import sys
+import timeit
+
+import numpy as np
+import torch
+
+from torchaudio_contrib.functional import stft, istft, complex_norm, create_mel_filter, \
+    apply_filterbank, phase_vocoder, amplitude_to_db, db_to_amplitude, \
+    mu_law_encoding, mu_law_decoding
+from torchaudio_contrib.layers import Melspectrogram
+from torchaudio_contrib.beta_hpss import hpss
+
+try:
+    import librosa
+except ImportError:
+    librosa = None
+
+
+class Case(object):
+    """
+    Inputs of one point of the matrix, shared by all the ops.
+    """
+
+    def __init__(self, batch, channel, seconds, fft_len, sample_rate):
+        self.batch, self.channel, self.seconds, self.fft_len = batch, channel, seconds, fft_len
+        self.sample_rate = sample_rate
+        self.hop_len = fft_len // 4
+        self.num_bins = fft_len // 2 + 1
+        self.window = torch.hann_window(fft_len)
+        self.waveforms = torch.randn(batch, channel, int(seconds * sample_rate))
+        self.complex_specgrams = stft(self.waveforms, fft_len, self.hop_len, self.window)
+        self.mag_specgrams = complex_norm(self.complex_specgrams)
+        self.mel_filterbank = create_mel_filter(self.num_bins, 128, 0., sample_rate / 2., False)
+        self.phi_advance = torch.linspace(0, math.pi * self.hop_len, self.num_bins)[..., None]
+        self.mu_encoded = mu_law_encoding(self.waveforms.clamp(-1, 1))
+
+    def numpy(self, name):
+        """
+        Return the input `name` as a list of numpy arrays, one per signal.
+        """
+        tensor = getattr(self, name)
+        if name == 'complex_specgrams':
+            tensor = torch.view_as_complex(tensor)
+        return list(tensor.reshape((-1,) + tensor.shape[2:]).numpy())
+
+    @property
+    def key(self):
+        return 'batch={},channel={},seconds={},fft_len={}'.format(
+            self.batch, self.channel, self.seconds, self.fft_len)
+
+
+def _ops():
+    """
+    Return {name: (torchaudio_contrib op, librosa op or None)}, both taking a `Case`.
+    """
+    ops = {
+        'stft': (lambda c: stft(c.waveforms, c.fft_len, c.hop_len, c.window, pad=c.fft_len // 2),
+                 lambda c: [librosa.stft(x, n_fft=c.fft_len, hop_length=c.hop_len)
+                            for x in c.numpy('waveforms')]),
+        'istft': (lambda c: istft(c.complex_specgrams, c.hop_len, c.window),
+                  lambda c: [librosa.istft(x, hop_length=c.hop_len, center=False)
+                             for x in c.numpy('complex_specgrams')]),
+        'complex_norm': (lambda c: complex_norm(c.complex_specgrams),
+                         lambda c: [np.abs(x) for x in c.numpy('complex_specgrams')]),
+        'apply_filterbank': (lambda c: apply_filterbank(c.mag_specgrams, c.mel_filterbank),
+                             lambda c: [c.mel_filterbank.numpy().T.dot(x)
+                                        for x in c.numpy('mag_specgrams')]),
+        'melspectrogram': (lambda c: c.melspectrogram(c.waveforms),
+                           lambda c: [librosa.feature.melspectrogram(
+                               y=x, sr=c.sample_rate, n_fft=c.fft_len, hop_length=c.hop_len,
+                               n_mels=128) for x in c.numpy('waveforms')]),
+        'phase_vocoder': (lambda c: phase_vocoder(c.complex_specgrams, 1.3, c.phi_advance),
+                          lambda c: [librosa.phase_vocoder(x, rate=1.3, hop_length=c.hop_len)
+                                     for x in c.numpy('complex_specgrams')]),
+        'amplitude_to_db': (lambda c: amplitude_to_db(c.mag_specgrams),
+                            lambda c: [librosa.amplitude_to_db(x, amin=1e-7, top_db=None)
+                                       for x in c.numpy('mag_specgrams')]),
+        'db_to_amplitude': (lambda c: db_to_amplitude(c.mag_specgrams),
+                            lambda c: [librosa.db_to_amplitude(x)
+                                       for x in c.numpy('mag_specgrams')]),
+        'mu_law_encoding': (lambda c: mu_law_encoding(c.waveforms),
+                            lambda c: [librosa.mu_compress(np.clip(x, -1, 1), quantize=True)
+                                       for x in c.numpy('waveforms')]),
+        'mu_law_decoding': (lambda c: mu_law_decoding(c.mu_encoded),
+                            lambda c: [librosa.mu_expand(x - 128, quantize=True)
+                                       for x in c.numpy('mu_encoded')]),
+        'hpss': (lambda c: hpss(c.mag_specgrams),
+                 lambda c: [librosa.decompose.hpss(x, kernel_size=31)
+                            for x in c.numpy('mag_specgrams')]),
+    }
+    if librosa is None:
+        ops = {name: (op, None) for name, (op, _) in ops.items()}
+    return ops
+
+
+def _time(fn, repeat):
+    fn()  # warm up caches and allocators
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def run(args):
+    """
+    Run the matrix and return the results as a json-serializable dict.
+    """
+    ops = _ops()
+    results = []
+    for batch, channel, seconds, fft_len in itertools.product(
+            args.batches, args.channels, args.seconds, args.fft_lens):
+        case = Case(batch, channel, seconds, fft_len, args.sample_rate)
+        case.melspectrogram = Melspectrogram(128, args.sample_rate, fft_len=fft_len,
+                                             hop_len=case.hop_len, pad=fft_len // 2)
+        audio_seconds = batch * channel * seconds
+
+        for num_threads in args.threads:
+            torch.set_num_threads(num_threads)
+            for name in args.ops:
+                op, librosa_op = ops[name]
+                with torch.no_grad():
+                    elapsed = _time(lambda: op(case), args.repeat)
+                result = {
+                    'op': name, 'case': case.key, 'threads': num_threads,
+                    'time': elapsed,
+                    'throughput': audio_seconds / elapsed,
+                    'rtf': elapsed / audio_seconds,
+                }
+                if librosa_op is not None and args.librosa:
+                    result['librosa_time'] = _time(lambda: librosa_op(case), args.repeat)
+                    result['speedup'] = result['librosa_time'] / elapsed
+                results.append(result)
+                print('{:18s}{:48s}{:3d} threads {:10.4f}s  rtf {:.2e}{}'.format(
+                    name, case.key, num_threads, elapsed, result['rtf'],
+                    '  x{:.1f} librosa'.format(result['speedup']) if 'speedup' in result else ''))
+
+    return {
+        'meta': {'torch': torch.__version__, 'python': platform.python_version(),
+                 'machine': platform.machine(), 'processor': platform.processor()},
+        'results': results,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Return the results whose time exceeds the one in `baseline` by more than
+    `tolerance` percent, as (op, case, threads, baseline time, time).
+    """
+    def _key(result):
+        return result['op'], result['case'], result['threads']
+
+    baseline_times = {_key(r): r['time'] for r in baseline['results']}
+    regressions = []
+    for result in results['results']:
+        reference = baseline_times.get(_key(result))
+        if reference is not None and result['time'] > reference * (1 + tolerance / 100.):
+            regressions.append(_key(result) + (reference, result['time']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--ops', nargs='+', default=sorted(_ops()), choices=sorted(_ops()))
+    parser.add_argument('--batches', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--channels', type=int, nargs='+', default=[1, 2])
+    parser.add_argument('--seconds', type=float, nargs='+', default=[10.])
+    parser.add_argument('--fft-lens', type=int, nargs='+', default=[512, 2048])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, torch.get_num_threads()])
+    parser.add_argument('--sample-rate', type=int, default=22050)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-librosa', dest='librosa', action='store_false',
+                        help='do not time the librosa equivalents')
+    parser.add_argument('--output', help='write the results to this json file')
+    parser.add_argument('--baseline', help='json results of an earlier run to compare with')
+    parser.add_argument('--tolerance', type=float, default=10.,
+                        help='allowed slowdown against the baseline, in percent')
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for op, case, threads, reference, elapsed in regressions:
+            print('REGRESSION {} {} {} threads: {:.4f}s -> {:.4f}s (+{:.0f}%)'.format(
+                op, case, threads, reference, elapsed, 100. * (elapsed / reference - 1)))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,6 @@ setup(name='torchaudio_contrib',
       author_email='gnuchoi@gmail.com',
       license='MIT',
       install_requires=['torch'],
-      extras_require={'tests': ['pytest', 'librosa']},
+      extras_require={'tests': ['pytest', 'librosa'], 'onnx': ['onnx', 'onnxruntime']},
       packages=['torchaudio_contrib'],
       zip_safe=False)
@@ -0,0 +1,56 @@
+"""
+Test the stft backends against torch.stft.
+"""
+import json
+
+import pytest
+import torch
+
+from torchaudio_contrib.functional import stft
+from torchaudio_contrib.layers import STFT
+from torchaudio_contrib.backends import (
+    set_stft_autotune_file, stft_autotune_winners, clear_stft_autotune, stft_backends
+)
+
+
+@pytest.mark.parametrize('backend', ['conv1d', 'matmul'])
+@pytest.mark.parametrize('fft_len,hop_len,frame_len', [(256, 64, None), (512, 128, 400)])
+def test_stft_backends(backend, fft_len, hop_len, frame_len):
+    waveform = torch.randn(3, 2, 8000)
+    expected = STFT(fft_len, hop_len, frame_len, pad=fft_len // 2)(waveform)
+    complex_spec = STFT(fft_len, hop_len, frame_len, pad=fft_len // 2, backend=backend)(waveform)
+    assert complex_spec.size() == expected.size()
+    assert torch.allclose(complex_spec, expected, atol=1e-3)
+
+    with pytest.raises(ValueError):
+        STFT(fft_len, hop_len, frame_len, backend=backend, normalized=True)(waveform)
+
+
+def test_stft_autotune(tmpdir):
+    path = str(tmpdir.join('stft_autotune.json'))
+    clear_stft_autotune()
+    set_stft_autotune_file(path)
+
+    waveform = torch.randn(4, 4000)
+    window = torch.hann_window(256)
+    complex_spec = stft(waveform, 256, 64, window, backend='auto')
+    assert torch.allclose(complex_spec, stft(waveform, 256, 64, window), atol=1e-3)
+
+    winners = stft_autotune_winners()
+    assert len(winners) == 1
+    assert list(winners.values())[0] in stft_backends()
+    with open(path) as f:
+        assert json.load(f) == winners
+
+    clear_stft_autotune()
+    set_stft_autotune_file(path)
+    assert stft_autotune_winners() == winners
+    set_stft_autotune_file(None)
+    clear_stft_autotune()
+
+
+def test_stft_autotune_failure():
+    # shorter than a frame: every backend fails, and the error names them all
+    with pytest.raises(RuntimeError, match='conv1d'):
+        stft(torch.randn(2, 100), 256, 64, torch.hann_window(256), backend='auto')
+    assert len(stft_autotune_winners()) == 0
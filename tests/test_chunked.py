@@ -0,0 +1,67 @@
+"""
+Test the chunked transforms against the ones on whole inputs.
+"""
+import math
+
+import pytest
+import torch
+
+from torchaudio_contrib.functional import stft, phase_vocoder
+from torchaudio_contrib.beta_hpss import hpss
+from torchaudio_contrib.chunked import (
+    chunked_stft, iter_stft, chunked_phase_vocoder, chunked_hpss
+)
+
+
+@pytest.mark.parametrize('return_complex', [False, True])
+@pytest.mark.parametrize('pad', [0, 256])
+@pytest.mark.parametrize('waveform', [
+    torch.randn(2, 20000),
+    torch.randn(2, 2, 20000),
+])
+def test_chunked_stft(waveform, pad, return_complex):
+    fft_len, hop_len = 512, 128
+    window = torch.hann_window(fft_len)
+    expected = stft(waveform, fft_len, hop_len, window, pad=pad, return_complex=return_complex)
+    max_bytes = 50 * 2 * 4 * (2 * fft_len + 4 * 257)  # <= 50 frames per tile
+
+    assert len(list(iter_stft(waveform, fft_len, hop_len, window, pad=pad,
+                              max_bytes=max_bytes))) > 2
+    out = chunked_stft(waveform, fft_len, hop_len, window, pad=pad, max_bytes=max_bytes,
+                       return_complex=return_complex)
+    assert out.size() == expected.size()
+    assert torch.all(out == expected)
+
+
+@pytest.mark.parametrize('pad_mode', ['reflect', 'replicate', 'circular', 'constant'])
+@pytest.mark.parametrize('length,max_bytes', [(4096, 32 * 16416), (1536, 1)])
+def test_chunked_stft_short_end(length, max_bytes, pad_mode):
+    # the last tile holds `pad` real samples or fewer
+    waveform = torch.randn(2, 1, length)
+    window = torch.hann_window(512)
+    expected = stft(waveform, 512, 128, window, pad=256, pad_mode=pad_mode)
+    out = chunked_stft(waveform, 512, 128, window, pad=256, pad_mode=pad_mode,
+                       max_bytes=max_bytes)
+    assert torch.all(out == expected)
+
+
+@pytest.mark.parametrize('rate', [0.7, 1.3])
+def test_chunked_phase_vocoder(rate):
+    # float32 over many tiles, which must not drift from the whole spectrogram
+    complex_spec = torch.randn(1, 2, 257, 1000, 2)
+    phi_advance = torch.linspace(0, math.pi * 128, 257)[..., None]
+    expected = phase_vocoder(complex_spec, rate, phi_advance)
+
+    out = chunked_phase_vocoder(complex_spec, rate, phi_advance, max_bytes=2 * 257 * 8 * 9 * 30)
+    assert out.size() == expected.size()
+    assert torch.allclose(out, expected, atol=1e-4)
+
+
+@pytest.mark.parametrize('kernel_size', [9, (5, 11), (4, 8)])
+def test_chunked_hpss(kernel_size):
+    mag_spec = torch.rand(2, 1, 65, 300)
+    expected = hpss(mag_spec, kernel_size)
+
+    out = chunked_hpss(mag_spec, kernel_size, max_bytes=2 * 65 * 4 * 30 * 30)
+    for o, e in zip(out, expected):
+        assert torch.allclose(o, e)
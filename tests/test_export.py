@@ -0,0 +1,65 @@
+"""
+Test the ONNX export of the feature extraction modules.
+"""
+import io
+
+import pytest
+import torch
+import torch.nn as nn
+
+from torchaudio_contrib.layers import STFT, ExportableSTFT, Spectrogram, Melspectrogram, \
+    AmplitudeToDb
+from torchaudio_contrib.export import export_onnx
+
+pytest.importorskip('onnx')
+pytest.importorskip('onnxruntime')
+
+
+@pytest.mark.parametrize('fft_len,hop_len,frame_len,pad', [(512, 128, None, 256), (400, 160, 320, 0)])
+def test_ExportableSTFT(fft_len, hop_len, frame_len, pad):
+    waveforms = torch.randn(2, 3, 8000)
+    expected = STFT(fft_len, hop_len, frame_len, pad=pad)(waveforms)
+    complex_spec = ExportableSTFT(fft_len, hop_len, frame_len, pad=pad)(waveforms)
+    assert complex_spec.size() == expected.size()
+    assert torch.allclose(complex_spec, expected, atol=1e-3)
+
+
+@pytest.mark.parametrize('name', ['spectrogram', 'melspectrogram', 'fused_melspectrogram', 'db'])
+def test_export_onnx(name, tmpdir):
+    config = dict(fft_len=512, hop_len=128, pad=256)
+    mel_config = dict(num_mels=40, sample_rate=16000, **config)
+    module, reference = {
+        'spectrogram': (Spectrogram(exportable=True, **config), Spectrogram(**config)),
+        'melspectrogram': (Melspectrogram(exportable=True, **mel_config),
+                           Melspectrogram(**mel_config)),
+        'fused_melspectrogram': (Melspectrogram(exportable=True, fused=True, **mel_config),
+                                 Melspectrogram(**mel_config)),
+        'db': (nn.Sequential(Melspectrogram(exportable=True, **mel_config), AmplitudeToDb()),
+               nn.Sequential(Melspectrogram(**mel_config), AmplitudeToDb())),
+    }[name]
+    rtol, atol = (1e-3, 1e-3) if name == 'db' else (1e-3, 1e-2)
+
+    path = str(tmpdir.join('{}.onnx'.format(name)))
+    error = export_onnx(module, path, torch.randn(2, 1, 8000), reference=reference,
+                        rtol=rtol, atol=atol)
+    assert error < atol
+    # the modules are left in training mode, as they were given
+    assert all(m.training for m in list(module.modules()) + list(reference.modules()))
+
+    # other batch sizes and lengths than the example
+    import onnxruntime
+    session = onnxruntime.InferenceSession(path, providers=['CPUExecutionProvider'])
+    waveforms = torch.randn(3, 1, 5000)
+    features = session.run(None, {'waveforms': waveforms.numpy()})[0]
+    assert features.shape == tuple(reference(waveforms).shape)
+
+
+def test_export_onnx_mismatch():
+    module = Spectrogram(fft_len=256, exportable=True)
+    with pytest.raises(RuntimeError):
+        export_onnx(module, io.BytesIO(), torch.randn(1, 1, 4000), reference=Spectrogram(fft_len=256, power=2.))
+    # also when the export fails
+    assert module.training
+
+    with pytest.raises(ValueError):
+        Melspectrogram(exportable=True, banded=True)
@@ -8,10 +8,13 @@ import numpy as np
 import torch
 import torch.nn as nn
 from torchaudio_contrib.layers import (
-    STFT, ComplexNorm, ApplyFilterbank, Spectrogram, Melspectrogram,
-    MelFilterbank, AmplitudeToDb, DbToAmplitude, MuLawEncoding, MuLawDecoding
+    STFT, StreamingSTFT, ISTFT, ComplexNorm, ApplyFilterbank, Spectrogram, Melspectrogram,
+    MelFilterbank, StretchSpecTime, AmplitudeToDb, DbToAmplitude, MuLawEncoding, MuLawDecoding,
+    CQT, MFCC, GriffinLim, Resample, PitchShift, StreamingMelspectrogram
 )
-from torchaudio_contrib.functional import magphase
+from torchaudio_contrib.functional import magphase, phase_vocoder, frame_mask, griffin_lim
+from torchaudio_contrib.beta_hpss import HPSS
+from torchaudio_contrib.cache import cache_info, clear_cache, set_cache_budget
 
 
 xfail = pytest.mark.xfail
@@ -79,6 +82,155 @@ def test_STFT(waveform, fft_len, hop_len, pad_mode):
     assert np.allclose(mag_spec.numpy(), expected_mag_spec, atol=1e-5)
 
 
+@pytest.mark.parametrize('block_lens', [[441], [100, 700, 3, 1500]])
+@pytest.mark.parametrize('waveform', [
+    torch.randn(2, 20000),
+    torch.randn(3, 2, 20000),
+])
+def test_StreamingSTFT(waveform, block_lens):
+    """
+    StreamingSTFT should give the same columns as STFT without padding.
+    """
+    fft_len, hop_len = 512, 128
+    expected = STFT(fft_len=fft_len, hop_len=hop_len)(waveform)
+    layer = StreamingSTFT(fft_len=fft_len, hop_len=hop_len)
+
+    blocks, start = [], 0
+    while start < waveform.size(-1):
+        block_len = block_lens[len(blocks) % len(block_lens)]
+        blocks.append(waveform[..., start:start + block_len])
+        start += block_len
+    outputs = [layer(block) for block in blocks]
+
+    assert _all_equal(torch.cat(outputs, dim=-2), expected)
+    # the carried-over buffer is not growing
+    buffer_ptr = layer._buffer.data_ptr()
+    for block in blocks[:10]:
+        layer(block)
+    assert layer._buffer.data_ptr() == buffer_ptr
+
+    # the stream is not padded
+    with pytest.raises(ValueError):
+        StreamingSTFT(fft_len=fft_len, hop_len=hop_len, pad=fft_len // 2)
+
+
+@pytest.mark.parametrize('rate', [0.7, 1.3])
+def test_complex_dtype(rate):
+    """
+    The complex-dtype mode should give the same results as the (..., 2) layout.
+    """
+    _seed()
+    # float64, as the accumulated phase of phase_vocoder amplifies rounding differences
+    waveform = torch.randn(2, 2, 20000, dtype=torch.float64)
+    complex_spec = STFT(fft_len=512, hop_len=128).double()(waveform)
+    complex_spec_c = STFT(fft_len=512, hop_len=128, return_complex=True).double()(waveform)
+    assert complex_spec_c.is_complex()
+    assert _all_equal(torch.view_as_real(complex_spec_c), complex_spec)
+
+    for tensor, tensor_c in zip(magphase(complex_spec), magphase(complex_spec_c)):
+        assert torch.allclose(tensor, tensor_c, atol=1e-6)
+
+    phi_advance = torch.linspace(0, np.pi * 128, 257, dtype=torch.float64)[..., None]
+    stretched = phase_vocoder(complex_spec, rate, phi_advance)
+    stretched_c = phase_vocoder(complex_spec_c, rate, phi_advance)
+    assert stretched.size(-1) == 2
+    assert torch.allclose(torch.view_as_real(stretched_c), stretched, atol=1e-6)
+
+
+def test_StretchSpecTime_batched_rate():
+    """
+    Per-example rates should stretch every example like a scalar rate does.
+    """
+    _seed()
+    complex_spec = torch.randn(3, 2, 257, 100, 2)
+    rates = torch.tensor([0.8, 1.0, 1.5])
+    layer = StretchSpecTime(hop_len=128, num_bins=257)
+
+    stretched, lengths = layer(complex_spec, rates)
+    assert stretched.size()[:3] == complex_spec.size()[:3]
+    assert stretched.size(3) == int(lengths.max())
+    for i, rate in enumerate(rates.tolist()):
+        expected = layer(complex_spec[i:i + 1], rate)
+        assert lengths[i] == expected.size(3)
+        assert torch.allclose(stretched[i:i + 1, :, :, :lengths[i]], expected, atol=1e-4)
+        assert _all_equal(stretched[i, :, :, lengths[i]:], torch.zeros(1))
+
+
+@pytest.mark.parametrize('rate', [0.7, 1.0, 1.9])
+@pytest.mark.parametrize('block_len', [1, 7])
+def test_StretchSpecTime_streaming(rate, block_len):
+    """
+    Streaming StretchSpecTime should match the offline one for a constant rate,
+    also in float32 over a long stream.
+    """
+    _seed()
+    complex_spec = torch.randn(1, 2, 257, 1000, 2)
+    expected = StretchSpecTime(rate, hop_len=128, num_bins=257)(complex_spec)
+
+    layer = StretchSpecTime(rate, hop_len=128, num_bins=257, streaming=True)
+    outputs = [layer(block) for block in complex_spec.split(block_len, dim=3)]
+    # bounded latency: at most one frame is held back besides the fractional position
+    assert layer._frames.size(3) <= 2 + int(rate)
+    outputs.append(layer.flush())
+
+    stretched = torch.cat(outputs, dim=3)
+    assert stretched.size() == expected.size()
+    assert torch.allclose(stretched, expected, atol=1e-4)
+
+
+@pytest.mark.parametrize('fft_len,hop_len,frame_len', [(512, 128, None), (512, 256, 400),
+                                                       (512, 200, None)])
+@pytest.mark.parametrize('waveform', [
+    torch.randn(2, 10000),
+    torch.randn(3, 2, 10000),
+])
+def test_ISTFT(waveform, fft_len, hop_len, frame_len):
+    """
+    ISTFT should reconstruct the input of STFT.
+    """
+    pad = fft_len // 2
+    stft = STFT(fft_len=fft_len, hop_len=hop_len, frame_len=frame_len, pad=pad)
+    istft = ISTFT(fft_len=fft_len, hop_len=hop_len, frame_len=frame_len, pad=pad)
+
+    reconstructed = istft(stft(waveform), length=waveform.size(-1))
+    assert reconstructed.size() == waveform.size()
+    assert _approx_all_equal(reconstructed, waveform, atol=1e-4)
+    # cached normalizer is reused
+    assert len(istft._normalizers) == 1
+    assert _all_equal(istft(stft(waveform), length=waveform.size(-1)), reconstructed)
+
+
+def test_GriffinLim():
+    """
+    The momentum should converge faster than the original Griffin-Lim, and with `tol`
+    every example should stop on its own.
+    """
+    _seed()
+    fft_len, hop_len = 512, 128
+    t = torch.arange(8000.) / 8000.
+    waveforms = torch.stack([torch.sin(2 * np.pi * f * t * (1 + t)) for f in (220., 440., 660.)])
+    mag_specgrams = STFT(fft_len, hop_len, pad=fft_len // 2)(waveforms.unsqueeze(1)).norm(dim=-1)
+
+    def convergence(reconstructed):
+        rebuilt = STFT(fft_len, hop_len, pad=fft_len // 2)(reconstructed).norm(dim=-1)
+        return ((rebuilt - mag_specgrams).flatten(1).norm(dim=1) /
+                mag_specgrams.flatten(1).norm(dim=1))
+
+    fast = GriffinLim(fft_len, hop_len, pad=fft_len // 2, num_iters=50)
+    plain = GriffinLim(fft_len, hop_len, pad=fft_len // 2, num_iters=50, momentum=0.)
+    reconstructed = fast(mag_specgrams, length=8000)
+    assert reconstructed.shape == (3, 1, 8000)
+    assert (convergence(reconstructed) < convergence(plain(mag_specgrams, length=8000))).all()
+    assert fast(mag_specgrams[0], length=8000).shape == (1, 8000)
+
+    tol = 2 * convergence(reconstructed).max().item()
+    early = GriffinLim(fft_len, hop_len, pad=fft_len // 2, num_iters=50, tol=tol)
+    _, num_iters = griffin_lim(mag_specgrams, hop_len, early.window, fft_len // 2,
+                               num_iters=50, tol=tol, return_num_iters=True)
+    assert (num_iters < 50).all()
+    assert (convergence(early(mag_specgrams)) < 1.5 * tol).all()
+
+
 @pytest.mark.parametrize('new_len', [120, 36])
 @pytest.mark.parametrize('mag_spec', [
     torch.randn(1, 257, 391),
@@ -97,6 +249,121 @@ def test_ApplyFilterbank(mag_spec, new_len):
     assert mag_spec.dim() == mag_spec_filterbanked.dim()
 
 
+@pytest.mark.parametrize('num_freqs,num_mels', [(257, 40), (1025, 128), (129, 128)])
+def test_banded_ApplyFilterbank(num_freqs, num_mels):
+    """
+    Banded ApplyFilterbank should match the dense one on mel filterbanks.
+    """
+    _seed()
+    filterbank = MelFilterbank(num_freqs=num_freqs, num_mels=num_mels, sample_rate=22050).get_filterbank()
+    mag_spec = torch.rand(2, 2, num_freqs, 50)
+
+    layer = ApplyFilterbank(filterbank, banded=True)
+    assert layer.weights.numel() < filterbank.numel()
+    assert torch.allclose(layer(mag_spec), ApplyFilterbank(filterbank)(mag_spec), atol=1e-5)
+    assert len(layer.state_dict()) == 0
+
+
+@pytest.mark.parametrize('power', [1., 2., 0.7])
+def test_fused_Melspectrogram(power):
+    """
+    Fused ComplexNorm and Melspectrogram should match the unfused ones.
+    """
+    _seed()
+    complex_spec = torch.randn(2, 257, 391, 2)
+    assert torch.allclose(ComplexNorm(power, fused=True)(complex_spec),
+                          ComplexNorm(power)(complex_spec), rtol=1e-5, atol=1e-6)
+
+    waveforms = torch.randn(2, 2, 20000)
+    mel_config = dict(num_mels=64, sample_rate=22050, fft_len=512, hop_len=256)
+    mel_spec = Melspectrogram(**mel_config)(waveforms)
+    mel_spec_fused = Melspectrogram(fused=True, **mel_config)(waveforms)
+    assert mel_spec_fused.size() == mel_spec.size()
+    assert torch.allclose(mel_spec_fused, mel_spec, rtol=1e-4, atol=1e-4)
+
+
+@pytest.mark.parametrize('pad_mode', ['reflect', 'constant', 'replicate'])
+def test_lengths(pad_mode):
+    """
+    With lengths, every example of a zero-padded batch should be transformed as if
+    it were alone, and the padded frames should be left out.
+    """
+    _seed()
+    waveforms = torch.randn(3, 2, 6000)
+    lengths = torch.tensor([6000, 2500, 4100])
+    waveforms[1, :, 2500:] = 0
+    waveforms[2, :, 4100:] = 0
+    filterbank = MelFilterbank(num_freqs=257, num_mels=40, sample_rate=16000).get_filterbank()
+    stft = STFT(fft_len=512, hop_len=128, pad=256, pad_mode=pad_mode)
+    layers = [ComplexNorm(power=2.), ApplyFilterbank(filterbank), AmplitudeToDb()]
+
+    complex_spec, frame_lengths = stft(waveforms, lengths)
+    assert frame_lengths.tolist() == [_num_stft_bins(int(n), 512, 128, 256) for n in lengths]
+    assert complex_spec.size(3) == int(frame_lengths.max())
+    mask = frame_mask(frame_lengths)
+    assert mask.sum(1).tolist() == frame_lengths.tolist()
+
+    spec = complex_spec
+    specs = [spec]
+    for layer in layers:
+        spec = layer(spec, frame_lengths)
+        specs.append(spec)
+    assert torch.allclose(ApplyFilterbank(filterbank, banded=True)(specs[1], frame_lengths),
+                          specs[2], atol=1e-3)
+
+    for i, length in enumerate(lengths.tolist()):
+        num_frames = int(frame_lengths[i])
+        expected = stft(waveforms[i:i + 1, :, :length])
+        assert torch.allclose(complex_spec[i:i + 1, :, :, :num_frames], expected, atol=1e-3)
+        assert _all_equal(complex_spec[i, :, :, num_frames:], torch.zeros(1))
+        for layer, spec in zip(layers, specs[1:]):
+            expected = layer(expected)
+            assert torch.allclose(spec[i:i + 1, :, :, :num_frames], expected,
+                                  rtol=1e-4, atol=1e-3)
+        assert torch.allclose(specs[-1][i, :, :, num_frames:],
+                              layers[-1](torch.zeros(1)))
+
+
+@pytest.mark.parametrize('pad_mode', ['reflect', 'circular'])
+def test_lengths_short(pad_mode):
+    """
+    Examples too short for `pad_mode` should be zero-padded, and empty ones have no frame.
+    """
+    _seed()
+    waveforms = torch.randn(4, 1, 8000)
+    lengths = torch.tensor([8000, 300, 100, 0])
+    stft = STFT(fft_len=512, hop_len=128, pad=256, pad_mode=pad_mode)
+
+    complex_spec, frame_lengths = stft(waveforms, lengths)
+    assert frame_lengths.tolist() == [_num_stft_bins(int(n), 512, 128, 256)
+                                      for n in lengths[:3]] + [0]
+    assert _all_equal(complex_spec[3], torch.zeros(1))
+    # 300 samples can still be padded by 256, 100 samples cannot
+    for i, mode in ((1, pad_mode), (2, 'constant')):
+        num_frames = int(frame_lengths[i])
+        padded = STFT(fft_len=512, hop_len=128, pad=256, pad_mode=mode)
+        expected = padded(waveforms[i:i + 1, :, :int(lengths[i])])
+        assert torch.allclose(complex_spec[i:i + 1, :, :, :num_frames], expected, atol=1e-3)
+
+
+def test_tensor_cache():
+    """
+    Identical layers should share their filterbank and window through the cache.
+    """
+    clear_cache()
+    mel_layers = [Melspectrogram(num_mels=40, fft_len=512, hop_len=256) for _ in range(3)]
+    assert mel_layers[0][0].window is mel_layers[2][0].window
+    assert mel_layers[0][2].filterbank is mel_layers[2][2].filterbank
+    info = cache_info()
+    assert (info.hits, info.misses, info.num_entries) == (4, 2, 2)
+    assert info.num_bytes == (512 + 257 * 40) * 4
+
+    set_cache_budget(257 * 40 * 4)
+    assert cache_info().evictions == 1
+    set_cache_budget(64 * 2 ** 20)
+    clear_cache()
+
+
 @pytest.mark.parametrize('amplitude,db', [
     (torch.Tensor([0.000001, 0.0001, 0.1, 1.0, 10.0, 1000000.0]),
      torch.Tensor([-60.0, -40.0, -10.0, 0.0, 10.0, 60.0]))
@@ -115,6 +382,200 @@ def test_amplitude_db(amplitude, db):
                              atol=1e-5)
 
 
+@pytest.mark.parametrize('kernel_size', [5, (3, 7), 4, (4, 6)])
+@pytest.mark.parametrize('mag_spec', [
+    torch.rand(1, 1, 40, 60),
+    torch.rand(2, 2, 33, 17),
+])
+def test_HPSS(mag_spec, kernel_size):
+    """
+    HPSS should match per-bin / per-frame median filtering.
+    """
+    k_perc, k_harm = (kernel_size, kernel_size) if isinstance(kernel_size, int) else kernel_size
+    padded = torch.nn.functional.pad(mag_spec, (k_harm // 2, k_harm // 2, k_perc // 2, k_perc // 2),
+                                     mode='reflect')
+    harm, perc = torch.empty_like(mag_spec), torch.empty_like(mag_spec)
+    for t in range(mag_spec.size(3)):
+        harm[..., t] = padded[:, :, k_perc // 2:k_perc // 2 + mag_spec.size(2), t:t + k_harm].median(3)[0]
+    for f in range(mag_spec.size(2)):
+        perc[:, :, f] = padded[:, :, f:f + k_perc, k_harm // 2:k_harm // 2 + mag_spec.size(3)].median(2)[0]
+
+    harm_spec, perc_spec, harm_mask, perc_mask = HPSS(kernel_size, power=1.0)(mag_spec)
+    assert torch.allclose(harm_mask, (harm + 1e-6) / (harm + perc + 1e-6))
+    assert torch.allclose(perc_mask, (perc + 1e-6) / (harm + perc + 1e-6))
+    assert torch.allclose(harm_spec, mag_spec * harm_mask)
+
+
+@pytest.mark.parametrize('num_bins,gamma', [(84, 0.), (80, 0.), (60, 20.)])
+def test_CQT(num_bins, gamma):
+    """
+    The multirate CQT should match the correlation of the signal with the filters at the
+    full sample rate, and follow librosa.cqt (up to its sqrt(filter length) scaling).
+    """
+    _seed()
+    sample_rate, hop_len, min_freq = 22050, 512, 32.70
+    layer = CQT(sample_rate, hop_len, min_freq, num_bins, gamma=gamma)
+    waveforms = torch.randn(2, 1, 3 * sample_rate)
+    cqt_spec = layer(waveforms)
+    assert cqt_spec.shape == (2, 1, num_bins, 3 * sample_rate // hop_len + 1, 2)
+    assert torch.allclose(cqt_spec[1:], layer(waveforms[1:]), atol=1e-6)
+
+    waveform = waveforms[0, 0].double()
+    alpha = (2. ** (2. / 12) - 1) / (2. ** (2. / 12) + 1)
+    for k in [0, 5, num_bins // 2, num_bins - 1]:
+        freq = min_freq * 2. ** (k / 12.)
+        filter_len = sample_rate / (freq * alpha + gamma)
+        n = torch.arange(-int(filter_len / 2.), int(filter_len / 2.) + 1, dtype=torch.float64)
+        # frames whose filter lies within the signal, away from the zero padding
+        margin = int(filter_len / 2. / hop_len) + 4
+        frames = range(margin, cqt_spec.size(3) - margin)
+        window = torch.cos(np.pi * n / filter_len) ** 2
+        atom = window * torch.exp(2j * np.pi * freq / sample_rate * n) / window.sum()
+        expected = torch.stack([(waveform[t * hop_len + n.long()] * atom.conj()).sum()
+                                for t in frames])
+        cqt_bin = torch.view_as_complex(cqt_spec[0, 0, k, frames.start:frames.stop].double())
+        assert (cqt_bin - expected).abs().max() < 1e-3 * expected.abs().max()
+
+    if gamma == 0:
+        cqt_mag = ComplexNorm()(cqt_spec)[0, 0].numpy()[:, 4:-4]
+        librosa_mag = np.abs(librosa.cqt(waveform.numpy(), sr=sample_rate, hop_length=hop_len,
+                                         fmin=min_freq, n_bins=num_bins))[:, 4:-4]
+        for bin_mag, librosa_bin_mag in zip(cqt_mag, librosa_mag):
+            assert np.corrcoef(bin_mag, librosa_bin_mag)[0, 1] > 0.99
+
+    with pytest.raises(ValueError):
+        CQT(sample_rate, hop_len=100, num_bins=num_bins)
+
+
+@pytest.mark.parametrize('norm', ['ortho', None])
+@pytest.mark.parametrize('ref', [1.0, 2.0])
+def test_MFCC(norm, ref):
+    """
+    MFCCs and their deltas should match librosa on the mel spectrogram.
+    """
+    _seed()
+    waveforms = torch.randn(2, 1, 8000)
+    mfccs = MFCC(num_mfcc=13, num_mels=40, norm=norm, ref=ref, fft_len=512, num_deltas=2)(waveforms)
+    assert mfccs.shape == (2, 1, 3 * 13, _num_stft_bins(8000, 512, 128, 0))
+
+    mel_spec = Melspectrogram(num_mels=40, fft_len=512)(waveforms)
+    for mel, features in zip(mel_spec[:, 0].numpy(), mfccs[:, 0].numpy()):
+        mfcc = librosa.feature.mfcc(S=librosa.power_to_db(mel, ref=ref, amin=1e-7, top_db=None),
+                                    n_mfcc=13, norm=norm)
+        delta = librosa.feature.delta(mfcc, width=5, mode='nearest')
+        delta2 = librosa.feature.delta(delta, width=5, mode='nearest')
+        assert np.allclose(features, np.concatenate([mfcc, delta, delta2]), atol=1e-3)
+
+
+@pytest.mark.parametrize('orig_sr,new_sr', [(44100, 16000), (16000, 44100), (48000, 16000),
+                                            (8000, 22050)])
+@pytest.mark.parametrize('quality', ['low', 'medium', 'high'])
+def test_Resample(orig_sr, new_sr, quality):
+    """
+    Resampling a tone should give the tone sampled at the new rate, remove the
+    frequencies above the new nyquist frequency, and the stream should give the same
+    samples as the whole signal.
+    """
+    t = torch.arange(orig_sr, dtype=torch.float64) / orig_sr
+    waveforms = torch.stack([torch.sin(2 * np.pi * 1000 * t),
+                             torch.sin(2 * np.pi * 0.45 * orig_sr * t)]).float()
+    layer = Resample(orig_sr, new_sr, quality)
+    resampled = layer(waveforms.unsqueeze(0))
+    assert resampled.shape == (1, 2, new_sr)
+
+    expected = torch.sin(2 * np.pi * 1000 * torch.arange(new_sr, dtype=torch.float64) / new_sr)
+    atol = 1e-3 if quality == 'low' else 1e-4
+    assert torch.allclose(resampled[0, 0, 200:-200].double(), expected[200:-200], atol=atol)
+    if new_sr < orig_sr:
+        assert resampled[0, 1, 200:-200].abs().max() < atol
+
+    stream = Resample(orig_sr, new_sr, quality, streaming=True)
+    blocks = [stream(block) for block in waveforms[:, :-100].split(997, dim=-1)]
+    blocks += [stream(waveforms[:, -100:]), stream.flush()]
+    assert torch.allclose(torch.cat(blocks, -1), resampled[0], atol=1e-6)
+    # the kernels of rate pairs of the same ratio are shared
+    assert Resample(2 * orig_sr, 2 * new_sr, quality).kernel is layer.kernel
+
+
+def test_Resample_kernel_size():
+    # 22050 -> 22051 would need a (22051, 22050 + taps) kernel
+    with pytest.raises(ValueError):
+        Resample(22050, 22051)
+
+
+def test_PitchShift():
+    """
+    Every example should be shifted by its own number of semitones, like librosa does,
+    and not shifted examples should be left as they are.
+    """
+    sample_rate, fft_len, hop_len = 16000, 1024, 256
+    t = torch.arange(sample_rate, dtype=torch.float64) / sample_rate
+    waveforms = torch.sin(2 * np.pi * 440 * t).float().expand(4, 1, -1).contiguous()
+    n_steps = torch.tensor([0., 12., -5., 3.])
+    layer = PitchShift(fft_len=fft_len, hop_len=hop_len)
+
+    shifted = layer(waveforms, n_steps)
+    assert shifted.shape == waveforms.shape
+    assert _all_equal(shifted[0], waveforms[0])
+    for i, steps in enumerate(n_steps.tolist()[1:], 1):
+        spectrum = np.abs(np.fft.rfft(shifted[i, 0].numpy() * np.hanning(sample_rate)))
+        assert abs(np.argmax(spectrum) - 440 * 2 ** (steps / 12.)) <= 1
+        expected = librosa.effects.pitch_shift(waveforms[i, 0].numpy(), sr=sample_rate,
+                                               n_steps=steps, n_fft=fft_len,
+                                               hop_length=hop_len)
+        assert np.corrcoef(shifted[i, 0, 2000:-2000].numpy(), expected[2000:-2000])[0, 1] > 0.99
+        assert torch.allclose(layer(waveforms[i], steps), shifted[i], atol=1e-5)
+
+
+def test_PitchShift_random():
+    """
+    Random shifts should be rounded to a tenth of a step, so that the examples share a few
+    resampling kernels.
+    """
+    _seed()
+    waveforms = torch.randn(16, 1, 4000)
+    n_steps = torch.empty(16).uniform_(-0.5, 0.5)
+    layer = PitchShift(fft_len=512, hop_len=128)
+
+    clear_cache()
+    shifted = layer(waveforms, n_steps)
+    assert cache_info().num_entries <= 10
+    assert torch.allclose(shifted, layer(waveforms, torch.round(n_steps * 10) / 10), atol=1e-6)
+
+
+@pytest.mark.parametrize('hops_per_block', [1, 3])
+def test_StreamingMelspectrogram(hops_per_block):
+    """
+    The frames of the streams should be the ones of Melspectrogram + AmplitudeToDb over
+    the left-padded streams, and a reset stream should start over.
+    """
+    fft_len, hop_len = 512, 160
+    kwargs = dict(num_mels=40, sample_rate=16000, fft_len=fft_len, hop_len=hop_len, frame_len=400)
+    waveforms = torch.randn(3, 2, 60 * hop_len)
+    offline = nn.Sequential(Melspectrogram(**kwargs), AmplitudeToDb())
+    expected = offline(nn.functional.pad(waveforms, [fft_len - hop_len, 0]))
+
+    layer = StreamingMelspectrogram(**kwargs)
+    blocks = [layer(block) for block in waveforms.split(hops_per_block * hop_len, dim=-1)]
+    assert all(block.size(-1) == hops_per_block for block in blocks)
+    assert torch.allclose(torch.cat(blocks, -1), expected, atol=1e-3)
+
+    layer.reset([1])
+    restarted = layer(waveforms[:, :, :hop_len])
+    assert torch.allclose(restarted[1], expected[1, :, :, :1], atol=1e-3)
+    assert not torch.allclose(restarted[0], expected[0, :, :, :1], atol=1e-3)
+    with pytest.raises(ValueError):
+        layer(waveforms[:, :, :hop_len + 1])
+
+    # an unbatched (channel, time) stream is only reset as a whole
+    layer = StreamingMelspectrogram(**kwargs)
+    assert torch.allclose(layer(waveforms[0, :, :hop_len]), expected[0, :, :, :1], atol=1e-3)
+    with pytest.raises(ValueError):
+        layer.reset([1])
+    layer.reset()
+    assert torch.allclose(layer(waveforms[0, :, :hop_len]), expected[0, :, :, :1], atol=1e-3)
+
+
 class Tester(unittest.TestCase):
 
     def test_ComplexNorm(self):
@@ -268,6 +729,28 @@ class Tester(unittest.TestCase):
         _test_mu_decoding()
         _test_both_ways()
 
+    def test_mu_law_dtype(self):
+        """test mu-law codes stored as compact integers"""
+        _seed()
+        waveform = 2.2 * (torch.rand(2, 1024) - 0.5)  # partly outside [-1, 1]
+        for n_quantize, dtype in [(256, torch.uint8), (1024, torch.int16)]:
+            codes = MuLawEncoding(n_quantize, dtype)(waveform)
+            expected = MuLawEncoding(n_quantize)(waveform)
+            assert codes.dtype == dtype
+            assert _all_equal(codes.long(), expected)
+            assert expected.min() == 0 and expected.max() == n_quantize - 1
+            assert _all_equal(MuLawDecoding(n_quantize)(codes),
+                              MuLawDecoding(n_quantize)(expected.float()))
+
+        with self.assertRaises(ValueError):
+            MuLawEncoding(1024, torch.uint8)
+
+        # out-of-range codes decode as the nearest valid one
+        codes = torch.tensor([-3, -1, 0, 255, 256, 1000], dtype=torch.int16)
+        decoded = MuLawDecoding(256)(codes)
+        assert _all_equal(decoded, MuLawDecoding(256)(codes.clamp(0, 255)))
+        assert decoded[0] == -1. and decoded[-1] == 1.
+
 
 if __name__ == '__main__':
     unittest.main()
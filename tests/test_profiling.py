@@ -0,0 +1,59 @@
+"""
+Test the per-stage profiling of the layers.
+"""
+import pytest
+import torch
+
+from torchaudio_contrib.layers import Melspectrogram
+from torchaudio_contrib.profiling import (
+    enable_profiling, disable_profiling, reset_profiling, profiling_stats
+)
+
+
+def test_profiling():
+    melspec = Melspectrogram(num_mels=40, fft_len=512)
+    waveform = torch.randn(2, 1, 4000)
+    expected = melspec(waveform)
+    assert len(profiling_stats(melspec)) == 0
+
+    enable_profiling(melspec)
+    assert torch.equal(melspec(waveform), expected)
+    melspec(waveform)
+
+    stats = profiling_stats(melspec)
+    assert list(stats) == ['0.STFT', '1.ComplexNorm', '2.ApplyFilterbank']
+    assert all(s.calls == 2 and s.total_time > 0 for s in stats.values())
+    assert stats['0.STFT'].input_shapes == [(2, 1, 4000)]
+    assert stats['2.ApplyFilterbank'].output_shapes == [tuple(expected.shape)]
+    assert stats['2.ApplyFilterbank'].output_bytes == 2 * expected.numel() * 4
+
+    with torch.profiler.profile() as prof:
+        melspec(waveform)
+    assert '1.ComplexNorm' in [event.name for event in prof.events()]
+
+    disable_profiling(melspec)
+    melspec(waveform)
+    assert profiling_stats(melspec)['0.STFT'].calls == 3
+    assert len(melspec[0]._forward_hooks) == 0
+
+    enable_profiling(melspec)
+    melspec(waveform)
+    assert profiling_stats(melspec)['0.STFT'].calls == 4
+    reset_profiling(melspec)
+    assert all(s.calls == 0 for s in profiling_stats(melspec).values())
+    disable_profiling(melspec)
+
+
+def test_profiling_error():
+    melspec = Melspectrogram(num_mels=40, fft_len=512)
+    enable_profiling(melspec)
+    with torch.profiler.profile() as prof, pytest.raises(RuntimeError):
+        melspec(torch.randn(2, 1, 100))  # shorter than a frame
+    # the range of the failed stage is closed and the call is not counted
+    assert '0.STFT' in [event.name for event in prof.events()]
+    assert 'range' not in melspec[0]._profiling
+    assert profiling_stats(melspec)['0.STFT'].calls == 0
+
+    melspec(torch.randn(2, 1, 4000))
+    assert profiling_stats(melspec)['0.STFT'].calls == 1
+    disable_profiling(melspec)
@@ -0,0 +1,73 @@
+"""
+Test the layers compiled with TorchScript against the eager ones.
+"""
+import timeit
+import warnings
+
+import pytest
+import torch
+import torch.nn as nn
+
+from torchaudio_contrib.layers import STFT, ComplexNorm, ApplyFilterbank, MelFilterbank, \
+    StretchSpecTime, AmplitudeToDb, DbToAmplitude, MuLawEncoding, MuLawDecoding, \
+    Spectrogram, Melspectrogram, MFCC, Resample
+
+
+def _script(module):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')  # torch.jit.script is deprecated in recent torch
+        return torch.jit.script(module)
+
+
+def _pipelines():
+    filterbank = MelFilterbank(num_freqs=257, num_mels=40, sample_rate=16000).get_filterbank()
+    return {
+        'spectrogram': Spectrogram(fft_len=512, pad=256),
+        'melspectrogram': Melspectrogram(num_mels=40, sample_rate=16000, fft_len=512),
+        'banded_melspectrogram': Melspectrogram(num_mels=40, sample_rate=16000, fft_len=512,
+                                                banded=True),
+        'fused_melspectrogram': Melspectrogram(num_mels=40, sample_rate=16000, fft_len=512,
+                                               fused=True),
+        'complex_spectrogram': nn.Sequential(STFT(fft_len=512, return_complex=True),
+                                             ComplexNorm(power=2)),
+        'db_melspectrogram': nn.Sequential(STFT(fft_len=512), ComplexNorm(power=2),
+                                           ApplyFilterbank(filterbank), AmplitudeToDb(),
+                                           DbToAmplitude()),
+        'stretch': nn.Sequential(STFT(fft_len=512, hop_len=128),
+                                 StretchSpecTime(rate=1.3, hop_len=128, num_bins=257)),
+        'mu_law': nn.Sequential(MuLawEncoding(), MuLawDecoding()),
+        'mfcc': MFCC(num_mfcc=13, num_mels=40, sample_rate=16000, fft_len=512, num_deltas=2),
+        'resample': nn.Sequential(Resample(22050, 16000),
+                                  Melspectrogram(num_mels=40, sample_rate=16000, fft_len=512)),
+    }
+
+
+@pytest.mark.parametrize('name', sorted(_pipelines()))
+def test_script(name):
+    pipeline = _pipelines()[name]
+    waveforms = torch.rand(2, 2, 8000) * 2 - 1
+    scripted = _script(pipeline)
+    assert torch.equal(scripted(waveforms), pipeline(waveforms))
+
+
+def test_script_StretchSpecTime():
+    layer = StretchSpecTime(rate=1.3, hop_len=128, num_bins=257)
+    scripted = _script(layer)
+    complex_spec = torch.randn(2, 1, 257, 50, 2)
+    assert torch.equal(scripted(complex_spec), layer(complex_spec))
+    assert torch.equal(scripted(complex_spec, 0.8), layer(complex_spec, 0.8))
+
+
+def test_script_overhead(record_property):
+    # small inputs, so that the Python dispatch of the eager pipeline dominates
+    pipeline = Melspectrogram(num_mels=40, sample_rate=16000, fft_len=256)
+    scripted = _script(pipeline)
+    waveforms = torch.randn(1, 1, 1024)
+
+    with torch.no_grad():
+        times = [min(timeit.repeat(lambda: module(waveforms), number=100, repeat=5)) / 100
+                 for module in (pipeline, scripted)]
+    record_property('eager_call_us', times[0] * 1e6)
+    record_property('scripted_call_us', times[1] * 1e6)
+    record_property('saved_call_us', (times[0] - times[1]) * 1e6)
+    assert all(t > 0 for t in times)
@@ -0,0 +1,88 @@
+"""
+Test the memory-mapped feature store.
+"""
+import pickle
+
+import pytest
+import torch
+import torch.nn as nn
+
+from torchaudio_contrib.layers import Melspectrogram, AmplitudeToDb
+from torchaudio_contrib.store import (
+    FeatureStore, build_feature_store, is_feature_store_current, write_feature_store
+)
+
+
+@pytest.mark.parametrize('dtype', [torch.float16, torch.float32])
+def test_feature_store(dtype, tmpdir):
+    path = str(tmpdir.join('features'))
+    pipeline = nn.Sequential(Melspectrogram(num_mels=40, fft_len=512), AmplitudeToDb())
+    waveforms = [torch.randn(2, n) for n in (4000, 8000, 512, 6000)]
+
+    store = build_feature_store(path, pipeline, waveforms, dtype)
+    assert len(store) == len(waveforms)
+    for waveform, features in zip(waveforms, store):
+        expected = pipeline(waveform.unsqueeze(0))[0]
+        assert features.dtype == dtype
+        assert torch.allclose(features.float(), expected, rtol=1e-3, atol=1e-2)
+
+    # the features are views of the memory map, one after another
+    assert store[1].data_ptr() - store[0].data_ptr() == store[0].numel() * store[0].element_size()
+    assert torch.equal(pickle.loads(pickle.dumps(store))[-1], store[-1])
+
+    assert is_feature_store_current(path, pipeline)
+    assert build_feature_store(path, pipeline, []).offsets.tolist() == store.offsets.tolist()
+
+    other = nn.Sequential(Melspectrogram(num_mels=40, fft_len=512, sample_rate=16000),
+                          AmplitudeToDb())
+    assert not is_feature_store_current(path, other)
+    with pytest.raises(ValueError):
+        FeatureStore(path, other)
+    assert len(build_feature_store(path, other, waveforms[:2], dtype)) == 2
+
+
+def test_feature_store_corpus(tmpdir):
+    path = str(tmpdir.join('features'))
+    pipeline = Melspectrogram(num_mels=40, fft_len=512)
+    waveforms = [torch.randn(1, n) for n in (4000, 8000)]
+
+    assert len(build_feature_store(path, pipeline, waveforms, corpus='a')) == 2
+    assert is_feature_store_current(path, pipeline, corpus='a')
+    assert not is_feature_store_current(path, pipeline)
+    # other waveforms with the same pipeline are detected through the corpus identifier
+    assert len(build_feature_store(path, pipeline, waveforms[:1], corpus='b')) == 1
+    assert not is_feature_store_current(path, pipeline, corpus='a')
+    # no temporary directory is left behind
+    assert tmpdir.listdir() == [tmpdir.join('features')]
+
+
+def test_feature_store_replace(tmpdir):
+    pipeline = Melspectrogram(num_mels=40, fft_len=512)
+    waveforms = [torch.randn(1, 4000)]
+
+    other = tmpdir.mkdir('other')
+    other.join('data.txt').write('not a feature store')
+    with pytest.raises(ValueError):
+        build_feature_store(str(other), pipeline, waveforms)
+    assert other.join('data.txt').read() == 'not a feature store'
+
+    # an empty directory is replaced
+    assert len(build_feature_store(str(tmpdir.mkdir('empty')), pipeline, waveforms)) == 1
+
+    def failing():
+        yield torch.randn(1, 4000)
+        raise RuntimeError('interrupted')
+
+    path = str(tmpdir.join('features'))
+    build_feature_store(path, pipeline, waveforms)
+    with pytest.raises(RuntimeError):
+        write_feature_store(path, pipeline, failing())
+    # the previous store is left as it was
+    assert len(FeatureStore(path, pipeline)) == 1
+    assert sorted(p.basename for p in tmpdir.listdir()) == ['empty', 'features', 'other']
+
+
+def test_feature_store_overflow(tmpdir):
+    with pytest.raises(ValueError):
+        build_feature_store(str(tmpdir.join('features')), Melspectrogram(num_mels=40),
+                            [1e4 * torch.randn(1, 8000)])
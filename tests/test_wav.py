@@ -0,0 +1,61 @@
+"""
+Test the memory-mapped WAV reader.
+"""
+import pickle
+import struct
+
+import numpy as np
+import pytest
+import torch
+
+from torchaudio_contrib.functional import stft
+from torchaudio_contrib.wav import WavFile
+
+
+def _write_wav(path, samples, format_tag, bits_per_sample, sample_rate=16000):
+    # samples: (time, channel) array; a LIST chunk precedes fmt, as written by many editors
+    num_channels = samples.shape[1]
+    if bits_per_sample == 24:
+        data = samples.astype('<i4').view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    else:
+        data = samples.tobytes()
+    block_align = num_channels * bits_per_sample // 8
+    fmt = struct.pack('<HHIIHH', format_tag, num_channels, sample_rate,
+                      sample_rate * block_align, block_align, bits_per_sample)
+    chunks = b'LIST' + struct.pack('<I', 3) + b'abc\x00' + \
+        b'fmt ' + struct.pack('<I', len(fmt)) + fmt + \
+        b'data' + struct.pack('<I', len(data)) + data
+    with open(path, 'wb') as f:
+        f.write(b'RIFF' + struct.pack('<I', 4 + len(chunks)) + b'WAVE' + chunks)
+
+
+@pytest.mark.parametrize('format_tag, bits_per_sample, dtype, scale', [
+    (1, 16, np.int16, 2 ** 15),
+    (1, 24, np.int32, 2 ** 23),
+    (1, 32, np.int32, 2 ** 31),
+    (3, 32, np.float32, 1),
+])
+def test_wav(format_tag, bits_per_sample, dtype, scale, tmpdir):
+    path = str(tmpdir.join('test.wav'))
+    if format_tag == 3:
+        samples = np.random.uniform(-1, 1, (20000, 2)).astype(dtype)
+    else:
+        samples = np.random.randint(-scale, scale, (20000, 2)).astype(dtype)
+    _write_wav(path, samples, format_tag, bits_per_sample)
+
+    wav = WavFile(path)
+    assert (wav.sample_rate, wav.num_channels, len(wav)) == (16000, 2, 20000)
+    expected = torch.from_numpy(samples.T.astype(np.float64) / scale).float()
+    assert torch.equal(wav.read(), expected)
+    assert torch.equal(wav[1000:3000], expected[:, 1000:3000])
+    assert torch.equal(wav.time_slice(0.5, 1.), expected[:, 8000:16000])
+    if bits_per_sample != 24:
+        assert wav.raw().shape == (2, 20000)
+    assert torch.equal(pickle.loads(pickle.dumps(wav))[-10:], expected[:, -10:])
+
+    fft_len, hop_len = 512, 128
+    window = torch.hann_window(fft_len)
+    blocks = list(wav.iter_blocks(fft_len, hop_len, frames_per_block=50))
+    assert len(blocks) > 2
+    specs = torch.cat([stft(block, fft_len, hop_len, window) for block in blocks], -2)
+    assert torch.allclose(specs, stft(expected, fft_len, hop_len, window), atol=1e-5)
@@ -1,2 +1,9 @@
 from .functional import *
 from .layers import *
+from .cache import *
+from .chunked import *
+from .backends import *
+from .profiling import *
+from .export import *
+from .store import *
+from .wav import *
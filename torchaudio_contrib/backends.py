@@ -0,0 +1,221 @@
+"""
+Backends computing the stft frames of `torchaudio_contrib.stft`.
+
+Every backend takes signals of shape (N, time), already padded, and returns a complex
+tensor of shape (N, num_bins, num_frames):
+    'torch': torch.stft
+    'conv1d': windowed DFT basis applied as a strided conv1d
+    'matmul': windowed DFT basis applied as a batched matmul on unfolded frames
+    'auto': the fastest of them, timed once per signature
+"""
+import json
+import math
+import os
+import threading
+import timeit
+import weakref
+
+import torch
+import torch.nn.functional as F
+
+
+def _pad_window(window, fft_len):
+    """
+    Center-pad `window` with zeros to `fft_len`, as torch.stft does.
+    """
+    left = (fft_len - window.size(0)) // 2
+    return F.pad(window, (left, fft_len - window.size(0) - left))
+
+
+_basis_cache = {}
+_basis_lock = threading.Lock()
+
+
+def dft_basis(window, fft_len):
+    """
+    Windowed DFT basis of a onesided stft.
+
+    Args:
+        window (Tensor): 1-D tensor, zero-padded on both sides to `fft_len`.
+        fft_len (int): FFT window size.
+
+    Returns:
+        Tensor: (2 * num_bins, fft_len), the real parts followed by the imaginary parts.
+            Cached as long as `window` is alive and unmodified.
+    """
+    key = (id(window), window._version, fft_len, window.device, window.dtype)
+    with _basis_lock:
+        basis = _basis_cache.get(key)
+    if basis is not None:
+        return basis
+
+    num_bins = fft_len // 2 + 1
+    dtype = torch.float64 if window.dtype == torch.float64 else torch.float32
+    n = torch.arange(fft_len, dtype=torch.float64, device=window.device)
+    k = torch.arange(num_bins, dtype=torch.float64, device=window.device)
+    phase = 2 * math.pi * (torch.outer(k, n) % fft_len) / fft_len  # (num_bins, fft_len)
+    padded_window = _pad_window(window, fft_len).to(torch.float64)
+    basis = torch.cat([torch.cos(phase), -torch.sin(phase)]) * padded_window
+    basis = basis.to(dtype)
+
+    with _basis_lock:
+        if not any(cached[0] == id(window) for cached in _basis_cache):
+            weakref.finalize(window, _drop_basis, id(window))
+        _basis_cache[key] = basis
+    return basis
+
+
+def _drop_basis(window_id):
+    with _basis_lock:
+        for key in [k for k in _basis_cache if k[0] == window_id]:
+            del _basis_cache[key]
+
+
+def _torch_backend(waveforms, fft_len, hop_len, window, normalized=False, onesided=True):
+    # type: (Tensor, int, int, Tensor, bool, bool) -> Tensor
+    return torch.stft(waveforms, fft_len, hop_len, win_length=window.size(0), window=window,
+                      center=False, normalized=normalized, onesided=onesided,
+                      return_complex=True)
+
+
+def _to_complex(real_imag, num_bins, dim):
+    real, imag = real_imag.split(num_bins, dim=dim)
+    return torch.complex(real, imag)
+
+
+def _conv1d_backend(waveforms, fft_len, hop_len, window):
+    basis = dft_basis(window, fft_len)
+    specgrams = F.conv1d(waveforms.unsqueeze(1), basis.unsqueeze(1),
+                         stride=hop_len)  # (N, 2 * num_bins, num_frames)
+    return _to_complex(specgrams, fft_len // 2 + 1, dim=1)
+
+
+def _matmul_backend(waveforms, fft_len, hop_len, window):
+    basis = dft_basis(window, fft_len)
+    frames = waveforms.unfold(-1, fft_len, hop_len)  # (N, num_frames, fft_len)
+    specgrams = torch.matmul(basis, frames.transpose(1, 2))  # (N, 2 * num_bins, num_frames)
+    return _to_complex(specgrams, fft_len // 2 + 1, dim=1)
+
+
+_backends = {
+    'torch': _torch_backend,
+    'conv1d': _conv1d_backend,
+    'matmul': _matmul_backend,
+}
+
+
+def register_stft_backend(name, fn):
+    """
+    Add a backend. `fn(waveforms, fft_len, hop_len, window)` takes padded signals
+    of shape (N, time) and returns a complex tensor of shape (N, num_bins, num_frames).
+    """
+    _backends[name] = fn
+
+
+def stft_backends():
+    """
+    Return the names of the available backends.
+    """
+    return list(_backends)
+
+
+class _Autotuner(object):
+    """
+    Times every backend the first time a signature is seen and remembers the fastest,
+    in memory and, if a file is set, on disk as json.
+    """
+
+    def __init__(self):
+        self.winners = {}
+        self.path = None
+        self._lock = threading.Lock()
+
+    def set_file(self, path):
+        with self._lock:
+            self.path = path
+            if path is not None and os.path.exists(path):
+                with open(path) as f:
+                    self.winners.update(json.load(f))
+
+    def _save(self):
+        tmp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(self.winners, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def choose(self, waveforms, fft_len, hop_len, window, repeat=3):
+        key = '{}|{}|{}|{}|{}|{}|{}'.format(fft_len, hop_len, waveforms.size(0), waveforms.size(-1),
+                                            str(waveforms.dtype).replace('torch.', ''),
+                                            torch.get_num_threads(), waveforms.device.type)
+        with self._lock:
+            winner = self.winners.get(key)
+        if winner in _backends:
+            return winner
+
+        synchronize = torch.cuda.synchronize if waveforms.is_cuda else (lambda: None)
+        timings, errors = {}, {}
+        for name, fn in _backends.items():
+            def _run():
+                fn(waveforms, fft_len, hop_len, window)
+                synchronize()
+            try:
+                _run()  # warm up, e.g. the basis cache
+            except RuntimeError as error:
+                errors[name] = error
+                continue
+            timings[name] = min(timeit.repeat(_run, number=1, repeat=repeat))
+        if not timings:
+            raise RuntimeError('Every stft backend failed for {}:\n{}'.format(
+                key, '\n'.join('{}: {}'.format(name, error) for name, error in errors.items())))
+        winner = min(timings, key=timings.get)
+
+        with self._lock:
+            self.winners[key] = winner
+            if self.path is not None:
+                self._save()
+        return winner
+
+
+_autotuner = _Autotuner()
+
+
+def set_stft_autotune_file(path):
+    """
+    Load the backends chosen by 'auto' from a json file, and save new choices into it.
+    `None` keeps them in memory only.
+    """
+    _autotuner.set_file(path)
+
+
+def stft_autotune_winners():
+    """
+    Return the backends chosen by 'auto' so far, keyed by
+    'fft_len|hop_len|batch|length|dtype|threads|device'.
+    """
+    return dict(_autotuner.winners)
+
+
+def clear_stft_autotune():
+    """
+    Forget the backends chosen by 'auto' in memory.
+    """
+    _autotuner.winners.clear()
+
+
+def run_stft_backend(backend, waveforms, fft_len, hop_len, window,
+                     normalized=False, onesided=True):
+    """
+    Compute stft frames of padded signals (N, time) with `backend`.
+    `normalized=True` and `onesided=False` are only supported by the 'torch' backend.
+    """
+    if normalized or not onesided or backend == 'torch':
+        if backend not in ('torch', 'auto'):
+            raise ValueError('backend {} does not support normalized={}, onesided={}.'.format(
+                backend, normalized, onesided))
+        return _torch_backend(waveforms, fft_len, hop_len, window, normalized, onesided)
+    if backend == 'auto':
+        backend = _autotuner.choose(waveforms, fft_len, hop_len, window)
+    if backend not in _backends:
+        raise ValueError('backend should be one of {} or auto, but it is: {}'.format(
+            stft_backends(), backend))
+    return _backends[backend](waveforms, fft_len, hop_len, window)
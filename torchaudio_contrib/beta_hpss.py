@@ -1,13 +1,13 @@
 """This is a beta-version of harmonic-percussive source separation.
-Currently it only returns the separated magnitude spectrograms. Once we have inverse-STFT,
-we can extend it to get waveform results.
-
-TODO: add test
+Currently it only returns the separated magnitude spectrograms and masks.
+To get waveform results, apply the masks to the complex STFT and use `istft`.
 """
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
+_MEDIAN_TILE_ELEMENTS = 2 ** 24
+
 
 class HPSS(nn.Module):
     """
@@ -64,38 +64,6 @@ def hpss(mag_specgrams, kernel_size=31, power=2.0, hard=False, mask_only=False):
             ret[3]: percussive mask (Tensor, in same size with `mag_specgrams`)
     """
 
-    def _enhance_either_hpss(mag_specgrams_padded, out, kernel_size, power, which, offset):
-        """
-        A helper function for HPSS
-
-        Args:
-            mag_specgrams_padded (Tensor): one that median filtering can be directly applied
-
-            out (Tensor): The tensor to store the result
-
-            kernel_size (int): The kernel size of median filter
-
-            power (float): to which the enhanced spectrograms are used in computing soft masks.
-
-            which (str): either 'harm' or 'perc'
-
-            offset (int): the padded length
-
-        """
-        if which == 'harm':
-            for t in range(out.shape[3]):
-                out[:, :, :, t] = torch.median(mag_specgrams_padded[:, :, offset:-offset, t:t + kernel_size], dim=3)[0]
-
-        elif which == 'perc':
-            for f in range(out.shape[2]):
-                out[:, :, f, :] = torch.median(mag_specgrams_padded[:, :, f:f + kernel_size, offset:-offset], dim=2)[0]
-        else:
-            raise NotImplementedError('it should be either but you passed which={}'.format(which))
-
-        if power != 1.0:
-            out.pow_(power)
-        # end of the helper function
-
     eps = 1e-6
 
     if not (isinstance(kernel_size, tuple) or isinstance(kernel_size, int)):
@@ -103,16 +71,11 @@ def hpss(mag_specgrams, kernel_size=31, power=2.0, hard=False, mask_only=False):
     if isinstance(kernel_size, int):
         kernel_size = (kernel_size, kernel_size)
 
-    pad = (kernel_size[0] // 2, kernel_size[0] // 2,
-           kernel_size[1] // 2, kernel_size[1] // 2,)
-
-    harm, perc, ret = torch.empty_like(mag_specgrams), torch.empty_like(mag_specgrams), torch.empty_like(mag_specgrams)
-    mag_specgrams_padded = F.pad(mag_specgrams, pad=pad, mode='reflect')
-
-    _enhance_either_hpss(mag_specgrams_padded, out=perc, kernel_size=kernel_size[0], power=power, which='perc',
-                         offset=kernel_size[1] // 2)
-    _enhance_either_hpss(mag_specgrams_padded, out=harm, kernel_size=kernel_size[1], power=power, which='harm',
-                         offset=kernel_size[0] // 2)
+    harm = _median_filter(mag_specgrams, kernel_size[1], dim=3)
+    perc = _median_filter(mag_specgrams, kernel_size[0], dim=2)
+    if power != 1.0:
+        harm.pow_(power)
+        perc.pow_(power)
 
     if hard:
         mask_harm = harm > perc
@@ -126,14 +89,54 @@ def hpss(mag_specgrams, kernel_size=31, power=2.0, hard=False, mask_only=False):
 
     return mag_specgrams * mask_harm, mag_specgrams * mask_perc, mask_harm, mask_perc
 
+
+def _median_filter(specgrams, kernel_size, dim, max_tile_elements=_MEDIAN_TILE_ELEMENTS):
+    """
+    Median filter along either the freq or the time axis, with reflect padding.
+
+    The windows are strided views made by `unfold`, so each tile is reduced by a single
+    `torch.median` call. Tiles are taken along the other axis so that the unfolded windows
+    never hold more than `max_tile_elements` values.
+
+    Args:
+        specgrams (Tensor): (batch, ch, freq, time)
+        kernel_size (int): width of the median filter. An even width holds one value
+            more before the center than after it.
+        dim (int): 2 to filter along freq (percussive), 3 to filter along time (harmonic)
+        max_tile_elements (int): upper bound of the number of window elements per tile
+
+    Returns:
+        (Tensor): median-filtered spectrograms, in same size with `specgrams`
+    """
+    if dim == 2:
+        specgrams = specgrams.transpose(2, 3)
+    elif dim != 3:
+        raise ValueError('dim should be either 2 (freq) or 3 (time), but it is: {}'.format(dim))
+
+    half = kernel_size // 2
+    padded = F.pad(specgrams, pad=(half, half, 0, 0), mode='reflect')
+    out = torch.empty_like(specgrams)
+
+    num_rows, num_cols = specgrams.shape[2:]
+    row_elements = specgrams.size(0) * specgrams.size(1) * num_cols * kernel_size
+    tile = max(1, max_tile_elements // max(row_elements, 1))
+    for start in range(0, num_rows, tile):
+        # an even kernel_size makes one window more than there are columns
+        windows = padded[:, :, start:start + tile].unfold(3, kernel_size, 1)[:, :, :, :num_cols]
+        out[:, :, start:start + tile] = torch.median(windows, dim=4)[0]
+
+    if dim == 2:
+        out = out.transpose(2, 3)
+    return out
+
+
 # def pss_src(x, kernel_size=31, power=2.0, hard=False):
 #     """perform percusive source separation using `hpss()`.
 #     x: (batch, time)"""
-#     n_fft = 1024
-#     hop_length = 256
-#     x_stft = torch.stft(x, n_fft=n_fft, hop_length=hop_length)
-#     x_mag = x_stft.pow(2).sum(-1).unsqueeze(1)  # add channel dim
+#     fft_len, hop_len = 1024, 256
+#     window = torch.hann_window(fft_len)
+#     x_stft = stft(x.unsqueeze(1), fft_len, hop_len, window, pad=fft_len // 2)  # add channel dim
+#     x_mag = complex_norm(x_stft)
 #     _, _, _, mask_perc = hpss(x_mag, kernel_size, power, hard, mask_only=True)
-#     mask_perc.squeeze_(1).unsqueeze_(3)  # remove channel, add last dim for complex
-#     x_perc = time_freq.istft(x_stft * mask_perc, hop_length=hop_length, length=x.shape[1])
-#     return x_perc
+#     x_perc = istft(x_stft * mask_perc.unsqueeze(-1), hop_len, window, pad=fft_len // 2, length=x.shape[1])
+#     return x_perc.squeeze(1)
@@ -0,0 +1,251 @@
+"""
+Process-wide cache of constant tensors such as filterbanks and windows.
+Layers built with the same configuration share the cached tensors as buffers,
+so they must be treated as read-only.
+"""
+import math
+import threading
+from collections import OrderedDict, namedtuple
+
+import torch
+
+from .functional import create_mel_filter, mu_law_table, create_cqt_kernels, \
+    create_decimation_filter, create_dct, create_resample_kernel
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions',
+                                     'num_entries', 'num_bytes', 'max_bytes'])
+
+
+class TensorCache(object):
+    """
+    LRU cache of tensors with a budget in bytes.
+
+    Args:
+        max_bytes (int): Total size of the cached tensors. Least recently used
+            tensors are evicted once it is exceeded. Defaults to 64 MiB.
+    """
+
+    def __init__(self, max_bytes=64 * 2 ** 20):
+        super(TensorCache, self).__init__()
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._num_bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, create):
+        """
+        Return the tensor cached under `key`, calling `create()` to build it on a miss.
+        """
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+
+        tensor = create()
+        num_bytes = tensor.numel() * tensor.element_size()
+
+        with self._lock:
+            if key in self._entries:  # built by another thread meanwhile
+                return self._entries[key]
+            if num_bytes <= self.max_bytes:
+                self._entries[key] = tensor
+                self._num_bytes += num_bytes
+                self._evict()
+        return tensor
+
+    def _evict(self):
+        while self._num_bytes > self.max_bytes:
+            _, tensor = self._entries.popitem(last=False)
+            self._num_bytes -= tensor.numel() * tensor.element_size()
+            self.evictions += 1
+
+    def set_max_bytes(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._num_bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions,
+                             len(self._entries), self._num_bytes, self.max_bytes)
+
+
+_tensor_cache = TensorCache()
+
+
+def _device_dtype(device, dtype):
+    device = torch.device('cpu') if device is None else torch.device(device)
+    dtype = torch.get_default_dtype() if dtype is None else dtype
+    return device, dtype
+
+
+def cached_mel_filter(num_freqs, num_mels, min_freq, max_freq, htk, device=None, dtype=None):
+    """
+    Cached `create_mel_filter`.
+
+    Args:
+        num_freqs, num_mels, min_freq, max_freq, htk: see `create_mel_filter`.
+        device (torch.device, optional): Defaults to cpu.
+        dtype (torch.dtype, optional): Defaults to torch.get_default_dtype().
+
+    Returns:
+        mel_filterbank (Tensor): (num_freqs, num_mels), shared and read-only.
+    """
+    device, dtype = _device_dtype(device, dtype)
+    key = ('mel', num_freqs, num_mels, float(min_freq), float(max_freq), bool(htk), device, dtype)
+
+    def _create():
+        return create_mel_filter(num_freqs, num_mels, min_freq, max_freq, htk).to(device, dtype)
+
+    return _tensor_cache.get(key, _create)
+
+
+def cached_window(window_fn, window_length, device=None, dtype=None, **kwargs):
+    """
+    Cached window, e.g. `cached_window(torch.hann_window, 2048)`.
+
+    Args:
+        window_fn (callable): torch window function.
+        window_length (int): Size of the window.
+        device (torch.device, optional): Defaults to cpu.
+        dtype (torch.dtype, optional): Defaults to torch.get_default_dtype().
+        **kwargs: Other parameters of `window_fn`, e.g. `periodic`.
+
+    Returns:
+        window (Tensor): (window_length,), shared and read-only.
+    """
+    device, dtype = _device_dtype(device, dtype)
+    key = ('window', window_fn.__name__, window_length,
+           tuple(sorted(kwargs.items())), device, dtype)
+
+    def _create():
+        return window_fn(window_length, device=device, dtype=dtype, **kwargs)
+
+    return _tensor_cache.get(key, _create)
+
+
+def cached_dct(num_mels, num_mfcc, norm='ortho', device=None, dtype=None):
+    """
+    Cached `create_dct`.
+
+    Args:
+        num_mels, num_mfcc, norm: see `create_dct`.
+        device (torch.device, optional): Defaults to cpu.
+        dtype (torch.dtype, optional): Defaults to torch.get_default_dtype().
+
+    Returns:
+        dct_basis (Tensor): (num_mels, num_mfcc), shared and read-only.
+    """
+    device, dtype = _device_dtype(device, dtype)
+    key = ('dct', num_mels, num_mfcc, norm, device, dtype)
+
+    def _create():
+        return create_dct(num_mfcc, num_mels, norm).to(device, dtype)
+
+    return _tensor_cache.get(key, _create)
+
+
+def cached_cqt_kernels(sample_rate, min_freq, num_bins, bins_per_octave=12, filter_scale=1.,
+                       gamma=0., device=None, dtype=None):
+    """
+    Cached `create_cqt_kernels`.
+
+    Args:
+        sample_rate, min_freq, num_bins, bins_per_octave, filter_scale, gamma:
+            see `create_cqt_kernels`.
+        device (torch.device, optional): Defaults to cpu.
+        dtype (torch.dtype, optional): Defaults to torch.get_default_dtype().
+
+    Returns:
+        kernels (Tensor): (num_octaves, 2 * bins_per_octave, 2 * num_freqs),
+            shared and read-only.
+    """
+    device, dtype = _device_dtype(device, dtype)
+    key = ('cqt', sample_rate, float(min_freq), num_bins, bins_per_octave, float(filter_scale),
+           float(gamma), device, dtype)
+
+    def _create():
+        kernels = create_cqt_kernels(sample_rate, min_freq, num_bins, bins_per_octave,
+                                     filter_scale, gamma)
+        return kernels.to(device, dtype)
+
+    return _tensor_cache.get(key, _create)
+
+
+def cached_resample_kernel(orig_sr, new_sr, quality='medium', device=None, dtype=None):
+    """
+    Cached `create_resample_kernel`. Rate pairs of the same ratio, e.g. 16000 -> 8000
+    and 32000 -> 16000, share their kernel.
+
+    Args:
+        orig_sr, new_sr, quality: see `create_resample_kernel`.
+        device (torch.device, optional): Defaults to cpu.
+        dtype (torch.dtype, optional): Defaults to torch.get_default_dtype().
+
+    Returns:
+        kernel (Tensor): (num_phases, taps), shared and read-only.
+    """
+    device, dtype = _device_dtype(device, dtype)
+    gcd = math.gcd(orig_sr, new_sr)
+    key = ('resample', orig_sr // gcd, new_sr // gcd, quality, device, dtype)
+
+    def _create():
+        return create_resample_kernel(orig_sr // gcd, new_sr // gcd, quality).to(device, dtype)
+
+    return _tensor_cache.get(key, _create)
+
+
+def cached_decimation_filter(device=None, dtype=None):
+    """
+    Cached `create_decimation_filter` with its default parameters.
+    """
+    device, dtype = _device_dtype(device, dtype)
+    key = ('decimation', device, dtype)
+
+    def _create():
+        return create_decimation_filter().to(device, dtype)
+
+    return _tensor_cache.get(key, _create)
+
+
+def cached_mu_law_table(n_quantize, device=None, dtype=None):
+    """
+    Cached `mu_law_table`, the decoded values of the `n_quantize` mu-law codes.
+    """
+    device, dtype = _device_dtype(device, dtype)
+    key = ('mu_law_table', n_quantize, device, dtype)
+
+    def _create():
+        return mu_law_table(n_quantize, dtype, device)
+
+    return _tensor_cache.get(key, _create)
+
+
+def cache_info():
+    """
+    Return hits, misses, evictions, number of entries, bytes and budget of the tensor cache.
+    """
+    return _tensor_cache.info()
+
+
+def clear_cache():
+    """
+    Drop all cached tensors and reset the statistics.
+    """
+    _tensor_cache.clear()
+
+
+def set_cache_budget(max_bytes):
+    """
+    Set the budget of the tensor cache in bytes, evicting tensors if needed.
+    """
+    _tensor_cache.set_max_bytes(max_bytes)
@@ -0,0 +1,232 @@
+"""
+Memory-bounded versions of `stft`, `phase_vocoder` and `hpss` for long recordings.
+
+The input is processed in time tiles, each extended by the halo the transform needs,
+so that the intermediates never exceed `max_bytes`. Results are either yielded tile by
+tile (`iter_*`) or written into a preallocated output (`chunked_*`), which can be e.g.
+a tensor made from a memory-mapped array with `torch.from_numpy`.
+"""
+import math
+
+import torch
+import torch.nn.functional as F
+
+from .functional import stft, _phase_vocoder_block, _read_positions
+from .beta_hpss import hpss
+
+DEFAULT_MAX_BYTES = 256 * 2 ** 20
+
+
+def _tile_len(max_bytes, bytes_per_step, min_len=1):
+    return max(min_len, int(max_bytes // max(bytes_per_step, 1)))
+
+
+def _leading_numel(tensor, num_trailing):
+    return int(torch.Size(tensor.shape[:-num_trailing]).numel())
+
+
+def _padded_segment(waveforms, begin, end, pad_mode):
+    """
+    Samples `begin <= i < end` of `waveforms` padded on both sides with `pad_mode`, as
+    `F.pad` would give them, but read from the whole signal. So a tile with fewer real
+    samples than padding is padded like the whole signal is.
+    """
+    length = waveforms.size(-1)
+    if begin >= 0 and end <= length:
+        return waveforms[..., begin:end]
+    if pad_mode == 'constant':
+        segment = waveforms[..., max(begin, 0):min(end, length)]
+        return F.pad(segment, (max(0, -begin), max(0, end - length)))
+
+    indices = torch.arange(begin, end, device=waveforms.device)
+    if pad_mode == 'reflect':
+        period = 2 * (length - 1)
+        indices = indices.remainder(period)
+        indices = torch.where(indices >= length, period - indices, indices)
+    elif pad_mode == 'replicate':
+        indices = indices.clamp(0, length - 1)
+    elif pad_mode == 'circular':
+        indices = indices.remainder(length)
+    else:
+        raise ValueError('Unsupported pad_mode {!r}.'.format(pad_mode))
+    return waveforms.index_select(-1, indices)
+
+
+def iter_stft(waveforms, fft_len, hop_len, window, pad=0, pad_mode="reflect",
+              max_bytes=DEFAULT_MAX_BYTES, **kwargs):
+    """
+    `stft` in tiles of frames. Every tile reads its frames plus `fft_len - hop_len`
+    overlapping samples, and the tiles at the ends read their padding from the whole
+    signal, however few of its samples they hold.
+
+    Args:
+        waveforms, fft_len, hop_len, window, pad, pad_mode, **kwargs: see `stft`.
+        max_bytes (int): Approximate bound of the memory used per tile.
+
+    Yields:
+        (int, Tensor): index of the first frame of the tile, and the tile of `stft` output.
+    """
+    length = waveforms.size(-1)
+    num_frames = (length + 2 * pad - fft_len) // hop_len + 1
+    num_bins = fft_len // 2 + 1 if kwargs.get('onesided', True) else fft_len
+
+    # framed signal, windowed copy and complex output of every frame
+    bytes_per_frame = _leading_numel(waveforms, 1) * waveforms.element_size() * \
+        (2 * fft_len + 4 * num_bins)
+    tile_len = _tile_len(max_bytes, bytes_per_frame)
+
+    for start in range(0, num_frames, tile_len):
+        stop = min(start + tile_len, num_frames)
+        begin = start * hop_len - pad
+        end = (stop - 1) * hop_len + fft_len - pad
+        segment = _padded_segment(waveforms, begin, end, pad_mode)
+        yield start, stft(segment, fft_len, hop_len, window, **kwargs)
+
+
+def chunked_stft(waveforms, fft_len, hop_len, window, pad=0, pad_mode="reflect",
+                 max_bytes=DEFAULT_MAX_BYTES, out=None, **kwargs):
+    """
+    `stft` computed with `iter_stft` into a preallocated output.
+
+    Args:
+        waveforms, fft_len, hop_len, window, pad, pad_mode, **kwargs: see `stft`.
+        max_bytes (int): Approximate bound of the memory used per tile.
+        out (Tensor, optional): Output of the shape and dtype `stft` would return.
+
+    Returns:
+        Tensor: same as `stft`.
+    """
+    time_dim = -1 if kwargs.get('return_complex', False) else -2
+    for start, tile in iter_stft(waveforms, fft_len, hop_len, window, pad, pad_mode,
+                                 max_bytes, **kwargs):
+        if out is None:
+            num_frames = (waveforms.size(-1) + 2 * pad - fft_len) // hop_len + 1
+            shape = list(tile.shape)
+            shape[time_dim] = num_frames
+            out = tile.new_empty(shape)
+        out.narrow(time_dim, start, tile.size(time_dim)).copy_(tile)
+    return out
+
+
+def iter_phase_vocoder(spect, rate, phi_advance, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    `phase_vocoder` in tiles of output frames. The accumulated phase is carried
+    from one tile to the next, and every tile reads only the frames it interpolates.
+
+    Args:
+        spect, rate, phi_advance: see `phase_vocoder`. `rate` must be a float.
+        max_bytes (int): Approximate bound of the memory used per tile.
+
+    Yields:
+        (int, Tensor): index of the first output frame of the tile, and the tile of
+            `phase_vocoder` output.
+    """
+    real_layout = not spect.is_complex()
+    if real_layout:
+        spect = torch.view_as_complex(spect.contiguous())
+
+    num_frames = spect.size(3)
+    num_steps = int(math.ceil(num_frames / rate))
+    # two gathered frames, their angles and norms, float64 phase terms and the output
+    bytes_per_step = _leading_numel(spect, 1) * spect.element_size() * 9
+    tile_len = _tile_len(max_bytes, bytes_per_step)
+
+    # carried from tile to tile in float64 and wrapped to [0, 2 pi) (see
+    # `_phase_vocoder_block`), so that many tiles do not drift from `phase_vocoder`
+    phase_acc = torch.angle(spect[:, :, :, :1]).double()
+    for start in range(0, num_steps, tile_len):
+        time_steps = _read_positions(start, min(start + tile_len, num_steps), rate,
+                                     spect.real.dtype, device=spect.device)
+        time_steps = time_steps[time_steps < num_frames]
+        if time_steps.numel() == 0:
+            break
+
+        first = int(time_steps[0])
+        last = int(time_steps[-1]) + 2  # exclusive, may run past the end by 2 frames
+        frames = spect[:, :, :, first:min(last, num_frames)]
+        frames = F.pad(frames, [0, last - first - frames.size(3)])
+
+        spect_stretch, phase_acc = _phase_vocoder_block(
+            frames, time_steps - first, phase_acc, phi_advance)
+        if real_layout:
+            spect_stretch = torch.view_as_real(spect_stretch)
+        yield start, spect_stretch
+
+
+def chunked_phase_vocoder(spect, rate, phi_advance, max_bytes=DEFAULT_MAX_BYTES, out=None):
+    """
+    `phase_vocoder` computed with `iter_phase_vocoder` into a preallocated output.
+
+    Args:
+        spect, rate, phi_advance: see `phase_vocoder`. `rate` must be a float.
+        max_bytes (int): Approximate bound of the memory used per tile.
+        out (Tensor, optional): Output of the shape and dtype `phase_vocoder` would return.
+
+    Returns:
+        Tensor: same as `phase_vocoder`.
+    """
+    time_dim = 3
+    for start, tile in iter_phase_vocoder(spect, rate, phi_advance, max_bytes):
+        if out is None:
+            num_frames = spect.size(3)
+            num_steps = int((_read_positions(0, int(math.ceil(num_frames / rate)), rate,
+                                             tile.real.dtype) < num_frames).sum())
+            shape = list(tile.shape)
+            shape[time_dim] = num_steps
+            out = tile.new_empty(shape)
+        out.narrow(time_dim, start, tile.size(time_dim)).copy_(tile)
+    return out
+
+
+def iter_hpss(mag_specgrams, kernel_size=31, power=2.0, hard=False, mask_only=False,
+              max_bytes=DEFAULT_MAX_BYTES):
+    """
+    `hpss` in tiles of time frames. Every tile reads `kernel_size // 2` frames of halo
+    on both sides for the harmonic (time-axis) median filter.
+
+    Args:
+        mag_specgrams, kernel_size, power, hard, mask_only: see `hpss`.
+        max_bytes (int): Approximate bound of the memory used per tile.
+
+    Yields:
+        (int, Tuple): index of the first frame of the tile, and the tile of `hpss` output.
+    """
+    kernel_size = (kernel_size, kernel_size) if isinstance(kernel_size, int) else kernel_size
+    halo = kernel_size[1] // 2
+    num_frames = mag_specgrams.size(3)
+
+    # median windows of both filters plus the padded input, enhancements and outputs
+    bytes_per_frame = _leading_numel(mag_specgrams, 1) * mag_specgrams.element_size() * \
+        (kernel_size[0] + kernel_size[1] + 8)
+    # reflect padding needs more than `halo` frames
+    tile_len = _tile_len(max_bytes, bytes_per_frame, min_len=halo + 1)
+
+    for start in range(0, num_frames, tile_len):
+        stop = min(start + tile_len, num_frames)
+        begin, end = max(0, start - halo), min(num_frames, stop + halo)
+        ret = hpss(mag_specgrams[:, :, :, begin:end], kernel_size, power, hard, mask_only)
+        yield start, tuple(None if r is None else r[:, :, :, start - begin:stop - begin]
+                           for r in ret)
+
+
+def chunked_hpss(mag_specgrams, kernel_size=31, power=2.0, hard=False, mask_only=False,
+                 max_bytes=DEFAULT_MAX_BYTES, out=None):
+    """
+    `hpss` computed with `iter_hpss` into preallocated outputs.
+
+    Args:
+        mag_specgrams, kernel_size, power, hard, mask_only: see `hpss`.
+        max_bytes (int): Approximate bound of the memory used per tile.
+        out (Tuple, optional): Outputs of the shapes and dtypes `hpss` would return.
+
+    Returns:
+        Tuple: same as `hpss`.
+    """
+    for start, tiles in iter_hpss(mag_specgrams, kernel_size, power, hard, mask_only, max_bytes):
+        if out is None:
+            out = tuple(None if tile is None else
+                        tile.new_empty(mag_specgrams.shape) for tile in tiles)
+        for o, tile in zip(out, tiles):
+            if tile is not None:
+                o[:, :, :, start:start + tile.size(3)].copy_(tile)
+    return out
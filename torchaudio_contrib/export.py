@@ -0,0 +1,103 @@
+"""
+Export of feature extraction modules to ONNX, e.g.
+
+    >>> melspec = Melspectrogram(num_mels=64, fft_len=512, exportable=True)
+    >>> export_onnx(nn.Sequential(melspec, AmplitudeToDb()), 'melspec.onnx', torch.randn(1, 1, 16000))
+
+Requires the `onnx` package to check the exported graph, and `onnxruntime`
+to compare its outputs with the eager module.
+"""
+import contextlib
+import inspect
+
+import torch
+
+
+def _dynamic_axes(tensor, name):
+    # batch and time are dynamic, the other dimensions are fixed by the module
+    return {name: {0: 'batch', tensor.dim() - 1: 'time'}}
+
+
+@contextlib.contextmanager
+def _eval_mode(*modules):
+    # the training flag of every submodule, which may differ from the one of its parent
+    modes = [(m, m.training) for module in modules if module is not None
+             for m in module.modules()]
+    try:
+        for module in modules:
+            if module is not None:
+                module.eval()
+        yield
+    finally:
+        for m, training in modes:
+            m.training = training
+
+
+def export_onnx(module, path, waveforms, reference=None, opset_version=17,
+                check=True, rtol=1e-3, atol=1e-4):
+    """
+    Export `module` to ONNX and check that onnxruntime computes the same outputs.
+
+    Args:
+        module (nn.Module): Module built from exportable layers, e.g.
+            `Melspectrogram(..., exportable=True)`.
+        path (str or file-like): Where to write the ONNX model.
+        waveforms (Tensor): Example input (batch, channel, time). The batch and time
+            dimensions of the input and the output are dynamic in the exported model.
+        reference (nn.Module, optional): Eager module whose outputs onnxruntime should
+            reproduce, e.g. the `Melspectrogram` that `module` replaces.
+            Defaults to `module`.
+        opset_version (int): ONNX opset. Defaults to 17.
+        check (bool): If True, validate the exported model with `onnx.checker` and
+            compare the outputs of onnxruntime with the ones of `reference`.
+            Defaults to True.
+        rtol, atol (float): Tolerances of the comparison.
+
+    Returns:
+        float: Maximum absolute difference between onnxruntime and `reference`,
+            or None if `check` is False.
+    """
+    # exported and compared in eval mode, and left in the modes they were given in
+    with _eval_mode(module, reference):
+        return _export_onnx(module, path, waveforms, reference, opset_version, check,
+                            rtol, atol)
+
+
+def _export_onnx(module, path, waveforms, reference, opset_version, check, rtol, atol):
+    with torch.no_grad():
+        outputs = module(waveforms)
+
+    kwargs = {}
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        kwargs['dynamo'] = False  # the TorchScript-based exporter, which needs no onnxscript
+    dynamic_axes = _dynamic_axes(waveforms, 'waveforms')
+    dynamic_axes.update(_dynamic_axes(outputs, 'features'))
+    torch.onnx.export(module, (waveforms,), path, input_names=['waveforms'],
+                      output_names=['features'], dynamic_axes=dynamic_axes,
+                      opset_version=opset_version, **kwargs)
+
+    if not check:
+        return None
+
+    import numpy as np
+    import onnx
+    import onnxruntime
+
+    model = onnx.load(path) if isinstance(path, str) else onnx.load_from_string(path.getvalue())
+    onnx.checker.check_model(model)
+
+    session = onnxruntime.InferenceSession(model.SerializeToString(),
+                                           providers=['CPUExecutionProvider'])
+    features = session.run(None, {'waveforms': waveforms.detach().cpu().numpy()})[0]
+
+    if reference is not None:
+        with torch.no_grad():
+            outputs = reference(waveforms)
+    expected = outputs.detach().cpu().numpy()
+    if features.shape != expected.shape:
+        raise RuntimeError('The exported model returns features of shape {}, '
+                           'but the eager module returns {}.'.format(features.shape, expected.shape))
+    if not np.allclose(features, expected, rtol=rtol, atol=atol):
+        raise RuntimeError('The exported model differs from the eager module by up to {}.'.format(
+            np.abs(features - expected).max()))
+    return float(np.abs(features - expected).max())
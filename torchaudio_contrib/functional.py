@@ -1,6 +1,11 @@
 import torch
 import math
 import torch.nn.functional as F
+from fractions import Fraction
+from functools import lru_cache
+from typing import List
+
+from .backends import run_stft_backend, _torch_backend, _pad_window
 
 
 def _mel_to_hertz(mel, htk):
@@ -46,8 +51,9 @@ def _hertz_to_mel(hz, htk):
                        torch.log(hz / min_log_hz) / logstep, mel)
 
 
-def stft(waveforms, fft_len, hop_len, window,
-         pad=0, pad_mode="reflect", **kwargs):
+def stft(waveforms, fft_len, hop_len, window, pad=0, pad_mode="reflect",
+         return_complex=False, backend='torch', normalized=False, onesided=True, lengths=None):
+    # type: (Tensor, int, int, Tensor, int, str, bool, str, bool, bool, Optional[Tensor]) -> Tensor
     """
     Wrap torch.stft allowing for multi-channel stft.
 
@@ -59,11 +65,28 @@ def stft(waveforms, fft_len, hop_len, window,
         window (Tensor): 1-D tensor.
         pad (int): Amount of padding to apply to signal.
         pad_mode: padding method (see torch.nn.functional.pad).
-        **kwargs: Other torch.stft parameters, see torch.stft for more details.
+        return_complex (bool): If True, return a tensor of complex dtype without
+            the trailing (real, imag) dimension. Defaults to False.
+        backend (str): 'torch' (torch.stft), 'conv1d' or 'matmul' (windowed DFT basis),
+            or 'auto' to time them once per input signature and use the fastest.
+            See torchaudio_contrib.backends. Only 'torch' is supported by TorchScript.
+            Defaults to 'torch'.
+        normalized (bool): see torch.stft. Only supported by the 'torch' backend.
+        onesided (bool): see torch.stft. Only supported by the 'torch' backend.
+        lengths (LongTensor, optional): (batch,) number of valid samples of every
+            example of a zero-padded batch. Every example is transformed over its own
+            samples (and padded at its own end), so that the frames past them are never
+            computed and are zero. Examples too short for `pad_mode`, e.g. of at most
+            `pad` samples for 'reflect', are zero-padded instead, and empty examples have
+            no frame. Not supported by TorchScript.
 
     Returns:
         Tensor: (batch, channel, num_bins, time, complex)
-            or (channel, num_bins, time, complex)
+            or (channel, num_bins, time, complex),
+            or (batch, channel, num_bins, time) / (channel, num_bins, time)
+            of complex dtype if `return_complex`.
+            With `lengths`, a tuple of the spectrograms and the number of valid
+            frames of every example (batch,) (see `stft_lengths` and `frame_mask`).
 
     Example:
         >>> signal = torch.randn(16, 2, 10000)
@@ -74,6 +97,11 @@ def stft(waveforms, fft_len, hop_len, window,
         torch.Size([16, 2, 1025, 20])
     """
 
+    if not torch.jit.is_scripting():
+        if lengths is not None:
+            return _ragged_stft(waveforms, fft_len, hop_len, window, pad, pad_mode,
+                                return_complex, backend, normalized, onesided, lengths)
+
     # (!) Only 3D, 4D, 5D padding with non-constant
     # padding are supported for now.
 
@@ -81,7 +109,7 @@ def stft(waveforms, fft_len, hop_len, window,
         # This is added because otherwise F.pad does not work.
         # Due to this manual padding, we use stft(center=False) below.
         add_batch_dim = True
-        waveforms = waveforms.reshape((1,) + waveforms.shape)
+        waveforms = waveforms.unsqueeze(0)
     else:
         add_batch_dim = False
 
@@ -92,24 +120,353 @@ def stft(waveforms, fft_len, hop_len, window,
 
     waveforms = waveforms.reshape(-1, waveforms.size(-1))
 
-    complex_specgrams = torch.stft(waveforms, fft_len, hop_len, window=window,
-                       win_length=window.size(0), center=False,
-                       **kwargs)
+    if torch.jit.is_scripting():
+        if backend != 'torch':
+            raise ValueError('Only the torch backend is supported by TorchScript.')
+        complex_specgrams = _torch_backend(waveforms, fft_len, hop_len, window,
+                                           normalized, onesided)
+    else:
+        complex_specgrams = run_stft_backend(backend, waveforms, fft_len, hop_len, window,
+                                             normalized, onesided)
+    if not return_complex:
+        complex_specgrams = torch.view_as_real(complex_specgrams)
     complex_specgrams = complex_specgrams.reshape(leading_dims + complex_specgrams.shape[1:])
 
     if add_batch_dim:
-        complex_specgrams = complex_specgrams.reshape(complex_specgrams.shape[1:])
+        complex_specgrams = complex_specgrams.squeeze(0)
 
     return complex_specgrams
 
 
-def complex_norm(complex_tensor, power=1.0):
+def stft_lengths(lengths, fft_len, hop_len, pad=0):
+    # type: (Tensor, int, int, int) -> Tensor
+    """
+    Number of `stft` frames of signals of `lengths` samples.
+    """
+    return torch.clamp((lengths + 2 * pad - fft_len) // hop_len + 1, min=0)
+
+
+def frame_mask(lengths, max_len=None):
+    # type: (Tensor, Optional[int]) -> Tensor
+    """
+    Mask of the valid frames of a zero-padded batch.
+
+    Args:
+        lengths (LongTensor): (batch,) number of valid frames of every example
+        max_len (int, optional): number of frames of the batch. Defaults to lengths.max().
+
+    Returns:
+        BoolTensor: (batch, max_len), True for valid frames
+    """
+    if max_len is None:
+        max_len = int(lengths.max()) if lengths.numel() > 0 else 0
+    return torch.arange(max_len, device=lengths.device) < lengths.unsqueeze(1)
+
+
+def _frame_counts(lengths):
+    # type: (Tensor) -> List[int]
+    return torch.jit.annotate(List[int], lengths.tolist())
+
+
+def _valid_frames(specgrams, lengths):
+    # type: (Tensor, Tensor) -> Tensor
+    """
+    (batch, 1, 1, time) mask of the valid frames of (batch, channel, freq, time) spectrograms.
+    """
+    mask = frame_mask(lengths.to(specgrams.device), specgrams.size(3))
+    return mask.unsqueeze(1).unsqueeze(1)
+
+
+def _can_pad(length, pad, pad_mode):
+    # F.pad reflects about the first and last samples and wraps around at most once
+    if pad_mode == 'reflect':
+        return length > pad
+    if pad_mode == 'circular':
+        return length >= pad
+    return length > 0 or pad_mode == 'constant'
+
+
+def _ragged_stft(waveforms, fft_len, hop_len, window, pad, pad_mode,
+                 return_complex, backend, normalized, onesided, lengths):
+    """
+    `stft` of the valid samples of every example of a zero-padded batch.
+    """
+    if waveforms.dim() != 3:
+        raise ValueError('lengths requires waveforms of shape (batch, channel, time), '
+                         'but they are of shape {}.'.format(tuple(waveforms.shape)))
+    lengths = lengths.clamp(0, waveforms.size(-1))
+    # an empty example has no frame, whatever the padding
+    num_frames = torch.where(lengths > 0, stft_lengths(lengths, fft_len, hop_len, pad),
+                             torch.zeros_like(lengths))
+    num_bins = fft_len // 2 + 1 if onesided else fft_len
+    max_frames = int(num_frames.max()) if num_frames.numel() > 0 else 0
+    complex_specgrams = torch.zeros(waveforms.shape[:2] + (num_bins, max_frames),
+                                    dtype=waveforms.dtype.to_complex(), device=waveforms.device)
+
+    # one stft per example over its own samples, so that padded frames are never computed
+    for i, (length, frames) in enumerate(zip(_frame_counts(lengths), _frame_counts(num_frames))):
+        if frames > 0:
+            # too short to be reflected (or wrapped around) by `pad` samples
+            mode = pad_mode if pad == 0 or _can_pad(length, pad, pad_mode) else 'constant'
+            complex_specgrams[i, :, :, :frames] = stft(
+                waveforms[i, :, :length], fft_len, hop_len, window, pad, mode,
+                True, backend, normalized, onesided)
+
+    if not return_complex:
+        complex_specgrams = torch.view_as_real(complex_specgrams)
+    return complex_specgrams, num_frames.to(waveforms.device)
+
+
+def window_sumsquare(window, num_frames, hop_len, fft_len=None):
+    """
+    Compute the sum-square envelope of a window overlap-added over `num_frames` frames,
+    which is the normalizer of `istft`.
+
+    Args:
+        window (Tensor): 1-D tensor, zero-padded on both sides to `fft_len`.
+        num_frames (int): number of stft frames.
+        hop_len (int): Number audio of frames between STFT columns.
+        fft_len (int): FFT window size. Defaults to window.size(0).
+
+    Returns:
+        Tensor: (fft_len + hop_len * (num_frames - 1),)
+    """
+    fft_len = window.size(0) if fft_len is None else fft_len
+    window = _pad_window(window, fft_len)
+    frames = window.pow(2).expand(1, num_frames, fft_len)
+    return _overlap_add(frames, hop_len).reshape(-1)
+
+
+def istft_normalizer(window, num_frames, hop_len, fft_len=None):
+    """
+    `window_sumsquare` with values close to zero replaced by 1,
+    so that `istft` can divide by it directly.
+    """
+    wsq = window_sumsquare(window, num_frames, hop_len, fft_len)
+    return torch.where(wsq > 1e-11, wsq, torch.ones_like(wsq))
+
+
+def _overlap_add(frames, hop_len):
+    """
+    Overlap-add (N, num_frames, frame_len) frames into (N, length).
+    """
+    batch, num_frames, frame_len = frames.shape
+    length = frame_len + hop_len * (num_frames - 1)
+    if frame_len % hop_len:
+        return F.fold(frames.transpose(1, 2), output_size=(1, length),
+                      kernel_size=(1, frame_len), stride=(1, hop_len)).reshape(batch, length)
+
+    # frames made of `overlap` hops: add each of the hops of all the frames at once
+    overlap = frame_len // hop_len
+    hops = frames.reshape(batch, num_frames, overlap, hop_len)
+    waveforms = frames.new_zeros(batch, num_frames + overlap - 1, hop_len)
+    for i in range(overlap):
+        waveforms[:, i:i + num_frames] += hops[:, :, i]
+    return waveforms.reshape(batch, length)
+
+
+def istft(complex_specgrams, hop_len, window, pad=0, length=None,
+          normalizer=None):
+    """
+    Inverse of `stft`. All frames are inverse-transformed at once and
+    overlap-added, then normalized by the window sum-square.
+
+    Args:
+        complex_specgrams (Tensor): (batch, channel, num_bins, time, complex=2)
+            or (channel, num_bins, time, complex=2), or without the last dimension
+            if of complex dtype.
+        hop_len (int): Number audio of frames between STFT columns.
+        window (Tensor): 1-D tensor, the one used in `stft`.
+        pad (int): Amount of padding that was applied to signal in `stft`.
+        length (int, optional): Length of the output signals. The output is trimmed
+            or zero-padded to it.
+        normalizer (Tensor, optional): precomputed `window_sumsquare` of `window`,
+            with values close to zero already replaced by 1 (see `istft_normalizer`).
+
+    Returns:
+        Tensor: (batch, channel, time) or (channel, time)
+
+    Example:
+        >>> signal = torch.randn(16, 2, 10000)
+        >>> window = torch.hann_window(2048)
+        >>> x = stft(signal, 2048, 512, window, pad=1024)
+        >>> istft(x, 512, window, pad=1024, length=10000).shape
+        torch.Size([16, 2, 10000])
+    """
+    if not complex_specgrams.is_complex():
+        complex_specgrams = torch.view_as_complex(complex_specgrams.contiguous())
+    leading_dims = complex_specgrams.shape[:-2]
+    num_bins, num_frames = complex_specgrams.shape[-2:]
+    fft_len = (num_bins - 1) * 2
+
+    complex_specgrams = complex_specgrams.reshape((-1, num_bins, num_frames))
+    # (N, num_frames, fft_len)
+    frames = torch.fft.irfft(complex_specgrams.transpose(1, 2), n=fft_len, dim=2)
+    frames = frames.mul_(_pad_window(window, fft_len))
+
+    waveforms = _overlap_add(frames, hop_len)
+
+    if normalizer is None:
+        normalizer = istft_normalizer(window, num_frames, hop_len, fft_len)
+    waveforms = waveforms / normalizer
+
+    if length is None:
+        waveforms = waveforms[:, pad:waveforms.size(-1) - pad]
+    else:
+        # the last frame may reach further into the right padding than `length`
+        waveforms = waveforms[:, pad:pad + length]
+        if waveforms.size(-1) < length:
+            waveforms = F.pad(waveforms, (0, length - waveforms.size(-1)))
+
+    return waveforms.reshape(leading_dims + waveforms.shape[-1:])
+
+
+def griffin_lim(mag_specgrams, hop_len, window, pad=0, pad_mode="reflect", length=None,
+                num_iters=32, momentum=0.99, tol=None, power=1., init='random',
+                return_num_iters=False):
+    """
+    Reconstruct waveforms from magnitude spectrograms with the fast Griffin-Lim
+    algorithm (Perraudin et al., 2013), which alternates `istft` and `stft` and
+    extrapolates the phases with `momentum`. A momentum of 0 gives the original
+    Griffin-Lim.
+
+    The whole batch is processed at once. With `tol`, every example stops iterating once
+    the spectral convergence of its rebuilt spectrogram,
+    `||mag_specgrams - |stft(istft(...))||| / ||mag_specgrams||`, is below `tol`, and the
+    remaining examples go on as a smaller batch.
+
+    Args:
+        mag_specgrams (Tensor): (batch, channel, num_bins, time) or (channel, num_bins, time)
+        hop_len (int): Number audio of frames between STFT columns.
+        window (Tensor): 1-D tensor, the one of the stft.
+        pad (int): Amount of padding of the stft. Defaults to 0.
+        pad_mode: padding method of the stft. Defaults to "reflect".
+        length (int, optional): Length of the output signals.
+        num_iters (int): Maximum number of iterations. Defaults to 32.
+        momentum (float): Defaults to 0.99.
+        tol (float, optional): Spectral convergence under which an example stops.
+        power (float): Exponent of the magnitudes, e.g. 2 for power spectrograms.
+            Defaults to 1.
+        init (str): 'random' for uniformly random initial phases, or 'zeros'.
+            Defaults to 'random'.
+        return_num_iters (bool): Also return the number of iterations of every example.
+
+    Returns:
+        Tensor: (batch, channel, time) or (channel, time), and the (batch,) number of
+            iterations if `return_num_iters`.
+    """
+    if init not in ('random', 'zeros'):
+        raise ValueError('init must be \'random\' or \'zeros\', not {}.'.format(init))
+    unbatched = mag_specgrams.dim() == 3
+    if unbatched:
+        mag_specgrams = mag_specgrams.unsqueeze(0)
+    if power != 1.:
+        mag_specgrams = mag_specgrams.pow(1. / power)
+    batch, num_bins, num_frames = mag_specgrams.size(0), mag_specgrams.size(2), mag_specgrams.size(3)
+    fft_len = (num_bins - 1) * 2
+    # the signal length whose stft has exactly num_frames frames
+    signal_len = fft_len + hop_len * (num_frames - 1) - 2 * pad
+    normalizer = istft_normalizer(window, num_frames, hop_len, fft_len).to(mag_specgrams.device)
+    factor = momentum / (1. + momentum)
+
+    if init == 'random':
+        angles = torch.polar(torch.ones_like(mag_specgrams),
+                             2 * math.pi * torch.rand_like(mag_specgrams))
+    else:
+        angles = torch.ones_like(mag_specgrams, dtype=mag_specgrams.dtype.to_complex())
+    all_mag_specgrams = mag_specgrams
+    # phases of the examples that stopped early, and iterations of every example
+    stopped_angles = None
+    num_iters_done = torch.full((batch,), num_iters, dtype=torch.long)
+    ids = torch.arange(batch)
+    if tol is not None:
+        mag_norms = mag_specgrams.reshape(batch, -1).norm(dim=1)
+
+    # buffers reused across the iterations
+    specgrams = torch.empty_like(angles)
+    magnitudes = torch.empty_like(mag_specgrams)
+    rebuilt = torch.zeros_like(angles)
+    for i in range(num_iters):
+        torch.mul(angles, mag_specgrams, out=specgrams)
+        waveforms = istft(specgrams, hop_len, window, pad, signal_len, normalizer)
+        previous, rebuilt = rebuilt, stft(waveforms, fft_len, hop_len, window, pad, pad_mode,
+                                          return_complex=True)
+        # extrapolate the new phases, in place into the buffer of the previous ones
+        angles = torch.sub(rebuilt, previous, alpha=factor, out=previous)
+        torch.abs(angles, out=magnitudes)
+        # normalize by multiplying the real view, cheaper than a complex division
+        torch.view_as_real(angles).mul_(magnitudes.add_(1e-16).reciprocal_().unsqueeze(-1))
+
+        if tol is None:
+            continue
+        torch.abs(rebuilt, out=magnitudes)
+        convergence = magnitudes.sub_(mag_specgrams).reshape(ids.size(0), -1).norm(dim=1)
+        done = (convergence <= tol * mag_norms).cpu()
+        if done.any():
+            if stopped_angles is None:
+                stopped_angles = torch.empty_like(all_mag_specgrams, dtype=angles.dtype)
+            stopped_angles[ids[done]] = angles[done]
+            num_iters_done[ids[done]] = i + 1
+            keep = ~done
+            ids = ids[keep]
+            if ids.numel() == 0:
+                break
+            # go on with the examples that did not converge, as a smaller batch
+            mag_specgrams, mag_norms = mag_specgrams[keep], mag_norms[keep]
+            angles, rebuilt = angles[keep], rebuilt[keep]
+            specgrams, magnitudes = specgrams[keep], magnitudes[keep]
+
+    if stopped_angles is not None:
+        if ids.numel() > 0:
+            stopped_angles[ids] = angles
+        angles = stopped_angles
+    waveforms = istft(angles * all_mag_specgrams, hop_len, window, pad,
+                      signal_len if length is None else length, normalizer)
+    if unbatched:
+        waveforms = waveforms.squeeze(0)
+    if return_num_iters:
+        return waveforms, num_iters_done
+    return waveforms
+
+
+def complex_norm(complex_tensor, power=1.0, fused=False, lengths=None):
+    # type: (Tensor, float, bool, Optional[Tensor]) -> Tensor
     """
     Normalize complex input.
 
     Args:
-        complex_tensor (Tensor): Tensor shape of (*, complex=2)
+        complex_tensor (Tensor): Tensor shape of (*, complex=2), or (*) of complex dtype
+        power (float): Exponent of the magnitude. Defaults to 1.
+        fused (bool): If True, compute real^2 + imag^2 directly and raise it to `power / 2`
+            instead of taking the square root and then the power. It skips the
+            square root and a full-size intermediate, e.g. for power spectrograms,
+            but results may differ in the last bits. Defaults to False.
+        lengths (LongTensor, optional): (batch,) number of valid frames of every example
+            of a (batch, channel, freq, time, complex=2) input. The padded frames of the
+            output are zero.
     """
+    if complex_tensor.is_complex():
+        complex_tensor = torch.view_as_real(complex_tensor)
+
+    if lengths is None:
+        return _complex_norm(complex_tensor, power, fused)
+
+    mag_specgrams = _complex_norm(complex_tensor, power, fused)
+    return mag_specgrams.masked_fill(~_valid_frames(mag_specgrams, lengths), 0.)
+
+
+def _complex_norm(complex_tensor, power, fused):
+    # type: (Tensor, float, bool) -> Tensor
+
+    if fused:
+        real, imag = complex_tensor[..., 0], complex_tensor[..., 1]
+        power_specgrams = (real * real).addcmul_(imag, imag)
+        if power == 2.:
+            return power_specgrams
+        if power == 1.:
+            return power_specgrams.sqrt_()
+        return power_specgrams.pow(power / 2.)
+
     if power == 1.:
         return torch.norm(complex_tensor, 2, -1)
     return torch.norm(complex_tensor, 2, -1).pow(power)
@@ -153,30 +510,396 @@ def create_mel_filter(num_freqs, num_mels, min_freq, max_freq, htk):
     return mel_filterbank
 
 
-def apply_filterbank(mag_specgrams, filterbank):
+def apply_filterbank(mag_specgrams, filterbank, lengths=None):
+    # type: (Tensor, Tensor, Optional[Tensor]) -> Tensor
     """
     Transform spectrogram given a filterbank matrix.
 
     Args:
         mag_specgrams (Tensor): (batch, channel, num_freqs, time)
         filterbank (Tensor): (num_freqs, num_bands)
+        lengths (LongTensor, optional): (batch,) number of valid frames of every example.
+            The padded frames of the output are zero.
 
     Returns:
         (Tensor): (batch, channel, num_bands, time)
     """
+    specgrams = _apply_filterbank(mag_specgrams, filterbank)
+    if lengths is None:
+        return specgrams
+    return specgrams.masked_fill(~_valid_frames(specgrams, lengths), 0.)
+
+
+def _apply_filterbank(mag_specgrams, filterbank):
+    # type: (Tensor, Tensor) -> Tensor
     return torch.matmul(mag_specgrams.transpose(-2, -1), filterbank).transpose(-2, -1)
 
 
+def banded_filterbank(filterbank):
+    """
+    Compact a filterbank matrix whose bands cover contiguous ranges of bins,
+    such as the one from `create_mel_filter`.
+
+    Args:
+        filterbank (Tensor): (num_freqs, num_bands)
+
+    Returns:
+        starts (LongTensor): (num_bands,) index of the first nonzero bin of each band
+        lengths (LongTensor): (num_bands,) number of bins from the first to the last
+            nonzero bin of each band
+        weights (Tensor): (sum(lengths),) weights of those bins, band after band
+    """
+    num_freqs, num_bands = filterbank.shape
+    nonzero = filterbank.t() != 0  # (num_bands, num_freqs)
+    bins = torch.arange(num_freqs, device=filterbank.device).expand(num_bands, num_freqs)
+    starts = torch.where(nonzero, bins, torch.full_like(bins, num_freqs)).min(1)[0]
+    ends = torch.where(nonzero, bins + 1, torch.zeros_like(bins)).max(1)[0]
+    lengths = torch.clamp(ends - starts, min=0)
+    starts = torch.where(lengths > 0, starts, torch.zeros_like(starts))
+
+    freq_index, band_index = _banded_indices(starts, lengths)
+    weights = filterbank[freq_index, band_index]
+    return starts, lengths, weights
+
+
+def _banded_indices(starts, lengths):
+    """
+    Expand band starts and lengths into the bin and band index of every packed weight.
+    """
+    band_index = torch.repeat_interleave(torch.arange(starts.size(0), device=starts.device), lengths)
+    offsets = torch.cumsum(lengths, 0) - lengths  # packed position of each band start
+    freq_index = torch.arange(band_index.size(0), device=starts.device) - \
+        offsets[band_index] + starts[band_index]
+    return freq_index, band_index
+
+
+def apply_banded_filterbank(mag_specgrams, starts, lengths, weights, indices=None,
+                            frame_lengths=None):
+    # type: (Tensor, Tensor, Tensor, Tensor, Optional[Tuple[Tensor, Tensor]], Optional[Tensor]) -> Tensor
+    """
+    Transform spectrogram given a banded filterbank, touching only the bins within bands.
+    Equivalent to `apply_filterbank` with the matrix the bands were made from.
+
+    Args:
+        mag_specgrams (Tensor): (batch, channel, num_freqs, time)
+        starts, lengths, weights (Tensor): see `banded_filterbank`.
+        indices (tuple, optional): precomputed `_banded_indices(starts, lengths)`.
+        frame_lengths (LongTensor, optional): (batch,) number of valid frames of every
+            example. The padded frames of the output are zero.
+
+    Returns:
+        (Tensor): (batch, channel, num_bands, time)
+    """
+    if indices is None:
+        indices = _banded_indices(starts, lengths)
+    freq_index, band_index = indices
+    specgrams = _apply_banded_filterbank(mag_specgrams, weights, freq_index, band_index,
+                                         starts.size(0))
+    if frame_lengths is None:
+        return specgrams
+    return specgrams.masked_fill(~_valid_frames(specgrams, frame_lengths), 0.)
+
+
+def _apply_banded_filterbank(mag_specgrams, weights, freq_index, band_index, num_bands):
+    # type: (Tensor, Tensor, Tensor, Tensor, int) -> Tensor
+    packed = mag_specgrams.index_select(-2, freq_index).mul_(weights.unsqueeze(-1))
+    out = mag_specgrams.new_zeros(list(mag_specgrams.shape[:-2]) +
+                                  [num_bands, mag_specgrams.size(-1)])
+    return out.index_add_(out.dim() - 2, band_index, packed)
+
+
+def apply_power_filterbank(complex_specgrams, filterbank, power=2.):
+    # type: (Tensor, Tensor, float) -> Tensor
+    """
+    Transform complex spectrogram given a filterbank matrix, i.e.,
+    `apply_filterbank(complex_norm(complex_specgrams, power), filterbank)`,
+    with the fused `complex_norm` and without transposing the spectrogram.
+
+    Args:
+        complex_specgrams (Tensor): (batch, channel, num_freqs, time, complex=2)
+        filterbank (Tensor): (num_freqs, num_bands)
+        power (float): Exponent of the magnitude. Defaults to 2.
+
+    Returns:
+        (Tensor): (batch, channel, num_bands, time)
+    """
+    mag_specgrams = complex_norm(complex_specgrams, power, fused=True)
+    return torch.matmul(filterbank.t(), mag_specgrams)
+
+
+def create_cqt_kernels(sample_rate, min_freq, num_bins, bins_per_octave=12,
+                       filter_scale=1., gamma=0.):
+    """
+    Create the frequency-domain kernels of a constant-Q transform, one per octave, to
+    be applied by `cqt` to the signal decimated by 2 per octave.
+
+    Args:
+        sample_rate (int): sample rate of audio signal.
+        min_freq (float): center frequency of the lowest bin.
+        num_bins (int): number of bins.
+        bins_per_octave (int): number of bins per octave. Defaults to 12.
+        filter_scale (float): scale of the filter lengths. Defaults to 1.
+        gamma (float): bandwidth offset in Hz of a variable-Q transform, which shortens
+            the low-frequency filters. Defaults to 0, a constant-Q transform.
+
+    Returns:
+        kernels (Tensor): (num_octaves, 2 * bins_per_octave, 2 * (fft_len // 2 + 1)), from
+            the top octave down. Each maps the interleaved real and imaginary parts of the
+            onesided stft of fft_len-long frames to the real, then imaginary, parts of the bins.
+    """
+    num_octaves = -(-num_bins // bins_per_octave)
+    # same bandwidths as librosa.vqt
+    alpha = (2. ** (2. / bins_per_octave) - 1) / (2. ** (2. / bins_per_octave) + 1)
+    q = filter_scale / alpha
+    top_freqs = min_freq * 2. ** (torch.arange(num_bins - bins_per_octave, num_bins,
+                                               dtype=torch.float64) / bins_per_octave)
+    top_lengths = q * sample_rate / (top_freqs + gamma / alpha)
+    # the highest filter, whose hann window spans 1.5 bins of its length, must fit below nyquist
+    if top_freqs[-1] + 0.75 * sample_rate / top_lengths[-1] > sample_rate / 2.:
+        raise ValueError('The highest cqt filter exceeds the nyquist frequency {}.'.format(
+            sample_rate / 2.))
+    fft_len = 2 ** int(math.ceil(math.log2(top_lengths[0])))
+
+    kernels = torch.zeros(num_octaves, bins_per_octave, fft_len, dtype=torch.complex128)
+    for octave in range(num_octaves):
+        # octave `octave` runs at sample_rate / 2 ** octave, on frequencies halved as often
+        octave_rate = sample_rate / 2. ** octave
+        freqs = top_freqs / 2. ** octave
+        lengths = q * octave_rate / (freqs + gamma / alpha)
+        for k in range(bins_per_octave):
+            # a hann window of the exact (fractional) length, so that all the octaves sample
+            # the same continuous filters, centered on the middle of the frame
+            half_len = int(math.ceil(lengths[k] / 2.)) - 1
+            n = torch.arange(-half_len, half_len + 1, dtype=torch.float64)
+            window = torch.cos(math.pi * n / lengths[k]) ** 2
+            # normalized to half the amplitude of a sinusoid
+            atom = window * torch.exp(2j * math.pi * freqs[k] / octave_rate * n) / window.sum()
+            kernels[octave, k, fft_len // 2 - half_len:fft_len // 2 + half_len + 1] = atom
+
+    # Correlating a real frame x with an atom h is sum_f X[f] conj(H[f]) / fft_len (Parseval).
+    # With X[-f] = conj(X[f]), it only takes the onesided X, times positive + negative
+    # frequencies of the atom for the real part of X and positive - negative for the imaginary.
+    num_freqs = fft_len // 2 + 1
+    atoms = torch.fft.fft(kernels).conj() / fft_len
+    positive = atoms[..., :num_freqs]
+    negative = torch.zeros_like(positive)
+    negative[..., 1:-1] = atoms[..., num_freqs:].flip(-1)
+    real_part, imag_part = positive + negative, 1j * (positive - negative)
+
+    matrices = torch.empty(num_octaves, 2, bins_per_octave, num_freqs, 2, dtype=torch.float64)
+    matrices[:, 0, :, :, 0], matrices[:, 0, :, :, 1] = real_part.real, imag_part.real
+    matrices[:, 1, :, :, 0], matrices[:, 1, :, :, 1] = real_part.imag, imag_part.imag
+    return matrices.reshape(num_octaves, 2 * bins_per_octave, 2 * num_freqs)
+
+
+def create_decimation_filter(num_zeros=16, rolloff=0.945, beta=8.6):
+    """
+    Create the Kaiser-windowed sinc lowpass filter applied by `cqt` before decimating by 2.
+
+    Args:
+        num_zeros (int): number of zero crossings on each side. Defaults to 16.
+        rolloff (float): cutoff, relative to the decimated nyquist frequency. Defaults to 0.945.
+        beta (float): Kaiser window parameter. Defaults to 8.6.
+
+    Returns:
+        lowpass (Tensor): (4 * num_zeros + 1,)
+    """
+    cutoff = 0.25 * rolloff  # in cycles per sample
+    n = torch.arange(-2 * num_zeros, 2 * num_zeros + 1, dtype=torch.float64)
+    window = torch.kaiser_window(4 * num_zeros + 1, periodic=False, beta=beta,
+                                 dtype=torch.float64)
+    lowpass = 2 * cutoff * torch.sinc(2 * cutoff * n) * window
+    return (lowpass / lowpass.sum()).to(torch.get_default_dtype())
+
+
+def _decimate(waveforms, lowpass):
+    # lowpass and keep every other sample, in one strided convolution
+    shape = waveforms.shape
+    pad = lowpass.size(0) // 2
+    decimated = F.conv1d(F.pad(waveforms.reshape(-1, 1, shape[-1]), [pad, pad]),
+                         lowpass.view(1, 1, -1), stride=2)
+    return decimated.reshape(shape[:-1] + decimated.shape[-1:])
+
+
+def cqt(waveforms, kernels, lowpass, hop_len, num_bins, return_complex=False):
+    """
+    Compute the constant-Q (or variable-Q) transform of a batch of waveforms, octave by
+    octave from the top: every octave applies its small kernel to the stft of the
+    waveforms, which are then lowpassed and decimated by 2 for the next octave, with a
+    hop length halved accordingly. All the stfts have the same fft length and number of
+    frames, so that the cost grows with the number of octaves.
+
+    Args:
+        waveforms (Tensor): (channel, time) or (batch, channel, time).
+        kernels (Tensor): (num_octaves, 2 * bins_per_octave, 2 * num_freqs),
+            see `create_cqt_kernels`.
+        lowpass (Tensor): (taps,) filter applied before every decimation,
+            see `create_decimation_filter`.
+        hop_len (int): number of samples between frames, a multiple of
+            2 ** (num_octaves - 1).
+        num_bins (int): number of bins, from the lowest octave that may be partial.
+        return_complex (bool): return a complex tensor instead of the (*, 2) real layout.
+            Defaults to False.
+
+    Returns:
+        (Tensor): (batch, channel, num_bins, time, complex=2), or complex
+            (batch, channel, num_bins, time), from the lowest bin up.
+    """
+    num_octaves, bins_per_octave, num_freqs = kernels.size(0), kernels.size(1) // 2, \
+        kernels.size(2) // 2
+    fft_len = 2 * (num_freqs - 1)
+    if hop_len % 2 ** (num_octaves - 1):
+        raise ValueError('hop_len must be a multiple of 2 ** (num_octaves - 1) = {}.'.format(
+            2 ** (num_octaves - 1)))
+    window = torch.ones(fft_len, dtype=waveforms.dtype, device=waveforms.device)
+    kernels = kernels.to(waveforms.device, waveforms.dtype)
+    lowpass = lowpass.to(waveforms.device, waveforms.dtype)
+
+    octaves = []
+    for octave in range(num_octaves):
+        if octave > 0:
+            waveforms = _decimate(waveforms, lowpass)
+        specgrams = stft(waveforms, fft_len, hop_len // 2 ** octave, window,
+                         pad=fft_len // 2, pad_mode='constant')
+        # (..., freq, time, 2) -> (..., freq * 2, time), interleaving real and imaginary parts
+        specgrams = specgrams.transpose(-2, -1).reshape(
+            specgrams.shape[:-3] + (2 * num_freqs, specgrams.size(-2)))
+        octave_specgrams = torch.matmul(kernels[octave], specgrams)
+        octaves.append(octave_specgrams.reshape(
+            octave_specgrams.shape[:-2] + (2, bins_per_octave, octave_specgrams.size(-1))))
+
+    # decimation rounds the lengths up, which may add a frame to the lower octaves
+    num_frames = min(o.size(-1) for o in octaves)
+    specgrams = torch.cat([o[..., :num_frames] for o in reversed(octaves)], -2)
+    specgrams = specgrams[..., specgrams.size(-2) - num_bins:, :]
+    # (..., 2, bins, time) -> (..., bins, time, 2)
+    specgrams = specgrams.permute(list(range(specgrams.dim() - 3)) + [-2, -1, -3]).contiguous()
+    if return_complex:
+        return torch.view_as_complex(specgrams)
+    return specgrams
+
+
+# number of zero crossings on each side, cutoff relative to the lower nyquist frequency,
+# and Kaiser window parameter of the resampling filters
+_RESAMPLE_QUALITY = {
+    'low': (8, 0.85, 5.),
+    'medium': (16, 0.945, 8.6),
+    'high': (64, 0.9475, 14.77),
+}
+_MIN_RESAMPLE_PHASES = 16
+# the kernel has one phase per output sample of a period of the reduced ratio, so that
+# near-equal rates such as 22050 -> 22051 would need billions of taps
+_MAX_RESAMPLE_KERNEL_ELEMENTS = 2 ** 22
+
+
+def create_resample_kernel(orig_sr, new_sr, quality='medium'):
+    """
+    Create the polyphase Kaiser-windowed sinc filter of `resample`.
+
+    Output sample n is read at input position n * orig_sr / new_sr. With the ratio
+    reduced to orig / new, the positions repeat every `new` output (and `orig` input)
+    samples, so that `new` phases of the filter cover all of them. As a strided
+    convolution with few output channels is slow, the phases of several periods are
+    included, at least 16.
+
+    Args:
+        orig_sr (int): sample rate of the input.
+        new_sr (int): sample rate of the output.
+        quality (str): 'low' (8 zero crossings), 'medium' (16) or 'high' (64).
+            Defaults to 'medium'.
+
+    Returns:
+        kernel (Tensor): (num_phases, stride + 2 * width + 1), where the filter of phase j
+            is centered on input position j * orig_sr / new_sr of the taps
+            -width, ..., stride + width, and stride = num_phases * orig_sr / new_sr.
+
+    Raises:
+        ValueError: if the kernel would have more than 2 ** 22 elements, i.e. the
+            reduced ratio of the rates is too large, e.g. for 22050 -> 22051.
+    """
+    if quality not in _RESAMPLE_QUALITY:
+        raise ValueError('quality must be one of {}, not {!r}.'.format(
+            sorted(_RESAMPLE_QUALITY), quality))
+    num_zeros, rolloff, beta = _RESAMPLE_QUALITY[quality]
+    gcd = math.gcd(orig_sr, new_sr)
+    repeats = -(-_MIN_RESAMPLE_PHASES // (new_sr // gcd))
+    stride, num_phases = repeats * orig_sr // gcd, repeats * new_sr // gcd
+
+    cutoff = rolloff * min(1., new_sr / float(orig_sr))  # relative to the input nyquist
+    half_width = num_zeros / cutoff
+    width = int(math.ceil(half_width))
+    if num_phases * (stride + 2 * width + 1) > _MAX_RESAMPLE_KERNEL_ELEMENTS:
+        raise ValueError('Resampling from {} to {} Hz needs a kernel of {} x {} taps, as the '
+                         'reduced ratio {}/{} is too large. Resample to a rate of a simpler '
+                         'ratio instead.'.format(orig_sr, new_sr, num_phases,
+                                                 stride + 2 * width + 1,
+                                                 orig_sr // gcd, new_sr // gcd))
+    taps = torch.arange(-width, stride + width + 1, dtype=torch.float64)
+    positions = taps - torch.arange(num_phases, dtype=torch.float64).unsqueeze(1) * \
+        stride / num_phases
+    window = torch.special.i0(beta * (1 - (positions / half_width) ** 2).clamp(min=0).sqrt()) / \
+        torch.special.i0(torch.tensor(beta, dtype=torch.float64))
+    kernel = cutoff * torch.sinc(cutoff * positions) * window * (positions.abs() < half_width)
+    return kernel.to(torch.get_default_dtype())
+
+
+def _resample_steps(padded, kernel, stride):
+    # type: (Tensor, Tensor, int) -> Tensor
+    # (N, 1, time) -> (N, steps * num_phases): one output channel per phase, interleaved
+    resampled = F.conv1d(padded, kernel.unsqueeze(1), stride=stride)
+    return resampled.transpose(1, 2).reshape(padded.size(0), -1)
+
+
+def resample(waveforms, kernel, orig_sr, new_sr):
+    # type: (Tensor, Tensor, int, int) -> Tensor
+    """
+    Resample waveforms from `orig_sr` to `new_sr` with a polyphase windowed-sinc filter.
+    A single strided convolution computes all the phases of the filter, as channels that
+    are then interleaved, so that every output sample only costs the taps of its phase.
+
+    Args:
+        waveforms (Tensor): (..., time), e.g. (channel, time) or (batch, channel, time).
+        kernel (Tensor): (num_phases, taps), see `create_resample_kernel`.
+        orig_sr (int): sample rate of `waveforms`.
+        new_sr (int): sample rate of the output.
+
+    Returns:
+        (Tensor): (..., ceil(time * new_sr / orig_sr))
+
+    Example:
+        >>> kernel = create_resample_kernel(44100, 16000)
+        >>> resample(torch.randn(16, 2, 44100), kernel, 44100, 16000).shape
+        torch.Size([16, 2, 16000])
+    """
+    if orig_sr == new_sr:
+        return waveforms
+    shape = waveforms.shape
+    num_samples = shape[-1]
+    num_phases, num_taps = kernel.size(0), kernel.size(1)
+    stride = num_phases * orig_sr // new_sr
+    width = (num_taps - stride - 1) // 2
+    num_out = -(-num_samples * new_sr // orig_sr)
+    num_steps = -(-num_out // num_phases)
+
+    padded_len = (num_steps - 1) * stride + num_taps
+    padded = F.pad(waveforms.reshape(-1, 1, num_samples),
+                   [width, padded_len - width - num_samples])
+    resampled = _resample_steps(padded, kernel.to(waveforms.device, waveforms.dtype), stride)
+    return resampled[:, :num_out].reshape(list(shape[:-1]) + [num_out])
+
+
 def angle(complex_tensor):
     """
-    Return angle of a complex tensor with shape (*, 2).
+    Return angle of a complex tensor with shape (*, 2), or (*) of complex dtype.
     """
+    if complex_tensor.is_complex():
+        return torch.angle(complex_tensor)
     return torch.atan2(complex_tensor[..., 1], complex_tensor[..., 0])
 
 
 def magphase(complex_tensor, power=1.):
     """
-    Separate a complex-valued spectrogram with shape (*,2)
+    Separate a complex-valued spectrogram with shape (*,2), or (*) of complex dtype,
     into its magnitude and phase.
     """
     mag = complex_norm(complex_tensor, power)
@@ -190,36 +913,49 @@ def phase_vocoder(spect, rate, phi_advance):
     without modifying pitch by a factor of `rate`.
 
     Args:
-        spect (Tensor): (batch, channel, num_bins, time, complex=2)
-        rate (float): Speed-up factor
+        spect (Tensor): (batch, channel, num_bins, time, complex=2),
+            or (batch, channel, num_bins, time) of complex dtype
+        rate (float or Tensor): Speed-up factor, or a tensor of shape (batch,)
+            with one speed-up factor per example
         phi_advance (Tensor): Expected phase advance in each bin. (num_bins, 1)
 
     Returns:
-      (Tensor): (batch, channel, num_bins, new_bins, 2) with new_bins = num_bins//rate+1
+      (Tensor): (batch, channel, num_bins, new_bins, 2) with new_bins = num_bins//rate+1,
+        or (batch, channel, num_bins, new_bins) if `spect` is of complex dtype.
+        If `rate` is a tensor of shape (batch,), a tuple of the stretched spectrograms,
+        zero-padded to the longest one, and their lengths (batch,).
     """
+    if not (isinstance(rate, torch.Tensor) and rate.dim() == 1):
+        return _stretch(spect, float(rate), phi_advance)
 
-    time_steps = torch.arange(0, spect.size(
-        3), rate, device=spect.device)  # (new_bins,)
+    real_layout = not spect.is_complex()
+    if real_layout:
+        spect = torch.view_as_complex(spect.contiguous())
 
-    alphas = (time_steps % 1)  # (new_bins,)
+    num_frames = spect.size(3)
+    rate = rate.to(spect.device, torch.float64).unsqueeze(1)  # (batch, 1)
+    max_steps = int(math.ceil(num_frames / rate.min().item()))
+    # same read positions as `_read_positions` for every rate
+    time_steps = (torch.arange(max_steps, device=spect.device, dtype=torch.float64) *
+                  rate).to(spect.real.dtype)  # (batch, new_bins)
+    lengths = (time_steps < num_frames).sum(1)
+    time_steps = time_steps[:, :int(lengths.max())].clamp(max=num_frames)
+    alphas = (time_steps % 1)[:, None, None, :]  # (batch, 1, 1, new_bins)
 
-    phase_0 = angle(spect[:, :, :, :1])
+    phase_0 = torch.angle(spect[:, :, :, :1])
 
     # Time Padding
-    pad_shape = [0, 0] + [0, 2] + [0] * 6
-    spect = torch.nn.functional.pad(spect, pad_shape)
+    spect = torch.nn.functional.pad(spect, [0, 2])
+    # magnitudes and phases of the input frames, computed once and gathered for every step
+    # instead of computed on the gathered frames, which are more numerous when slowing down
+    mag_specs, phase_specs = spect.abs(), torch.angle(spect)
+    phi_advance = torch.remainder(phi_advance, 2 * math.pi)  # as in `_phase_vocoder_block`
 
-    spect_0 = spect[:, :, :, time_steps.long()]  # (new_bins, num_bins, 2)
-    # (new_bins, num_bins, 2)
-    spect_1 = spect[:, :, :, (time_steps + 1).long()]
+    index_0 = time_steps.long()[:, None, None, :].expand(
+        spect.shape[:3] + time_steps.shape[-1:])
+    index_1 = index_0 + 1
 
-    spect_0_angle = angle(spect_0)  # (new_bins, num_bins)
-    spect_1_angle = angle(spect_1)  # (new_bins, num_bins)
-
-    spect_0_norm = torch.norm(spect_0, dim=-1)  # (new_bins, num_bins)
-    spect_1_norm = torch.norm(spect_1, dim=-1)  # (new_bins, num_bins)
-
-    spect_phase = spect_1_angle - spect_0_angle - \
+    spect_phase = phase_specs.gather(3, index_1) - phase_specs.gather(3, index_0) - \
                   phi_advance  # (new_bins, num_bins)
     spect_phase = spect_phase - 2 * math.pi * \
                   torch.round(spect_phase / (2 * math.pi))  # (new_bins, num_bins)
@@ -229,21 +965,185 @@ def phase_vocoder(spect, rate, phi_advance):
 
     phase = torch.cat([phase_0, phase[:, :, :, :-1]], dim=-1)
 
-    phase_acc = torch.cumsum(phase, -1)  # (new_bins, num_bins)
+    # accumulated as in `_phase_vocoder_block`
+    phase_acc = torch.cumsum(phase.double(), -1)  # (new_bins, num_bins)
+    phase_acc = torch.remainder(phase_acc, 2 * math.pi).to(phase.dtype)
+
+    mag = alphas * mag_specs.gather(3, index_1) + (1 - alphas) * \
+          mag_specs.gather(3, index_0)  # (time//rate+1, num_bins)
+
+    valid = torch.arange(time_steps.size(-1), device=spect.device) < lengths.unsqueeze(1)
+    mag = mag * valid[:, None, None, :].to(mag.dtype)
 
-    mag = alphas * spect_1_norm + (1 - alphas) * \
-          spect_0_norm  # (time//rate+1, num_bins)
+    spect_stretch = torch.polar(mag, phase_acc)  # (new_bins, num_bins)
 
-    spect_stretch_real = mag * torch.cos(phase_acc)  # (new_bins, num_bins)
-    spect_stretch_imag = mag * torch.sin(phase_acc)  # (new_bins, num_bins)
+    if real_layout:
+        spect_stretch = torch.view_as_real(spect_stretch)
+    return spect_stretch, lengths
 
-    spect_stretch = torch.stack(
-        [spect_stretch_real, spect_stretch_imag], dim=-1)
 
+def _stretch(spect, rate, phi_advance):
+    # type: (Tensor, float, Tensor) -> Tensor
+    """
+    `phase_vocoder` for a single float `rate`, compatible with TorchScript.
+    """
+    real_layout = not spect.is_complex()
+    if real_layout:
+        spect = torch.view_as_complex(spect.contiguous())
+
+    num_frames = spect.size(3)
+    time_steps = _read_positions(0, int(math.ceil(num_frames / rate)), rate,
+                                 spect.real.dtype, 0., spect.device)
+    time_steps = time_steps[time_steps < num_frames]  # (new_bins,)
+
+    phase_0 = torch.angle(spect[:, :, :, :1])
+
+    # Time Padding
+    spect = torch.nn.functional.pad(spect, [0, 2])
+
+    spect_stretch, _ = _phase_vocoder_block(spect, time_steps, phase_0, phi_advance)
+
+    if real_layout:
+        spect_stretch = torch.view_as_real(spect_stretch)
     return spect_stretch
 
 
-def amplitude_to_db(x, ref=1.0, amin=1e-7):
+def _read_positions(start, stop, rate, dtype, offset=0., device=None):
+    # type: (int, int, float, torch.dtype, float, Optional[torch.device]) -> Tensor
+    """
+    Read positions `offset + k * rate` of the output steps `start <= k < stop`.
+    Computed in float64 and then rounded to `dtype`, so that a stretch split into
+    blocks reads the same positions as the whole one.
+    """
+    steps = torch.arange(start, stop, dtype=torch.float64, device=device)
+    return (offset + steps * rate).to(dtype)
+
+
+def _phase_vocoder_block(spect, time_steps, phase_acc, phi_advance):
+    # type: (Tensor, Tensor, Tensor, Tensor) -> Tuple[Tensor, Tensor]
+    """
+    Stretch one block of a stream, as `phase_vocoder` does for a whole spectrogram.
+
+    Args:
+        spect (Tensor): (batch, channel, num_bins, time) of complex dtype, holding
+            frames floor(time_steps) and floor(time_steps) + 1
+        time_steps (Tensor): (new_bins,) read positions within `spect`
+        phase_acc (Tensor): (batch, channel, num_bins, 1) accumulated phase at the first step
+        phi_advance (Tensor): Expected phase advance in each bin. (num_bins, 1)
+
+    Returns:
+        spect_stretch (Tensor): (batch, channel, num_bins, new_bins) of complex dtype
+        phase_acc (Tensor): (batch, channel, num_bins, 1) accumulated phase at the step
+            after the block, in float64 and wrapped to [0, 2 pi)
+    """
+    alphas = (time_steps % 1)  # (new_bins,)
+
+    # magnitudes and phases of the frames, computed once and indexed for every step
+    mag_specs, phase_specs = spect.abs(), torch.angle(spect)
+    # the same advance modulo 2 pi, which keeps the float32 phase increments small
+    phi_advance = torch.remainder(phi_advance, 2 * math.pi)
+    index_0 = time_steps.long()
+    index_1 = (time_steps + 1).long()
+
+    spect_phase = phase_specs[:, :, :, index_1] - phase_specs[:, :, :, index_0] - phi_advance
+    spect_phase = spect_phase - 2 * math.pi * torch.round(spect_phase / (2 * math.pi))
+    phase = spect_phase + phi_advance
+
+    # accumulated in float64 and wrapped to [0, 2 pi), as the unbounded sum loses
+    # precision in float32 and makes a long stream drift from the whole spectrogram
+    phase = phase.double()
+    phase_block = torch.cumsum(torch.cat([phase_acc.double(), phase[:, :, :, :-1]], dim=-1), -1)
+    phase_acc = torch.remainder(phase_block[:, :, :, -1:] + phase[:, :, :, -1:], 2 * math.pi)
+    phase_block = torch.remainder(phase_block, 2 * math.pi).to(mag_specs.dtype)
+
+    mag = alphas * mag_specs[:, :, :, index_1] + (1 - alphas) * mag_specs[:, :, :, index_0]
+
+    return torch.polar(mag, phase_block), phase_acc
+
+
+@lru_cache(maxsize=256)
+def _pitch_ratio(n_steps, bins_per_octave, tol_cents=0.1):
+    """
+    Approximate the pitch factor 2 ** (n_steps / bins_per_octave) by the fraction
+    `orig / new` of smallest denominator within `tol_cents` cents.
+    """
+    factor = 2. ** (n_steps / float(bins_per_octave))
+    max_denominator = 1
+    while True:
+        ratio = Fraction(factor).limit_denominator(max_denominator)
+        if ratio > 0 and abs(1200 * math.log2(ratio / factor)) <= tol_cents:
+            return ratio.numerator, ratio.denominator
+        max_denominator += 1
+
+
+def pitch_shift(waveforms, n_steps, fft_len, hop_len, window, bins_per_octave=12,
+                quality='medium'):
+    """
+    Shift the pitch of waveforms by `n_steps` steps of 1 / `bins_per_octave` octave
+    without changing their duration: the waveforms are stretched in time by the pitch
+    factor with `phase_vocoder`, then resampled by it.
+
+    The whole batch is stretched in one call, with one rate per example, and the examples
+    of the same shift are inverted and resampled together. The pitch factor is approximated by a
+    fraction within 0.1 cent, e.g. 89 / 84 for a semitone, so that the resampling kernels
+    are the ones of `resample`, cached per shift. Shifts are rounded to a tenth of a step, so
+    that random shifts fall in a few groups and share their kernels.
+
+    Args:
+        waveforms (Tensor): (channel, time) or (batch, channel, time).
+        n_steps (float or Tensor): shift, or (batch,) shifts, one per example.
+        fft_len (int): FFT window size of the stretch.
+        hop_len (int): Number audio of frames between STFT columns.
+        window (Tensor): 1-D tensor.
+        bins_per_octave (int): number of steps per octave. Defaults to 12 (semitones).
+        quality (str): quality of the resampling, see `create_resample_kernel`.
+            Defaults to 'medium'.
+
+    Returns:
+        Tensor: (channel, time) or (batch, channel, time), of the same length as `waveforms`.
+    """
+    from .cache import cached_resample_kernel  # cache imports this module
+
+    unbatched = waveforms.dim() == 2
+    if unbatched:
+        waveforms = waveforms.unsqueeze(0)
+    batch, num_samples = waveforms.size(0), waveforms.size(-1)
+    n_steps = torch.as_tensor(n_steps, dtype=torch.float64).expand(batch).tolist()
+    ratios = [_pitch_ratio(round(n, 1), bins_per_octave) for n in n_steps]
+    # examples that are not shifted are returned as they are
+    shifted = waveforms.clone()
+    active = [i for i, ratio in enumerate(ratios) if ratio != (1, 1)]
+    if not active:
+        return shifted.squeeze(0) if unbatched else shifted
+
+    pad = fft_len // 2
+    window = window.to(waveforms.device, waveforms.dtype)
+    # zero padding: the phases of a reflected first frame are not coherent across bins, and
+    # the phase vocoder would carry that over the whole stretch
+    specgrams = stft(waveforms[active], fft_len, hop_len, window, pad=pad, pad_mode='constant',
+                     return_complex=True)
+    phi_advance = torch.linspace(0, math.pi * hop_len, fft_len // 2 + 1,
+                                 device=waveforms.device, dtype=waveforms.dtype)[..., None]
+    rates = torch.tensor([ratios[i][1] / float(ratios[i][0]) for i in active],
+                         dtype=torch.float64)
+    stretched, lengths = phase_vocoder(specgrams, rates, phi_advance)
+
+    for orig, new in sorted(set(ratios[i] for i in active)):
+        # the examples of a shift have the same length: invert their frames without the
+        # zero padding of the batch, which would change the window normalization at the end
+        group = [j for j, i in enumerate(active) if ratios[i] == (orig, new)]
+        group_stretched = istft(stretched[group][..., :int(lengths[group[0]])], hop_len,
+                                window, pad)
+        kernel = cached_resample_kernel(orig, new, quality, waveforms.device, waveforms.dtype)
+        resampled = resample(group_stretched, kernel, orig, new)[..., :num_samples]
+        targets = [active[j] for j in group]
+        shifted[targets] = F.pad(resampled, [0, num_samples - resampled.size(-1)])
+
+    return shifted.squeeze(0) if unbatched else shifted
+
+
+def amplitude_to_db(x, ref=1.0, amin=1e-7, lengths=None):
+    # type: (Tensor, float, float, Optional[Tensor]) -> Tensor
     """
     Amplitude-to-decibel conversion (logarithmic mapping with base=10)
     By using `amin=1e-7`, it assumes 32-bit floating point input. If the
@@ -254,9 +1154,21 @@ def amplitude_to_db(x, ref=1.0, amin=1e-7):
         ref (float): Amplitude value that is equivalent to 0 decibel
         amin (float): Minimum amplitude. Any input that is smaller than `amin` is
             clamped to `amin`.
+        lengths (LongTensor, optional): (batch,) number of valid frames of every example
+            of a (batch, channel, freq, time) input. The padded frames of the output hold
+            the decibels of `amin`.
     Returns:
         (Tensor): same size of x, after conversion
     """
+    x_db = _amplitude_to_db(x, ref, amin)
+    if lengths is None:
+        return x_db
+    return x_db.masked_fill(~_valid_frames(x_db, lengths),
+                            10.0 * (math.log10(amin) - math.log10(ref)))
+
+
+def _amplitude_to_db(x, ref, amin):
+    # type: (Tensor, float, float) -> Tensor
     x = torch.clamp(x, min=amin)
     return 10.0 * (torch.log10(x) - torch.log10(torch.tensor(ref,
                                                              device=x.device,
@@ -265,6 +1177,7 @@ def amplitude_to_db(x, ref=1.0, amin=1e-7):
 
 
 def db_to_amplitude(x, ref=1.0):
+    # type: (Tensor, float) -> Tensor
     """
     Decibel-to-amplitude conversion (exponential mapping with base=10)
 
@@ -281,30 +1194,133 @@ def db_to_amplitude(x, ref=1.0):
                                                                dtype=x.dtype)))
 
 
-def mu_law_encoding(x, n_quantize=256):
+def create_dct(num_mfcc, num_mels, norm='ortho'):
+    """
+    Creates the DCT-II basis that maps log mel bands to MFCCs, i.e. the first `num_mfcc`
+    outputs of `scipy.fftpack.dct(x, type=2, norm=norm)` as in `librosa.feature.mfcc`.
+
+    Args:
+        num_mfcc (int): number of coefficients.
+        num_mels (int): number of mel bins.
+        norm (str or None): 'ortho' for an orthonormal basis, or None. Defaults to 'ortho'.
+
+    Returns:
+        dct_basis (Tensor): (num_mels, num_mfcc)
+    """
+    if norm not in ('ortho', None):
+        raise ValueError('norm must be \'ortho\' or None, not {}.'.format(norm))
+    if num_mfcc > num_mels:
+        raise ValueError('num_mfcc ({}) cannot exceed num_mels ({}).'.format(num_mfcc, num_mels))
+    n = torch.arange(num_mels, dtype=torch.float64).unsqueeze(1)
+    k = torch.arange(num_mfcc, dtype=torch.float64)
+    dct_basis = torch.cos(math.pi / num_mels * (n + 0.5) * k)
+    if norm is None:
+        dct_basis *= 2.
+    else:
+        dct_basis[:, 0] *= 1. / math.sqrt(2.)
+        dct_basis *= math.sqrt(2. / num_mels)
+    return dct_basis.to(torch.get_default_dtype())
+
+
+def compute_deltas(specgrams, width=5):
+    # type: (Tensor, int) -> Tensor
+    """
+    Deltas over time, `sum_n n * (x[t + n] - x[t - n]) / (2 * sum_n n ** 2)` for n up to
+    `width // 2`, repeating the first and last frames at the edges.
+
+    Args:
+        specgrams (Tensor): (..., freq, time)
+        width (int): odd number of frames of the regression. Defaults to 5.
+
+    Returns:
+        (Tensor): same size as specgrams
+    """
+    half_width = width // 2
+    kernel = torch.arange(-half_width, half_width + 1, dtype=specgrams.dtype,
+                          device=specgrams.device)
+    kernel = kernel / kernel.pow(2).sum()
+    # all the rows of the batch in a single convolution
+    rows = specgrams.reshape(-1, 1, specgrams.size(-1))
+    deltas = F.conv1d(F.pad(rows, [half_width, half_width], mode='replicate'),
+                      kernel.view(1, 1, -1))
+    return deltas.reshape(specgrams.shape)
+
+
+def mfcc(mag_specgrams, filterbank, dct_basis, ref=1.0, amin=1e-7, num_deltas=0, delta_width=5):
+    # type: (Tensor, Tensor, Tensor, float, float, int, int) -> Tensor
+    """
+    MFCCs of power spectrograms, i.e. the DCT of
+    `amplitude_to_db(apply_filterbank(mag_specgrams, filterbank), ref, amin)`,
+    optionally followed by their deltas.
+
+    The log is taken in place on the mel spectrogram, and the decibel scaling and `ref`
+    are folded into the DCT, so that the mel spectrogram is the only intermediate.
+
+    Args:
+        mag_specgrams (Tensor): (batch, channel, num_freqs, time) power spectrograms,
+            e.g. `complex_norm(complex_specgrams, power=2.)`.
+        filterbank (Tensor): (num_freqs, num_mels), e.g. from `create_mel_filter`.
+        dct_basis (Tensor): (num_mels, num_mfcc), see `create_dct`.
+        ref (float): Amplitude value that is equivalent to 0 decibel. Defaults to 1.
+        amin (float): Minimum amplitude, see `amplitude_to_db`. Defaults to 1e-7.
+        num_deltas (int): 1 to append the deltas of the MFCCs, 2 to also append the
+            deltas of the deltas. Defaults to 0.
+        delta_width (int): see `compute_deltas`. Defaults to 5.
+
+    Returns:
+        (Tensor): (batch, channel, num_mfcc * (num_deltas + 1), time)
+    """
+    mel_specgrams = apply_filterbank(mag_specgrams, filterbank)
+    if mel_specgrams.requires_grad:
+        log_mel_specgrams = torch.log10(mel_specgrams.clamp(min=amin))
+    else:
+        log_mel_specgrams = mel_specgrams.clamp_(min=amin).log10_()
+    mfccs = torch.matmul(10. * dct_basis.t(), log_mel_specgrams)
+    if ref != 1.:
+        # the dct of the constant 10 * log10(ref) over all the bands
+        mfccs = mfccs - 10. * math.log10(ref) * dct_basis.sum(0).unsqueeze(1)
+
+    if num_deltas == 0:
+        return mfccs
+    features = [mfccs]
+    for _ in range(num_deltas):
+        features.append(compute_deltas(features[-1], delta_width))
+    return torch.cat(features, -2)
+
+
+def mu_law_encoding(x, n_quantize=256, dtype=torch.int64):
+    # type: (Tensor, int, torch.dtype) -> Tensor
     """Apply mu-law encoding to the input tensor.
     Usually applied to waveforms
 
     Args:
-        x (Tensor): input value
+        x (Tensor): input value, inputs outside [-1, 1] get the extreme codes
         n_quantize (int): quantization level. For 8-bit encoding, set 256 (2 ** 8).
+        dtype: `dtype` of the codes, e.g. `torch.uint8` to store 8-bit codes compactly.
+            Default: `torch.int64`
 
     Returns:
         (Tensor): same size of x, after encoding
 
     """
-    if not x.dtype.is_floating_point:
+    if not x.is_floating_point():
         x = x.to(torch.float)
     mu = torch.tensor(n_quantize - 1, dtype=x.dtype, requires_grad=False)  # confused about dtype here..
 
-    x_mu = x.sign() * torch.log1p(mu * x.abs()) / torch.log1p(mu)
-    x_mu = ((x_mu + 1) / 2 * mu + 0.5).long()
-    return x_mu
+    # x.sign() * log1p(mu * |x|) / log1p(mu), in place on a single temporary
+    x_mu = x.abs().mul_(mu).log1p_().mul_(x.sign()).div_(torch.log1p(mu))
+    x_mu = x_mu.add_(1).div_(2).mul_(mu).add_(0.5)
+    return x_mu.clamp_(0, n_quantize - 1).to(dtype)
 
 
 def mu_law_decoding(x_mu, n_quantize=256, dtype=torch.get_default_dtype()):
+    # type: (Tensor, int, torch.dtype) -> Tensor
     """Apply mu-law decoding (expansion) to the input tensor.
 
+    Integer codes of any dtype, e.g. `torch.uint8`, are decoded by looking them up in a
+    cached table of the `n_quantize` values instead of computing the expansion per sample.
+    Codes outside [0, n_quantize) are clamped to it, as `mu_law_encoding` does.
+
     Args:
         x_mu (Tensor): mu-law encoded input
         n_quantize (int): quantization level. For 8-bit decoding, set 256 (2 ** 8).
@@ -313,9 +1329,37 @@ def mu_law_decoding(x_mu, n_quantize=256, dtype=torch.get_default_dtype()):
     Returns:
         (Tensor): mu-law decoded tensor
     """
-    if not x_mu.dtype.is_floating_point:
+    if not x_mu.is_floating_point():
+        if not torch.jit.is_scripting():
+            return _mu_law_lookup(x_mu, n_quantize, dtype)
         x_mu = x_mu.to(dtype)
+    return _mu_law_decoding(x_mu, n_quantize)
+
+
+def _mu_law_lookup(x_mu, n_quantize, dtype):
+    from .cache import cached_mu_law_table  # cache imports this module
+    # out-of-range codes would wrap around (negative) or fail (too large) as indices
+    indices = x_mu.long().clamp(0, n_quantize - 1)
+    return cached_mu_law_table(n_quantize, x_mu.device, dtype)[indices]
+
+
+def _mu_law_decoding(x_mu, n_quantize):
+    # type: (Tensor, int) -> Tensor
     mu = torch.tensor(n_quantize - 1, dtype=x_mu.dtype, requires_grad=False)  # confused about dtype here..
     x = (x_mu / mu) * 2 - 1.
     x = x.sign() * (torch.exp(x.abs() * torch.log1p(mu)) - 1.) / mu
     return x
+
+
+def mu_law_table(n_quantize=256, dtype=torch.get_default_dtype(), device=None):
+    """Decoded values of all the mu-law codes.
+
+    Args:
+        n_quantize (int): quantization level.
+        dtype: `dtype` of the decoded values.
+        device (torch.device, optional): Defaults to cpu.
+
+    Returns:
+        (Tensor): (n_quantize,), the value of code `i` at index `i`
+    """
+    return _mu_law_decoding(torch.arange(n_quantize, dtype=dtype, device=device), n_quantize)
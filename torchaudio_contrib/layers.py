@@ -1,11 +1,18 @@
 import torch
 import math
 import torch.nn as nn
+from collections import OrderedDict
 
-from .functional import stft, complex_norm, \
-    create_mel_filter, phase_vocoder, apply_filterbank, \
+from .functional import stft, istft, istft_normalizer, complex_norm, \
+    phase_vocoder, apply_filterbank, apply_power_filterbank, \
+    banded_filterbank, apply_banded_filterbank, _banded_indices, \
+    _stretch, _phase_vocoder_block, _read_positions, \
     amplitude_to_db, db_to_amplitude, \
-    mu_law_encoding, mu_law_decoding
+    mu_law_encoding, mu_law_decoding, cqt, mfcc, griffin_lim, resample, _resample_steps, \
+    pitch_shift
+from .cache import cached_mel_filter, cached_window, cached_cqt_kernels, cached_decimation_filter, \
+    cached_dct, cached_resample_kernel
+from .backends import dft_basis, _pad_window
 
 
 class _ModuleNoStateBuffers(nn.Module):
@@ -44,16 +51,21 @@ class STFT(_ModuleNoStateBuffers):
             Defaults to fft_len // 4.
         frame_len (int): Size of stft window. Defaults to fft_len.
         window (Tensor): 1-D tensor. Defaults to Hann Window
-            of size frame_len.
+            of size frame_len, shared with other layers through the tensor cache.
         pad (int): Amount of padding to apply to signal. Defaults to 0.
         pad_mode: padding method (see torch.nn.functional.pad).
             Defaults to "reflect".
-        **kwargs: Other torch.stft parameters, see torch.stft for more details.
+        return_complex (bool): If True, the output is of complex dtype. Defaults to False.
+        backend (str): How the frames are transformed (see torchaudio_contrib.stft).
+            Defaults to 'torch'.
+        normalized (bool): see torch.stft. Defaults to False.
+        onesided (bool): see torch.stft. Defaults to True.
 
     """
 
-    def __init__(self, fft_len=2048, hop_len=None, frame_len=None,
-                 window=None, pad=0, pad_mode="reflect", **kwargs):
+    def __init__(self, fft_len=2048, hop_len=None, frame_len=None, window=None, pad=0,
+                 pad_mode="reflect", return_complex=False, backend='torch',
+                 normalized=False, onesided=True):
 
         super(STFT, self).__init__()
 
@@ -63,7 +75,10 @@ class STFT(_ModuleNoStateBuffers):
 
         self.pad = pad
         self.pad_mode = pad_mode
-        self.kwargs = kwargs
+        self.return_complex = return_complex
+        self.backend = backend
+        self.normalized = normalized
+        self.onesided = onesided
 
         self.register_buffer('window', window)
 
@@ -75,24 +90,30 @@ class STFT(_ModuleNoStateBuffers):
 
         if window is None:
             length = fft_len if frame_len is None else frame_len
-            window = torch.hann_window(length)
+            window = cached_window(torch.hann_window, length)
         if not isinstance(window, torch.Tensor):
             raise TypeError('window must be a of type torch.Tensor')
 
         return fft_len, hop_len, window
 
-    def forward(self, waveforms):
+    def forward(self, waveforms, lengths=None):
+        # type: (Tensor, Optional[Tensor]) -> Tensor
         """
         Args:
             waveforms (Tensor): (channel, time) or (batch, channel, time).
+            lengths (LongTensor, optional): (batch,) number of valid samples of every
+                example. Only the frames within them are computed (see `stft`).
 
         Returns:
             spect (Tensor): (channel, time, freq, complex)
                 or (batch, channel, time, freq, complex).
+                With `lengths`, a tuple of the spectrograms and the number of valid
+                frames of every example (batch,).
         """
 
-        complex_specgrams = stft(waveforms, self.fft_len, self.hop_len, window=self.window,
-                                 pad=self.pad, pad_mode=self.pad_mode, **self.kwargs)
+        complex_specgrams = stft(waveforms, self.fft_len, self.hop_len, self.window,
+                                 self.pad, self.pad_mode, self.return_complex, self.backend,
+                                 self.normalized, self.onesided, lengths)
 
         return complex_specgrams
 
@@ -102,40 +123,364 @@ class STFT(_ModuleNoStateBuffers):
         return self.__class__.__name__ + param_str
 
 
-class ComplexNorm(nn.Module):
+class ExportableSTFT(STFT):
+    """
+    STFT computed as a strided conv1d with the windowed DFT basis, which is
+    registered as a buffer and exported as a constant. Built only from ops that can be
+    exported to ONNX (see torchaudio_contrib.export_onnx), with the (..., complex=2)
+    output of `STFT`.
+
+    Args:
+
+        fft_len (int): FFT window size. Defaults to 2048.
+        hop_len (int): Number audio of frames between stft columns.
+            Defaults to fft_len // 4.
+        frame_len (int): Size of stft window. Defaults to fft_len.
+        window (Tensor): 1-D tensor. Defaults to Hann Window
+            of size frame_len.
+        pad (int): Amount of padding to apply to signal. Defaults to 0.
+        pad_mode: padding method (see torch.nn.functional.pad).
+            Defaults to "reflect".
+
+    """
+
+    def __init__(self, fft_len=2048, hop_len=None, frame_len=None,
+                 window=None, pad=0, pad_mode="reflect"):
+        super(ExportableSTFT, self).__init__(fft_len, hop_len, frame_len, window, pad, pad_mode)
+        self.num_bins = fft_len // 2 + 1
+        self.register_buffer('basis', dft_basis(self.window, fft_len).unsqueeze(1))
+
+    def forward(self, waveforms):
+        """
+        Args:
+            waveforms (Tensor): (channel, time) or (batch, channel, time).
+
+        Returns:
+            spect (Tensor): (channel, freq, time, complex)
+                or (batch, channel, freq, time, complex).
+        """
+        signals = waveforms.reshape(-1, 1, waveforms.size(-1))
+        if self.pad > 0:
+            signals = torch.nn.functional.pad(signals, (self.pad, self.pad), self.pad_mode)
+
+        specgrams = torch.nn.functional.conv1d(signals, self.basis, stride=self.hop_len)
+        specgrams = specgrams.reshape(waveforms.shape[:-1] + (2, self.num_bins, -1))
+        return specgrams.transpose(-3, -2).transpose(-2, -1)
+
+
+class StreamingSTFT(STFT):
+    """
+    Stateful STFT for a stream of audio blocks. Every call takes the next block
+    of the signal and returns only the stft columns that became complete with it.
+    Samples that are still needed by upcoming columns are carried over in a
+    preallocated buffer, so the output is identical to `STFT(pad=0)` over the
+    concatenated stream.
+
+    Args:
+
+        fft_len (int): FFT window size. Defaults to 2048.
+        hop_len (int): Number audio of frames between stft columns.
+            Defaults to fft_len // 4.
+        frame_len (int): Size of stft window. Defaults to fft_len.
+        window (Tensor): 1-D tensor. Defaults to Hann Window
+            of size frame_len.
+        **kwargs: `return_complex`, `backend`, `normalized` and `onesided`, see `STFT`.
+            The stream is not padded, `pad` must be 0.
+
+    Example:
+        >>> layer = StreamingSTFT(fft_len=512, hop_len=128)
+        >>> for block in torch.randn(2, 44100).split(441, dim=-1):
+        >>>     complex_specgrams = layer(block)  # (2, 257, new columns, 2)
+    """
+
+    def __init__(self, fft_len=2048, hop_len=None, frame_len=None,
+                 window=None, **kwargs):
+        if kwargs.get('pad', 0) != 0:
+            raise ValueError('StreamingSTFT does not pad the stream, pad must be 0, '
+                             'not {}.'.format(kwargs['pad']))
+        super(StreamingSTFT, self).__init__(fft_len, hop_len, frame_len, window, **kwargs)
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the carried-over samples, e.g. to start a new stream.
+        """
+        self._buffer = None
+        self._start = 0  # first sample of the next column
+        self._end = 0  # end of the written samples
+
+    def _prepare_buffer(self, block):
+        block_len = block.size(-1)
+        # Twice the worst-case content, so that moving the carried-over samples
+        # to the front never overlaps with where they are read from.
+        capacity = 2 * (self.fft_len + block_len)
+
+        buffer = self._buffer
+        if buffer is None or buffer.shape[:-1] != block.shape[:-1] or \
+                buffer.device != block.device or buffer.dtype != block.dtype:
+            self._buffer = block.new_empty(block.shape[:-1] + (capacity,))
+            self._start = self._end = 0
+        elif self._end + block_len > buffer.size(-1):
+            carry = self._end - self._start
+            if buffer.size(-1) < capacity:
+                self._buffer = block.new_empty(block.shape[:-1] + (capacity,))
+                self._buffer[..., :carry].copy_(buffer[..., self._start:self._end])
+            else:
+                buffer[..., :carry].copy_(buffer[..., self._start:self._end])
+            self._start, self._end = 0, carry
+
+    def forward(self, block):
+        """
+        Args:
+            block (Tensor): (channel, time) or (batch, channel, time),
+                the next samples of the stream.
+
+        Returns:
+            spect (Tensor): (channel, freq, new_time, complex)
+                or (batch, channel, freq, new_time, complex).
+        """
+        self._prepare_buffer(block)
+        block_len = block.size(-1)
+        self._buffer[..., self._end:self._end + block_len].copy_(block)
+        self._end += block_len
+
+        num_frames = max(0, (self._end - self._start - self.fft_len) // self.hop_len + 1)
+        if num_frames == 0:
+            num_bins = self.fft_len // 2 + 1 if self.onesided else self.fft_len
+            if self.return_complex:
+                return torch.view_as_complex(block.new_zeros(block.shape[:-1] + (num_bins, 0, 2)))
+            return block.new_zeros(block.shape[:-1] + (num_bins, 0, 2))
+
+        stop = self._start + (num_frames - 1) * self.hop_len + self.fft_len
+        complex_specgrams = stft(self._buffer[..., self._start:stop], self.fft_len,
+                                 self.hop_len, self.window, return_complex=self.return_complex,
+                                 backend=self.backend, normalized=self.normalized,
+                                 onesided=self.onesided)
+        self._start += num_frames * self.hop_len
+
+        return complex_specgrams
+
+
+class ISTFT(_ModuleNoStateBuffers):
+    """
+    Compute the inverse stft transform of a multi-channel complex spectrogram
+    or batch of multi-channel complex spectrograms.
+    The window sum-square normalizers are cached per number of frames.
+
+    Args:
+
+        fft_len (int): FFT window size. Defaults to 2048.
+        hop_len (int): Number audio of frames between stft columns.
+            Defaults to fft_len // 4.
+        frame_len (int): Size of stft window. Defaults to fft_len.
+        window (Tensor): 1-D tensor. Defaults to Hann Window
+            of size frame_len.
+        pad (int): Amount of padding that was applied to signal. Defaults to 0.
+
+    """
+    _stft_defaults = STFT._stft_defaults
+    _max_cached_normalizers = 16
+
+    def __init__(self, fft_len=2048, hop_len=None, frame_len=None,
+                 window=None, pad=0):
+
+        super(ISTFT, self).__init__()
+
+        self.fft_len, self.hop_len, window = self._stft_defaults(
+            fft_len, hop_len, frame_len, window)
+        self.pad = pad
+        self._normalizers = OrderedDict()
+
+        self.register_buffer('window', window)
+
+    def _get_normalizer(self, num_frames):
+        key = (num_frames, self.window.device, self.window.dtype)
+        if key not in self._normalizers:
+            if len(self._normalizers) >= self._max_cached_normalizers:
+                self._normalizers.popitem(last=False)
+            self._normalizers[key] = istft_normalizer(
+                self.window, num_frames, self.hop_len, self.fft_len)
+        return self._normalizers[key]
+
+    def forward(self, complex_specgrams, length=None):
+        """
+        Args:
+            complex_specgrams (Tensor): (channel, freq, time, complex)
+                or (batch, channel, freq, time, complex).
+            length (int, optional): Length of the output signals.
+
+        Returns:
+            waveforms (Tensor): (channel, time) or (batch, channel, time).
+        """
+        normalizer = self._get_normalizer(complex_specgrams.size(-2))
+        return istft(complex_specgrams, self.hop_len, self.window,
+                     pad=self.pad, length=length, normalizer=normalizer)
+
+    def __repr__(self):
+        param_str = '(fft_len={}, hop_len={}, frame_len={})'.format(
+            self.fft_len, self.hop_len, self.window.size(0))
+        return self.__class__.__name__ + param_str
+
+
+class GriffinLim(_ModuleNoStateBuffers):
+    """
+    Reconstruct waveforms from magnitude spectrograms with the fast Griffin-Lim
+    algorithm, the whole batch at once (see `griffin_lim`).
+
+    Args:
+
+        fft_len (int): FFT window size. Defaults to 2048.
+        hop_len (int): Number audio of frames between stft columns.
+            Defaults to fft_len // 4.
+        frame_len (int): Size of stft window. Defaults to fft_len.
+        window (Tensor): 1-D tensor. Defaults to Hann Window
+            of size frame_len.
+        pad (int): Amount of padding of the stft. Defaults to 0.
+        pad_mode: padding method of the stft. Defaults to "reflect".
+        num_iters (int): Maximum number of iterations. Defaults to 32.
+        momentum (float): Phase extrapolation, 0 for the original Griffin-Lim.
+            Defaults to 0.99.
+        tol (float, optional): Spectral convergence under which an example stops
+            iterating.
+        power (float): Exponent of the input magnitudes. Defaults to 1.
+        init (str): 'random' or 'zeros' initial phases. Defaults to 'random'.
+
+    """
+    _stft_defaults = STFT._stft_defaults
+
+    def __init__(self, fft_len=2048, hop_len=None, frame_len=None, window=None,
+                 pad=0, pad_mode="reflect", num_iters=32, momentum=0.99, tol=None,
+                 power=1., init='random'):
+
+        super(GriffinLim, self).__init__()
+
+        self.fft_len, self.hop_len, window = self._stft_defaults(
+            fft_len, hop_len, frame_len, window)
+        self.pad = pad
+        self.pad_mode = pad_mode
+        self.num_iters = num_iters
+        self.momentum = momentum
+        self.tol = tol
+        self.power = power
+        self.init = init
+
+        self.register_buffer('window', window)
+
+    def forward(self, mag_specgrams, length=None):
+        """
+        Args:
+            mag_specgrams (Tensor): (channel, freq, time) or (batch, channel, freq, time).
+            length (int, optional): Length of the output signals.
+
+        Returns:
+            waveforms (Tensor): (channel, time) or (batch, channel, time).
+        """
+        return griffin_lim(mag_specgrams, self.hop_len, self.window, self.pad, self.pad_mode,
+                           length, self.num_iters, self.momentum, self.tol, self.power,
+                           self.init)
+
+    def __repr__(self):
+        param_str = '(fft_len={}, hop_len={}, frame_len={}, num_iters={}, momentum={}, tol={})'.format(
+            self.fft_len, self.hop_len, self.window.size(0), self.num_iters, self.momentum,
+            self.tol)
+        return self.__class__.__name__ + param_str
+
+
+class ComplexNorm(_ModuleNoStateBuffers):
     """
     Wrap torchaudio_contrib.complex_norm in an nn.Module.
     """
 
-    def __init__(self, power=1.0):
+    def __init__(self, power=1.0, fused=False):
         super(ComplexNorm, self).__init__()
-        self.power = power
+        self.power = float(power)
+        self.fused = fused
 
-    def forward(self, complex_specgrams):
-        return complex_norm(complex_specgrams, self.power)
+    def forward(self, complex_specgrams, lengths=None):
+        # type: (Tensor, Optional[Tensor]) -> Tensor
+        return complex_norm(complex_specgrams, self.power, self.fused, lengths)
 
     def __repr__(self):
-        return self.__class__.__name__ + '(power={})'.format(self.power)
+        param_str = '(power={})'.format(self.power) if not self.fused else \
+            '(power={}, fused=True)'.format(self.power)
+        return self.__class__.__name__ + param_str
 
 
 class ApplyFilterbank(_ModuleNoStateBuffers):
     """
     Applies a filterbank transform.
+
+    Args:
+        filterbank (Tensor): (num_freqs, num_bands)
+        banded (bool): If True, keep only the contiguous nonzero range of every band
+            (see `banded_filterbank`) and skip all the other bins. Much cheaper for
+            filterbanks with narrow bands such as mel. Defaults to False.
     """
+    __constants__ = ['banded']
 
-    def __init__(self, filterbank):
+    def __init__(self, filterbank, banded=False):
         super(ApplyFilterbank, self).__init__()
+        self.banded = banded
+        if banded:
+            starts, lengths, weights = banded_filterbank(filterbank)
+            freq_index, band_index = _banded_indices(starts, lengths)
+            self.register_buffer('starts', starts)
+            self.register_buffer('lengths', lengths)
+            self.register_buffer('weights', weights)
+            self.register_buffer('freq_index', freq_index)
+            self.register_buffer('band_index', band_index)
+        else:
+            self.register_buffer('filterbank', filterbank)
+
+    def forward(self, mag_specgrams, lengths=None):
+        # type: (Tensor, Optional[Tensor]) -> Tensor
+        """
+        Args:
+            mag_specgrams (Tensor): (channel, freq, time) or (batch, channel, freq, time).
+            lengths (LongTensor, optional): (batch,) number of valid frames of every example.
+                Only those are transformed, and the padded frames of the output are zero.
+
+        Returns:
+            (Tensor): freq -> filterbank.size(1)
+        """
+        if self.banded:
+            return apply_banded_filterbank(mag_specgrams, self.starts, self.lengths, self.weights,
+                                           (self.freq_index, self.band_index), lengths)
+        return apply_filterbank(mag_specgrams, self.filterbank, lengths)
+
+    def __repr__(self):
+        param_str = '(banded=True)' if self.banded else '()'
+        return self.__class__.__name__ + param_str
+
+
+class ApplyPowerFilterbank(_ModuleNoStateBuffers):
+    """
+    Applies a filterbank transform to the magnitude of a complex spectrogram,
+    fusing ComplexNorm and ApplyFilterbank.
+
+    Args:
+        filterbank (Tensor): (num_freqs, num_bands)
+        power (float): Exponent of the magnitude. Defaults to 2.
+    """
+
+    def __init__(self, filterbank, power=2.):
+        super(ApplyPowerFilterbank, self).__init__()
+        self.power = float(power)
         self.register_buffer('filterbank', filterbank)
 
-    def forward(self, mag_specgrams):
+    def forward(self, complex_specgrams):
         """
         Args:
-            mag_specgrams (Tensor): (channel, time, freq) or (batch, channel, time, freq).
+            complex_specgrams (Tensor): (channel, freq, time, complex)
+                or (batch, channel, freq, time, complex).
 
         Returns:
-            (Tensor): freq -> filterbank.size(0)
+            (Tensor): freq -> filterbank.size(1)
         """
-        return apply_filterbank(mag_specgrams, self.filterbank)
+        return apply_power_filterbank(complex_specgrams, self.filterbank, self.power)
+
+    def __repr__(self):
+        return self.__class__.__name__ + '(power={})'.format(self.power)
 
 
 class Filterbank(object):
@@ -153,6 +498,7 @@ class Filterbank(object):
 class MelFilterbank(Filterbank):
     """
     Provides a filterbank matrix to convert a spectrogram into a mel frequency spectrogram.
+    The matrix is shared through the tensor cache, so it should not be modified in place.
 
     Args:
         num_freqs (int, optional): number of filter banks from stft.
@@ -178,7 +524,7 @@ class MelFilterbank(Filterbank):
         self.htk = htk
 
     def get_filterbank(self):
-        return create_mel_filter(
+        return cached_mel_filter(
             num_freqs=self.num_freqs,
             num_mels=self.num_mels,
             min_freq=self.min_freq,
@@ -195,6 +541,151 @@ class MelFilterbank(Filterbank):
         return self.__class__.__name__ + param_str1 + param_str2 + param_str3
 
 
+class StreamingMelspectrogram(_ModuleNoStateBuffers):
+    """
+    Causal log-mel front end of many concurrent streams, e.g. for keyword spotting.
+    Every call takes the next samples of every stream, typically one hop per tick, and
+    returns the dB mel frames that end with them: frame t covers the samples
+    [(t + 1) * hop_len - fft_len, (t + 1) * hop_len) of its stream, zeros before its start,
+    so that every frame comes out as soon as its last hop arrives (an algorithmic latency
+    of one frame).
+
+    The frames are the ones of `Melspectrogram` (without padding) + `AmplitudeToDb` over
+    the streams left-padded with fft_len - hop_len zeros. All the streams are processed as
+    one batch: the sample history and the windowed frames are preallocated buffers reused
+    from call to call, and the power spectrum is summed by the mel projection.
+
+    Args:
+        num_mels (int): number of mel bins. Defaults to 128.
+        sample_rate (int): sample rate of audio signal. Defaults to 22050.
+        min_freq (float): minimum frequency. Defaults to 0.
+        max_freq (float, optional): maximum frequency. Defaults to sample_rate // 2.
+        htk (bool, optional): use HTK formula instead of Slaney. Defaults to False.
+        fft_len (int): FFT window size. Defaults to 2048.
+        hop_len (int): Number audio of frames between stft columns.
+            Defaults to fft_len // 4.
+        frame_len (int): Size of stft window. Defaults to fft_len.
+        window (Tensor): 1-D tensor. Defaults to Hann Window
+            of size frame_len.
+        ref (float): power that is equivalent to 0 decibel. Defaults to 1.
+        amin (float): minimum power. Defaults to 1e-7.
+
+    Example:
+        >>> layer = StreamingMelspectrogram(num_mels=40, sample_rate=16000, fft_len=512,
+        >>>                                 hop_len=160, frame_len=400)
+        >>> for hops in ticks:  # (streams, channel, 160)
+        >>>     log_mels = layer(hops)  # (streams, channel, 40, 1)
+        >>> layer.reset([3])  # stream 3 ended, a new stream takes its slot
+    """
+    _stft_defaults = STFT._stft_defaults
+
+    def __init__(self, num_mels=128, sample_rate=22050, min_freq=0.0, max_freq=None, htk=False,
+                 fft_len=2048, hop_len=None, frame_len=None, window=None, ref=1.0, amin=1e-7):
+        super(StreamingMelspectrogram, self).__init__()
+
+        self.fft_len, self.hop_len, window = self._stft_defaults(
+            fft_len, hop_len, frame_len, window)
+        if self.hop_len > self.fft_len:
+            raise ValueError('hop_len must not exceed fft_len.')
+        self.num_mels = num_mels
+        self.ref = float(ref)
+        self.amin = float(amin)
+
+        self.register_buffer('window', window)
+        self.register_buffer('filterbank', MelFilterbank(
+            num_freqs=self.fft_len // 2 + 1, num_mels=num_mels, min_freq=min_freq,
+            max_freq=max_freq, sample_rate=sample_rate, htk=htk).get_filterbank())
+        self.reset()
+
+    def reset(self, streams=None):
+        """
+        Forget the history of all the streams, or only of the `streams` indices of the
+        batch, e.g. when new streams take their slots. The streams are the first dimension
+        of batched (streams, channel, time) blocks; unbatched (channel, time) blocks are one
+        stream, which only has a whole reset.
+        """
+        if streams is not None and self._leading_shape is not None and \
+                len(self._leading_shape) < 2:
+            raise ValueError('The blocks are unbatched (channel, time): reset the single '
+                             'stream with reset(), not reset(streams).')
+        if streams is None or self._samples is None:
+            self._samples = None  # (streams * channel, capacity) sample history
+            self._leading_shape = None
+            self._start = 0  # first sample of the next frame
+            self._end = 0  # end of the written samples
+            self._frames = None  # windowed frames buffer, padded window and filterbank
+            return
+        history = self._samples.view(self._leading_shape + (-1,))
+        history[streams, ..., self._start:self._end] = 0
+
+    def _prepare_buffers(self, block, num_frames):
+        block_len = block.size(-1)
+        history_len = self.fft_len - self.hop_len
+        # Twice the worst-case content, so that moving the history to the front never
+        # overlaps with where it is read from.
+        capacity = 2 * (self.fft_len + block_len)
+
+        samples = self._samples
+        if samples is None or self._leading_shape != block.shape[:-1] or \
+                samples.device != block.device or samples.dtype != block.dtype:
+            self._samples = block.new_zeros(block.shape[:-1].numel(), capacity)
+            self._leading_shape = block.shape[:-1]
+            self._start, self._end = 0, history_len
+            self._frames = None
+        elif self._end + block_len > samples.size(-1):
+            if samples.size(-1) < capacity:
+                self._samples = block.new_empty(samples.size(0), capacity)
+            self._samples[:, :history_len].copy_(samples[:, self._start:self._end])
+            self._start, self._end = 0, history_len
+
+        if self._frames is None or self._frames[0].size(1) != num_frames:
+            num_streams = self._samples.size(0)
+            windowed = block.new_empty(num_streams, num_frames, self.fft_len)
+            window = _pad_window(self.window, self.fft_len).to(block.device, block.dtype)
+            # every row twice, for the squared real and imaginary parts of a bin, so that
+            # the projection also sums them into the power
+            filterbank = self.filterbank.to(block.device, block.dtype).repeat_interleave(2, 0)
+            self._frames = windowed, window, filterbank
+
+    def forward(self, block):
+        """
+        Args:
+            block (Tensor): (streams, channel, time) or (channel, time), the next samples
+                of every stream, a multiple of hop_len.
+
+        Returns:
+            (Tensor): (streams, channel, num_mels, time // hop_len)
+                or (channel, num_mels, time // hop_len), in dB.
+        """
+        num_frames, rest = divmod(block.size(-1), self.hop_len)
+        if rest:
+            raise ValueError('The blocks must be made of whole hops of {} samples, '
+                             'got {}.'.format(self.hop_len, block.size(-1)))
+        self._prepare_buffers(block, num_frames)
+        windowed, window, filterbank = self._frames
+
+        block_len = block.size(-1)
+        self._samples[:, self._end:self._end + block_len].copy_(block.reshape(-1, block_len))
+        self._end += block_len
+        frames = self._samples[:, self._start:self._end].unfold(-1, self.fft_len, self.hop_len)
+        self._start += block_len
+
+        torch.mul(frames, window, out=windowed)
+        # not into a preallocated tensor: rfft(out=...) computes into a new one and copies it
+        squares = torch.view_as_real(torch.fft.rfft(windowed)).square_().flatten(-2)
+        # a new tensor, as the caller may keep the frames of every tick
+        mel_specgrams = torch.matmul(squares, filterbank)
+        mel_specgrams.clamp_(min=self.amin).log10_().sub_(math.log10(self.ref)).mul_(10.)
+
+        return mel_specgrams.view(self._leading_shape + (num_frames, self.num_mels)) \
+            .transpose(-2, -1)
+
+    def __repr__(self):
+        param_str = '(num_mels={}, fft_len={}, hop_len={}, frame_len={}, ref={}, amin={})'.format(
+            self.num_mels, self.fft_len, self.hop_len, self.window.size(0), self.ref, self.amin)
+        return self.__class__.__name__ + param_str
+
+
 class StretchSpecTime(_ModuleNoStateBuffers):
     """
     Stretch stft in time without modifying pitch for a given rate.
@@ -206,40 +697,363 @@ class StretchSpecTime(_ModuleNoStateBuffers):
             Defaults to 512.
         num_bins (int, optional): number of filter banks from stft.
             Defaults to 1025.
+        streaming (bool, optional): If True, every call takes the next block of stft
+            frames of a stream and returns the stretched frames that can be computed
+            so far, carrying the phase accumulator and the read position over to the
+            next call. Call `flush()` at the end of the stream. Defaults to False.
+
+    Example:
+        >>> layer = StretchSpecTime(rate=1.2, hop_len=128, num_bins=257, streaming=True)
+        >>> for block in complex_specgrams.split(4, dim=3):
+        >>>     stretched = layer(block)
+        >>> stretched = layer.flush()
     """
 
-    def __init__(self, rate=1., hop_len=512, num_bins=1025):
+    def __init__(self, rate=1., hop_len=512, num_bins=1025, streaming=False):
         super(StretchSpecTime, self).__init__()
 
-        self.rate = rate
+        self.rate = float(rate)
+        self.streaming = streaming
         phi_advance = torch.linspace(
             0, math.pi * hop_len, num_bins)[..., None]
 
         self.register_buffer('phi_advance', phi_advance)
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the state of the stream.
+        """
+        self._frames = None  # received frames that are still needed
+        self._frame_offset = 0  # stream index of self._frames[..., 0]
+        self._phase_acc = None  # accumulated phase at the next step
+        self._step = 0  # index of the next output frame
+        self._anchor = (0, 0., None)  # (step, read position, rate) since the last rate change
+        self._real_layout = True
 
     def forward(self, complex_specgrams, rate=None):
+        # type: (Tensor, Optional[float]) -> Tensor
         """
 
         Args:
             complex_specgrams (Tensor): complex spectrogram
                 (batch, channel, freq, time, complex=2)
-            rate (float or None)
+            rate (float, Tensor or None): overrides `self.rate`. A tensor of shape (batch,)
+                stretches every example by its own rate.
+
+        Returns:
+            (Tensor): (batch, channel, num_bins, new_bins, 2) with new_bins = num_bins//rate+1.
+                For per-example rates, a tuple of the zero-padded stretched spectrograms
+                and their lengths (batch,) (see phase_vocoder).
+                In streaming mode, only the stretched frames that became available
+                with this block.
+                Per-example rates and the streaming mode are not supported by TorchScript.
+
+        """
+        if not torch.jit.is_scripting():
+            if rate is None:
+                rate = self.rate
+            if self.streaming:
+                return self._stream(complex_specgrams, float(rate))
+            return phase_vocoder(complex_specgrams, rate, self.phi_advance)
+
+        if self.streaming:
+            raise RuntimeError('The streaming mode is not supported by TorchScript.')
+        return _stretch(complex_specgrams, self.rate if rate is None else rate, self.phi_advance)
+
+    def flush(self):
+        """
+        Return the remaining stretched frames of the stream, reading zeros past its end,
+        and reset the state.
+        """
+        if self._frames is None:
+            return None
+        spect_stretch = self._stream(None, self._anchor[2], last=True)
+        self.reset()
+        return spect_stretch
+
+    def _stream(self, complex_specgrams, rate, last=False):
+        if complex_specgrams is not None:
+            self._real_layout = not complex_specgrams.is_complex()
+            if self._real_layout:
+                complex_specgrams = torch.view_as_complex(complex_specgrams.contiguous())
+            if self._frames is None:
+                self._frames = complex_specgrams
+                self._phase_acc = torch.angle(complex_specgrams[:, :, :, :1])
+                self._anchor = (0, 0., rate)
+            else:
+                self._frames = torch.cat([self._frames, complex_specgrams], dim=3)
+
+        anchor_step, anchor_time, anchor_rate = self._anchor
+        if rate != anchor_rate:
+            anchor_time += (self._step - anchor_step) * anchor_rate
+            self._anchor = anchor_step, anchor_time, anchor_rate = self._step, anchor_time, rate
+
+        # Step k reads frames floor(t_k) and floor(t_k) + 1, the latter being zero past the end.
+        num_frames = self._frame_offset + self._frames.size(3)
+        limit = num_frames if last else num_frames - 1
+        max_steps = max(0, int(math.ceil((limit - anchor_time) / rate)) - (self._step - anchor_step))
+        first_step = self._step - anchor_step
+        time_steps = _read_positions(first_step, first_step + max_steps, rate,
+                                     self._frames.real.dtype, anchor_time, self._frames.device)
+        time_steps = time_steps[time_steps < limit]
+
+        if time_steps.numel() > 0:
+            frames = torch.nn.functional.pad(self._frames, [0, 2])
+            spect_stretch, self._phase_acc = _phase_vocoder_block(
+                frames, time_steps - self._frame_offset, self._phase_acc, self.phi_advance)
+        else:
+            spect_stretch = self._frames[:, :, :, :0]
+        self._step += time_steps.numel()
+
+        # Drop the frames that no upcoming step reads.
+        next_time = anchor_time + (self._step - anchor_step) * rate
+        num_drop = min(max(0, int(math.floor(next_time)) - self._frame_offset), self._frames.size(3))
+        self._frames = self._frames[:, :, :, num_drop:]
+        self._frame_offset += num_drop
+
+        if self._real_layout:
+            return torch.view_as_real(spect_stretch)
+        return spect_stretch
+
+    def __repr__(self):
+        param_str = '(rate={})'.format(self.rate) if not self.streaming else \
+            '(rate={}, streaming=True)'.format(self.rate)
+        return self.__class__.__name__ + param_str
+
+
+class PitchShift(_ModuleNoStateBuffers):
+    """
+    Shift the pitch of waveforms without changing their duration: stretch them in time
+    with the phase vocoder of `StretchSpecTime`, then resample them (see `pitch_shift`).
+    A batch is processed at once, with one shift per example if given a tensor.
+
+    Args:
+
+        n_steps (float): shift in steps of 1 / bins_per_octave octave, rounded to a
+            tenth of a step. Defaults to 0.
+        fft_len (int): FFT window size. Defaults to 2048.
+        hop_len (int): Number audio of frames between stft columns.
+            Defaults to fft_len // 4.
+        frame_len (int): Size of stft window. Defaults to fft_len.
+        window (Tensor): 1-D tensor. Defaults to Hann Window
+            of size frame_len.
+        bins_per_octave (int): number of steps per octave. Defaults to 12 (semitones).
+        quality (str): quality of the resampling, see `create_resample_kernel`.
+            Defaults to 'medium'.
+
+    Example:
+        >>> layer = PitchShift(fft_len=1024)
+        >>> shifted = layer(waveforms, torch.randint(-4, 5, (waveforms.size(0),)))
+    """
+    _stft_defaults = STFT._stft_defaults
+
+    def __init__(self, n_steps=0., fft_len=2048, hop_len=None, frame_len=None, window=None,
+                 bins_per_octave=12, quality='medium'):
+        super(PitchShift, self).__init__()
+
+        self.fft_len, self.hop_len, window = self._stft_defaults(
+            fft_len, hop_len, frame_len, window)
+        self.n_steps = float(n_steps)
+        self.bins_per_octave = bins_per_octave
+        self.quality = quality
+
+        self.register_buffer('window', window)
+
+    def forward(self, waveforms, n_steps=None):
+        """
+        Args:
+            waveforms (Tensor): (channel, time) or (batch, channel, time).
+            n_steps (float or Tensor, optional): overrides `self.n_steps`. A tensor of
+                shape (batch,) shifts every example by its own number of steps.
+
+        Returns:
+            (Tensor): (channel, time) or (batch, channel, time).
+        """
+        return pitch_shift(waveforms, self.n_steps if n_steps is None else n_steps,
+                           self.fft_len, self.hop_len, self.window, self.bins_per_octave,
+                           self.quality)
+
+    def __repr__(self):
+        param_str = '(n_steps={}, fft_len={}, hop_len={}, frame_len={}, bins_per_octave={})'.format(
+            self.n_steps, self.fft_len, self.hop_len, self.window.size(0), self.bins_per_octave)
+        return self.__class__.__name__ + param_str
+
+
+class CQT(_ModuleNoStateBuffers):
+    """
+    Constant-Q (or variable-Q) transform of waveforms, computed octave by octave on
+    successively decimated signals (see `cqt`). The kernels are shared through the
+    tensor cache.
+
+    Args:
+        sample_rate (int): sample rate of audio signal. Defaults to 22050.
+        hop_len (int): number of samples between frames, a multiple of
+            2 ** (number of octaves - 1). Defaults to 512.
+        min_freq (float): center frequency of the lowest bin. Defaults to 32.70 (C1).
+        num_bins (int): number of bins. Defaults to 84.
+        bins_per_octave (int): number of bins per octave. Defaults to 12.
+        filter_scale (float): scale of the filter lengths. Defaults to 1.
+        gamma (float): bandwidth offset in Hz of a variable-Q transform. Defaults to 0.
+        return_complex (bool): return a complex tensor instead of the (*, 2) real layout.
+            Defaults to False.
+    """
+
+    def __init__(self, sample_rate=22050, hop_len=512, min_freq=32.70, num_bins=84,
+                 bins_per_octave=12, filter_scale=1., gamma=0., return_complex=False):
+        super(CQT, self).__init__()
+        num_octaves = -(-num_bins // bins_per_octave)
+        if hop_len % 2 ** (num_octaves - 1):
+            raise ValueError('hop_len must be a multiple of 2 ** (num_octaves - 1) = {}.'.format(
+                2 ** (num_octaves - 1)))
+        self.sample_rate = sample_rate
+        self.hop_len = hop_len
+        self.min_freq = min_freq
+        self.num_bins = num_bins
+        self.bins_per_octave = bins_per_octave
+        self.filter_scale = filter_scale
+        self.gamma = gamma
+        self.return_complex = return_complex
+        self.register_buffer('kernels', cached_cqt_kernels(
+            sample_rate, min_freq, num_bins, bins_per_octave, filter_scale, gamma))
+        self.register_buffer('lowpass', cached_decimation_filter())
+
+    def forward(self, waveforms):
+        """
+        Args:
+            waveforms (Tensor): (channel, time) or (batch, channel, time).
+
+        Returns:
+            (Tensor): (batch, channel, num_bins, time, complex=2), or complex
+                (batch, channel, num_bins, time) with `return_complex`.
+        """
+        return cqt(waveforms, self.kernels, self.lowpass, self.hop_len, self.num_bins,
+                   self.return_complex)
+
+    def __repr__(self):
+        param_str = '(sample_rate={}, hop_len={}, min_freq={}, num_bins={}, ' \
+                    'bins_per_octave={}, filter_scale={}, gamma={})'.format(
+                        self.sample_rate, self.hop_len, self.min_freq, self.num_bins,
+                        self.bins_per_octave, self.filter_scale, self.gamma)
+        return self.__class__.__name__ + param_str
+
+
+class Resample(_ModuleNoStateBuffers):
+    """
+    Resample waveforms from `orig_sr` to `new_sr` with a polyphase windowed-sinc filter
+    (see `resample`), e.g. in front of `Melspectrogram`. The kernels are shared through
+    the tensor cache.
+
+    Args:
+        orig_sr (int): sample rate of the input.
+        new_sr (int): sample rate of the output.
+        quality (str): 'low', 'medium' or 'high', see `create_resample_kernel`.
+            Defaults to 'medium'.
+        streaming (bool, optional): If True, every call takes the next block of samples
+            of a stream and returns the resampled samples that can be computed so far,
+            carrying the samples still needed over to the next call. Call `flush()`
+            at the end of the stream. Defaults to False.
+
+    Example:
+        >>> layer = Resample(44100, 16000, streaming=True)
+        >>> for block in waveforms.split(4410, dim=-1):
+        >>>     resampled = layer(block)
+        >>> resampled = layer.flush()
+    """
+
+    def __init__(self, orig_sr, new_sr, quality='medium', streaming=False):
+        super(Resample, self).__init__()
+        self.orig_sr = orig_sr
+        self.new_sr = new_sr
+        self.quality = quality
+        self.streaming = streaming
+        self.register_buffer('kernel', cached_resample_kernel(orig_sr, new_sr, quality))
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the state of the stream.
+        """
+        self._buffer = None  # received samples that are still needed, after `width` zeros
+        self._leading_shape = None
+        self._num_in = 0  # number of received samples
+        self._num_out = 0  # number of returned samples
+
+    def forward(self, waveforms):
+        """
+        Args:
+            waveforms (Tensor): (channel, time) or (batch, channel, time).
 
         Returns:
-            (Tensor): (batch, channel, num_bins, new_bins, 2) with new_bins = num_bins//rate+1
+            (Tensor): (channel, new_time) or (batch, channel, new_time), with
+                new_time = ceil(time * new_sr / orig_sr). In streaming mode, only the
+                samples that became available with this block.
+                The streaming mode is not supported by TorchScript.
+        """
+        if not torch.jit.is_scripting():
+            if self.streaming:
+                return self._stream(waveforms)
 
+        if self.streaming:
+            raise RuntimeError('The streaming mode is not supported by TorchScript.')
+        return resample(waveforms, self.kernel, self.orig_sr, self.new_sr)
+
+    def flush(self):
+        """
+        Return the remaining resampled samples of the stream, reading zeros past its end,
+        and reset the state.
         """
-        if rate is None:
-            rate = self.rate
-        return phase_vocoder(complex_specgrams, rate, self.phi_advance)
+        if self._buffer is None:
+            return None
+        resampled = self._stream(None, last=True)
+        self.reset()
+        return resampled
+
+    def _stream(self, block, last=False):
+        if self.orig_sr == self.new_sr:
+            return block
+        num_phases, num_taps = self.kernel.shape
+        stride = num_phases * self.orig_sr // self.new_sr
+        if block is not None:
+            self._leading_shape = block.shape[:-1]
+            self._num_in += block.size(-1)
+            block = block.reshape(-1, 1, block.size(-1))
+            if self._buffer is None:
+                self._buffer = torch.nn.functional.pad(block, [(num_taps - stride - 1) // 2, 0])
+            else:
+                self._buffer = torch.cat([self._buffer, block], -1)
+
+        buffer = self._buffer
+        if last:
+            num_out = -(-self._num_in * self.new_sr // self.orig_sr) - self._num_out
+            num_steps = -(-num_out // num_phases)
+            buffer = torch.nn.functional.pad(
+                buffer, [0, max(0, (num_steps - 1) * stride + num_taps - buffer.size(-1))])
+        else:
+            num_steps = max(0, (buffer.size(-1) - num_taps) // stride + 1)
+            num_out = num_steps * num_phases
+
+        if num_steps > 0:
+            kernel = self.kernel.to(buffer.device, buffer.dtype)
+            resampled = _resample_steps(buffer[..., :(num_steps - 1) * stride + num_taps],
+                                        kernel, stride)[:, :num_out]
+        else:
+            resampled = buffer.new_zeros(buffer.size(0), 0)
+        # drop the samples that no upcoming step reads
+        self._buffer = self._buffer[..., num_steps * stride:]
+        self._num_out += num_out
+        return resampled.reshape(self._leading_shape + (num_out,))
 
     def __repr__(self):
-        param_str = '(rate={})'.format(self.rate)
+        param_str = '(orig_sr={}, new_sr={}, quality={!r})'.format(
+            self.orig_sr, self.new_sr, self.quality) if not self.streaming else \
+            '(orig_sr={}, new_sr={}, quality={!r}, streaming=True)'.format(
+                self.orig_sr, self.new_sr, self.quality)
         return self.__class__.__name__ + param_str
 
 
 def Spectrogram(fft_len=2048, hop_len=None, frame_len=None,
-                window=None, pad=0, pad_mode="reflect", power=1., **kwargs):
+                window=None, pad=0, pad_mode="reflect", power=1., exportable=False, **kwargs):
     """
     Get spectrogram module.
 
@@ -255,10 +1069,13 @@ def Spectrogram(fft_len=2048, hop_len=None, frame_len=None,
         pad_mode: padding method (see torch.nn.functional.pad).
             Defaults to "reflect".
         power (float): Exponent of the magnitude. Defaults to 1.
-        **kwargs: Other torch.stft parameters, see torch.stft for more details.
+        exportable (bool): use ExportableSTFT, so that the module can be exported
+            to ONNX. Defaults to False.
+        **kwargs: Other STFT parameters, e.g. `backend`, see STFT for more details.
     """
+    stft_layer = ExportableSTFT if exportable else STFT
     return nn.Sequential(
-        STFT(
+        stft_layer(
             fft_len,
             hop_len,
             frame_len,
@@ -277,6 +1094,9 @@ def Melspectrogram(
         num_freqs=None,
         htk=False,
         mel_filterbank=None,
+        fused=False,
+        banded=False,
+        exportable=False,
         **kwargs):
     """
     Get melspectrogram module.
@@ -290,6 +1110,12 @@ def Melspectrogram(
             Defaults to fft_len//2 + 1 if 'fft_len' in kwargs else 1025.
         htk (bool, optional): use HTK formula instead of Slaney. Defaults to False.
         mel_filterbank (class, optional): MelFilterbank class to build filterbank matrix
+        fused (bool, optional): use ApplyPowerFilterbank instead of
+            ComplexNorm and ApplyFilterbank. Defaults to False.
+        banded (bool, optional): apply the filterbank in banded mode
+            (see ApplyFilterbank). Cannot be combined with `fused`. Defaults to False.
+        exportable (bool, optional): use ExportableSTFT, so that the module can be
+            exported to ONNX. Cannot be combined with `banded`. Defaults to False.
         **kwargs: torchaudio_contrib.Spectrogram parameters.
     """
     fft_len = kwargs.get('fft_len', None)
@@ -308,8 +1134,104 @@ def Melspectrogram(
         num_freqs=num_freqs,
         htk=htk).get_filterbank()
 
-    return nn.Sequential(*Spectrogram(power=2., **kwargs),
-                         ApplyFilterbank(mel_fb_matrix))
+    if banded and exportable:
+        raise ValueError('banded filterbanks cannot be exported.')
+    if fused:
+        if banded:
+            raise ValueError('fused and banded cannot be used together.')
+        stft_layer = ExportableSTFT if exportable else STFT
+        return nn.Sequential(stft_layer(**kwargs),
+                             ApplyPowerFilterbank(mel_fb_matrix, power=2.))
+
+    return nn.Sequential(*Spectrogram(power=2., exportable=exportable, **kwargs),
+                         ApplyFilterbank(mel_fb_matrix, banded=banded))
+
+
+class ApplyMFCC(_ModuleNoStateBuffers):
+    """
+    Computes MFCCs, and optionally their deltas, from power spectrograms, fusing
+    ApplyFilterbank, AmplitudeToDb and the DCT (see `mfcc`).
+
+    Args:
+        filterbank (Tensor): (num_freqs, num_mels)
+        dct_basis (Tensor): (num_mels, num_mfcc)
+        ref (float): Amplitude value that is equivalent to 0 decibel. Defaults to 1.
+        amin (float): Minimum amplitude. Defaults to 1e-7.
+        num_deltas (int): 1 to append the deltas, 2 to also append the deltas of the
+            deltas. Defaults to 0.
+        delta_width (int): number of frames of the delta regression. Defaults to 5.
+    """
+
+    def __init__(self, filterbank, dct_basis, ref=1.0, amin=1e-7, num_deltas=0, delta_width=5):
+        super(ApplyMFCC, self).__init__()
+        self.ref = float(ref)
+        self.amin = float(amin)
+        self.num_deltas = num_deltas
+        self.delta_width = delta_width
+        self.register_buffer('filterbank', filterbank)
+        self.register_buffer('dct_basis', dct_basis)
+
+    def forward(self, mag_specgrams):
+        """
+        Args:
+            mag_specgrams (Tensor): (batch, channel, num_freqs, time) power spectrograms.
+
+        Returns:
+            (Tensor): (batch, channel, num_mfcc * (num_deltas + 1), time)
+        """
+        return mfcc(mag_specgrams, self.filterbank, self.dct_basis, self.ref, self.amin,
+                    self.num_deltas, self.delta_width)
+
+    def __repr__(self):
+        param_str = '(num_mfcc={}, ref={}, amin={}, num_deltas={})'.format(
+            self.dct_basis.size(1), self.ref, self.amin, self.num_deltas)
+        return self.__class__.__name__ + param_str
+
+
+def MFCC(
+        num_mfcc=20,
+        num_mels=128,
+        sample_rate=22050,
+        min_freq=0.0,
+        max_freq=None,
+        htk=False,
+        norm='ortho',
+        ref=1.0,
+        amin=1e-7,
+        num_deltas=0,
+        delta_width=5,
+        **kwargs):
+    """
+    Get MFCC module: STFT, fused squared ComplexNorm and ApplyMFCC.
+
+    Args:
+        num_mfcc (int): number of coefficients. Defaults to 20.
+        num_mels (int): number of mel bins. Defaults to 128.
+        sample_rate (int): sample rate of audio signal. Defaults to 22050.
+        min_freq (float): minimum frequency. Defaults to 0.
+        max_freq (float, optional): maximum frequency. Defaults to sample_rate // 2.
+        htk (bool, optional): use HTK formula instead of Slaney. Defaults to False.
+        norm (str or None): normalization of the DCT, see `create_dct`. Defaults to 'ortho'.
+        ref (float): Amplitude value that is equivalent to 0 decibel. Defaults to 1.
+        amin (float): Minimum amplitude. Defaults to 1e-7.
+        num_deltas (int): 1 to append the deltas, 2 to also append the deltas of the
+            deltas. Defaults to 0.
+        delta_width (int): number of frames of the delta regression. Defaults to 5.
+        **kwargs: STFT parameters, e.g. `fft_len` or `hop_len`.
+    """
+    fft_len = kwargs.get('fft_len', None)
+    num_freqs = fft_len // 2 + 1 if fft_len else 1025
+    mel_fb_matrix = MelFilterbank(
+        num_mels=num_mels,
+        sample_rate=sample_rate,
+        min_freq=min_freq,
+        max_freq=max_freq,
+        num_freqs=num_freqs,
+        htk=htk).get_filterbank()
+
+    return nn.Sequential(STFT(**kwargs), ComplexNorm(power=2., fused=True),
+                         ApplyMFCC(mel_fb_matrix, cached_dct(num_mels, num_mfcc, norm), ref, amin,
+                                   num_deltas, delta_width))
 
 
 class AmplitudeToDb(_ModuleNoStateBuffers):
@@ -326,20 +1248,23 @@ class AmplitudeToDb(_ModuleNoStateBuffers):
 
     def __init__(self, ref=1.0, amin=1e-7):
         super(AmplitudeToDb, self).__init__()
-        self.ref = ref
-        self.amin = amin
+        self.ref = float(ref)
+        self.amin = float(amin)
         assert ref > amin, "Reference value is expected to be bigger than amin, but I have" \
                            "ref:{} and amin:{}".format(ref, amin)
 
-    def forward(self, x):
+    def forward(self, x, lengths=None):
+        # type: (Tensor, Optional[Tensor]) -> Tensor
         """
         Args:
             x (Tensor): Input amplitude
+            lengths (LongTensor, optional): (batch,) number of valid frames of every example
+                of a (batch, channel, freq, time) input. Only those are converted.
 
         Returns:
             (Tensor): same size of x, after conversion
         """
-        return amplitude_to_db(x, ref=self.ref, amin=self.amin)
+        return amplitude_to_db(x, self.ref, self.amin, lengths)
 
     def __repr__(self):
         param_str = '(ref={}, amin={})'.format(self.ref, self.amin)
@@ -360,7 +1285,7 @@ class DbToAmplitude(_ModuleNoStateBuffers):
 
     def __init__(self, ref=1.0):
         super(DbToAmplitude, self).__init__()
-        self.ref = ref
+        self.ref = float(ref)
 
     def forward(self, x):
         """
@@ -383,12 +1308,17 @@ class MuLawEncoding(_ModuleNoStateBuffers):
 
     Args:
         n_quantize (int): quantization level. For 8-bit encoding, set 256 (2 ** 8).
+        dtype (torch.dtype): integer `dtype` of the codes, e.g. `torch.uint8` or
+            `torch.int16` to store and ship them compactly. Default: `torch.int64`
 
     """
 
-    def __init__(self, n_quantize=256):
+    def __init__(self, n_quantize=256, dtype=torch.int64):
         super(MuLawEncoding, self).__init__()
+        if dtype.is_floating_point or dtype.is_complex or torch.iinfo(dtype).max < n_quantize - 1:
+            raise ValueError('{} cannot hold {} mu-law codes.'.format(dtype, n_quantize))
         self.n_quantize = n_quantize
+        self.dtype = dtype
 
     def forward(self, x):
         """
@@ -398,10 +1328,10 @@ class MuLawEncoding(_ModuleNoStateBuffers):
         Returns:
             (Tensor): same size of x, after encoding
         """
-        return mu_law_encoding(x, self.n_quantize)
+        return mu_law_encoding(x, self.n_quantize, self.dtype)
 
     def __repr__(self):
-        param_str = '(n_quantize={})'.format(self.n_quantize)
+        param_str = '(n_quantize={}, dtype={})'.format(self.n_quantize, self.dtype)
         return self.__class__.__name__ + param_str
 
 
@@ -411,6 +1341,8 @@ class MuLawDecoding(_ModuleNoStateBuffers):
 
     Args:
         n_quantize (int): quantization level. For 8-bit decoding, set 256 (2 ** 8).
+
+    Integer codes of any `dtype`, e.g. `torch.uint8`, are decoded directly.
     """
 
     def __init__(self, n_quantize=256):
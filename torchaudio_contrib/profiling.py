@@ -0,0 +1,166 @@
+"""
+Opt-in per-stage instrumentation of the layers, e.g. of a `Melspectrogram` pipeline:
+
+    >>> melspec = Melspectrogram()
+    >>> enable_profiling(melspec)
+    >>> melspec(waveforms)
+    >>> profiling_stats(melspec)
+    OrderedDict([('0.STFT', StageStats(calls=1, total_time=0.0021, ...)), ...])
+
+Every instrumented stage records its wall time, calls, shapes and bytes, and runs in a
+`torch.profiler.record_function` range named after it. The instrumentation is made of
+forward hooks that only exist while profiling is enabled, so disabled layers run as usual.
+"""
+import time
+from collections import OrderedDict
+
+import torch
+
+from .layers import _ModuleNoStateBuffers
+
+
+class StageStats(object):
+    """
+    Aggregated statistics of one stage.
+
+    Attributes:
+        calls (int): Number of forward calls.
+        total_time (float): Wall time of all calls in seconds.
+        input_shapes (list): Shapes of the tensor inputs of the last call.
+        output_shapes (list): Shapes of the tensor outputs of the last call.
+        output_bytes (int): Bytes of the outputs of all calls.
+        peak_bytes (int): Largest increase of the allocated cuda memory during a call,
+            0 on cpu.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0.
+        self.input_shapes = []
+        self.output_shapes = []
+        self.output_bytes = 0
+        self.peak_bytes = 0
+
+    @property
+    def mean_time(self):
+        return self.total_time / self.calls if self.calls else 0.
+
+    def __repr__(self):
+        return '{}(calls={}, total_time={:.6f}, mean_time={:.6f}, input_shapes={}, ' \
+               'output_shapes={}, output_bytes={}, peak_bytes={})'.format(
+                   self.__class__.__name__, self.calls, self.total_time, self.mean_time,
+                   self.input_shapes, self.output_shapes, self.output_bytes, self.peak_bytes)
+
+
+def _tensors(outputs):
+    if isinstance(outputs, torch.Tensor):
+        return [outputs]
+    if isinstance(outputs, (tuple, list)):
+        return [t for output in outputs for t in _tensors(output)]
+    return []
+
+
+def _stages(module):
+    for name, submodule in module.named_modules():
+        if isinstance(submodule, _ModuleNoStateBuffers):
+            stage_name = submodule.__class__.__name__
+            yield ('{}.{}'.format(name, stage_name) if name else stage_name), submodule
+
+
+def _pre_hook(module, inputs):
+    profile = module._profiling
+    if profile['synchronize']:
+        torch.cuda.synchronize()
+    tensors = _tensors(inputs)
+    cuda = any(t.is_cuda for t in tensors)
+    if cuda:
+        torch.cuda.reset_peak_memory_stats()
+    profile['range'] = torch.profiler.record_function(profile['name'])
+    profile['range'].__enter__()
+    profile['start'] = (time.perf_counter(),
+                        torch.cuda.memory_allocated() if cuda else None, tensors)
+
+
+def _post_hook(module, inputs, outputs):
+    # also called when forward raises, with outputs=None, so that the range is closed
+    profile = module._profiling
+    if outputs is None:
+        profile.pop('range').__exit__(None, None, None)
+        profile.pop('start')
+        return
+    if profile['synchronize']:
+        torch.cuda.synchronize()
+    end = time.perf_counter()
+    profile.pop('range').__exit__(None, None, None)
+    start, allocated, tensors = profile.pop('start')
+
+    stats = profile['stats']
+    stats.calls += 1
+    stats.total_time += end - start
+    stats.input_shapes = [tuple(t.shape) for t in tensors]
+    output_tensors = _tensors(outputs)
+    stats.output_shapes = [tuple(t.shape) for t in output_tensors]
+    stats.output_bytes += sum(t.numel() * t.element_size() for t in output_tensors)
+    if allocated is not None:
+        stats.peak_bytes = max(stats.peak_bytes, torch.cuda.max_memory_allocated() - allocated)
+
+
+def enable_profiling(module, synchronize=False):
+    """
+    Instrument every layer of `module` (e.g. a `Spectrogram` or `Melspectrogram`
+    pipeline), keeping the statistics gathered so far.
+
+    Args:
+        module (nn.Module): A layer, or a module containing layers.
+        synchronize (bool): Synchronize cuda before and after every stage, so that the
+            wall times include the kernels of the stage. Defaults to False.
+    """
+    for name, stage in _stages(module):
+        if getattr(stage, '_profiling', None) is None:
+            stage._profiling = {'stats': getattr(stage, '_profiling_stats', None) or StageStats()}
+            stage._profiling['handles'] = [stage.register_forward_pre_hook(_pre_hook),
+                                           stage.register_forward_hook(_post_hook,
+                                                                       always_call=True)]
+        stage._profiling['name'] = name
+        stage._profiling['synchronize'] = synchronize
+
+
+def disable_profiling(module):
+    """
+    Remove the instrumentation of the layers of `module`. Their statistics stay queryable.
+    """
+    for _, stage in _stages(module):
+        profile = getattr(stage, '_profiling', None)
+        if profile is not None:
+            for handle in profile['handles']:
+                handle.remove()
+            stage._profiling_stats = profile['stats']
+            stage._profiling = None
+
+
+def reset_profiling(module):
+    """
+    Clear the statistics of the layers of `module`.
+    """
+    for _, stage in _stages(module):
+        if getattr(stage, '_profiling', None) is not None:
+            stage._profiling['stats'] = StageStats()
+        stage._profiling_stats = None
+
+
+def profiling_stats(module):
+    """
+    Return the statistics of the layers of `module` that have been profiled.
+
+    Returns:
+        OrderedDict: {stage name: StageStats}, in the order of `module.named_modules()`,
+            e.g. '0.STFT', '1.ComplexNorm' and '2.ApplyFilterbank' for a `Melspectrogram`.
+    """
+    stats = OrderedDict()
+    for name, stage in _stages(module):
+        profile = getattr(stage, '_profiling', None)
+        stage_stats = profile['stats'] if profile is not None else \
+            getattr(stage, '_profiling_stats', None)
+        if stage_stats is not None:
+            stats[name] = stage_stats
+    return stats
@@ -0,0 +1,224 @@
+"""
+On-disk store of precomputed features, e.g. of a `Melspectrogram` + `AmplitudeToDb` pipeline,
+so that they are computed once instead of every epoch:
+
+    >>> pipeline = nn.Sequential(Melspectrogram(num_mels=64), AmplitudeToDb())
+    >>> store = build_feature_store('features', pipeline, waveforms)
+    >>> loader = DataLoader(store, num_workers=4, collate_fn=...)
+
+A store is a directory made of
+    * `features.bin`: the frames of all the utterances, one after another, as a flat
+      float16 or float32 array of shape (total frames, channel, freq),
+    * `offsets.npy`: the int64 frame offsets of the utterances (num utterances + 1,),
+    * `meta.json`: the dtype and frame shape, the `repr` and fingerprint of the pipeline,
+      and the identifier of the corpus.
+
+The features are read back zero-copy from a memory map, so that DataLoader workers share
+the page cache instead of each holding a copy. The fingerprint hashes the `repr` and the
+buffers (window, filterbank, ...) of the pipeline, so that a store built with another
+configuration is detected as stale and rebuilt. The waveforms are not hashed, as that
+would mean reading the whole corpus: pass a `corpus` identifier (e.g. a hash of the file
+names and modification times) so that a store of another corpus is rebuilt too.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import torch
+
+_FEATURES = 'features.bin'
+_OFFSETS = 'offsets.npy'
+_META = 'meta.json'
+_DTYPES = {torch.float16: 'float16', torch.float32: 'float32'}
+
+
+def pipeline_fingerprint(pipeline):
+    """
+    Return a hash of the configuration of `pipeline`: its `repr` and the content of its
+    parameters and buffers.
+    """
+    sha = hashlib.sha256(repr(pipeline).encode('utf-8'))
+    tensors = list(pipeline.named_parameters()) + list(pipeline.named_buffers())
+    for name, tensor in sorted(tensors, key=lambda item: item[0]):
+        tensor = tensor.detach().cpu().contiguous()
+        sha.update('{}:{}:{}'.format(name, tensor.dtype, tuple(tensor.shape)).encode('utf-8'))
+        sha.update(tensor.reshape(-1).view(torch.uint8).numpy().tobytes())
+    return sha.hexdigest()
+
+
+def _read_meta(path):
+    try:
+        with open(os.path.join(path, _META)) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def is_feature_store_current(path, pipeline, corpus=None):
+    """
+    Return True if `path` holds a complete store built with the configuration of `pipeline`
+    from the corpus identified by `corpus`.
+    """
+    meta = _read_meta(path)
+    return (meta is not None and meta['fingerprint'] == pipeline_fingerprint(pipeline) and
+            meta.get('corpus') == corpus)
+
+
+def write_feature_store(path, pipeline, waveforms, dtype=torch.float16, corpus=None):
+    """
+    Compute the features of every waveform with `pipeline` and write them to a store,
+    replacing the one at `path`.
+
+    The features are appended to the file utterance by utterance, so that the corpus
+    never needs to fit in memory. The store is written to a temporary directory next to
+    `path` and renamed into place once complete: an interrupted write leaves the previous
+    store as it was. Only a directory holding a store is replaced, any other non-empty
+    directory at `path` raises ValueError.
+
+    Args:
+        path (str): Directory of the store.
+        pipeline (nn.Module): Takes a (batch=1, channel, time) waveform and returns
+            (batch=1, channel, freq, frames) features, e.g. a `Melspectrogram`.
+        waveforms (iterable): (channel, time) tensors, one per utterance.
+        dtype (torch.dtype): torch.float16 (default), which halves the size of the
+            store and suits dB features, or torch.float32.
+        corpus (str, optional): Identifier of the corpus `waveforms` come from, stored
+            with the store and compared by `is_feature_store_current`.
+
+    Returns:
+        FeatureStore
+    """
+    if dtype not in _DTYPES:
+        raise ValueError('dtype must be torch.float16 or torch.float32, not {}.'.format(dtype))
+    path = os.path.abspath(path)
+    if os.path.exists(path) and _read_meta(path) is None and \
+            not (os.path.isdir(path) and not os.listdir(path)):
+        raise ValueError('{} exists and is not a feature store, not replacing it.'.format(path))
+    parent = os.path.dirname(path)
+    if not os.path.isdir(parent):
+        os.makedirs(parent)
+
+    tmp_path = tempfile.mkdtemp(prefix='.' + os.path.basename(path) + '.', dir=parent)
+    try:
+        _write_store(tmp_path, pipeline, waveforms, dtype, corpus)
+        if os.path.exists(path):
+            # moved away first, as a non-empty directory cannot be renamed over
+            old_path = tempfile.mkdtemp(prefix='.' + os.path.basename(path) + '.', dir=parent)
+            os.rename(path, os.path.join(old_path, 'store'))
+            os.rename(tmp_path, path)
+            shutil.rmtree(old_path)
+        else:
+            os.rename(tmp_path, path)
+    finally:
+        if os.path.isdir(tmp_path):
+            shutil.rmtree(tmp_path)
+    return FeatureStore(path)
+
+
+def _write_store(path, pipeline, waveforms, dtype, corpus):
+    offsets = [0]
+    frame_shape = None
+    with open(os.path.join(path, _FEATURES), 'wb') as f, torch.no_grad():
+        for waveform in waveforms:
+            features = pipeline(waveform.unsqueeze(0))[0]
+            if frame_shape is None:
+                frame_shape = tuple(features.shape[:-1])
+            elif tuple(features.shape[:-1]) != frame_shape:
+                raise ValueError('All the features must be of shape {} + (frames,), '
+                                 'got {}.'.format(frame_shape, tuple(features.shape)))
+            # frames first, so that the frames of an utterance are contiguous
+            frames = features.permute(2, 0, 1).to(dtype)
+            if not torch.isfinite(frames).all() and torch.isfinite(features).all():
+                raise ValueError('The features overflow {}, store them as torch.float32 '
+                                 'or in dB.'.format(dtype))
+            f.write(frames.cpu().contiguous().numpy().tobytes())
+            offsets.append(offsets[-1] + frames.size(0))
+
+    np.save(os.path.join(path, _OFFSETS), np.array(offsets, dtype=np.int64))
+    meta = {'dtype': _DTYPES[dtype], 'frame_shape': frame_shape,
+            'pipeline': repr(pipeline), 'fingerprint': pipeline_fingerprint(pipeline),
+            'corpus': corpus}
+    with open(os.path.join(path, _META), 'w') as f:
+        json.dump(meta, f, indent=1)
+
+
+def build_feature_store(path, pipeline, waveforms, dtype=torch.float16, corpus=None):
+    """
+    Return the store at `path`, (re)writing it with `write_feature_store` if it is
+    missing or was built with another configuration of `pipeline` or another `corpus`.
+    Without a `corpus` identifier, a store built from other waveforms with the same
+    pipeline is returned as is.
+    """
+    if is_feature_store_current(path, pipeline, corpus):
+        return FeatureStore(path, pipeline)
+    return write_feature_store(path, pipeline, waveforms, dtype, corpus)
+
+
+class FeatureStore(torch.utils.data.Dataset):
+    """
+    Read-only, memory-mapped view of a store, indexable as a Dataset of
+    (channel, freq, frames) feature tensors.
+
+    The returned tensors share the memory map (copy-on-write), so they cost no copy until
+    they are modified or moved to another device or dtype. The map is opened lazily in
+    every process, so the store can be handed to DataLoader workers.
+
+    Args:
+        path (str): Directory of the store.
+        pipeline (nn.Module, optional): If given, raise ValueError if the store was not
+            built with the configuration of `pipeline`.
+    """
+
+    def __init__(self, path, pipeline=None):
+        super(FeatureStore, self).__init__()
+        meta = _read_meta(path)
+        if meta is None:
+            raise ValueError('{} is not a feature store.'.format(path))
+        if pipeline is not None and meta['fingerprint'] != pipeline_fingerprint(pipeline):
+            raise ValueError('The feature store {} was built with another pipeline:\n{}'.format(
+                path, meta['pipeline']))
+        self.path = path
+        self.meta = meta
+        self.offsets = np.load(os.path.join(path, _OFFSETS))
+        self._features = None
+
+    @property
+    def features(self):
+        """
+        All the frames, as a (total frames, channel, freq) memory-mapped array.
+        """
+        if self._features is None:
+            shape = (int(self.offsets[-1]),) + tuple(self.meta['frame_shape'])
+            if shape[0] == 0:
+                self._features = np.zeros(shape, dtype=self.meta['dtype'])
+            else:
+                self._features = np.memmap(os.path.join(self.path, _FEATURES),
+                                           dtype=self.meta['dtype'], mode='c', shape=shape)
+        return self._features
+
+    def num_frames(self, index):
+        return int(self.offsets[index + 1] - self.offsets[index])
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('index {} is out of range.'.format(index))
+        frames = self.features[self.offsets[index]:self.offsets[index + 1]]
+        return torch.from_numpy(frames).permute(1, 2, 0)
+
+    def __getstate__(self):
+        # workers map the file themselves instead of receiving a pickled copy of it
+        state = self.__dict__.copy()
+        state['_features'] = None
+        return state
+
+    def __repr__(self):
+        return '{}(path={!r}, len={}, dtype={})'.format(
+            self.__class__.__name__, self.path, len(self), self.meta['dtype'])
@@ -0,0 +1,178 @@
+"""
+Memory-mapped reader of PCM WAV files, for recordings that do not fit in memory:
+
+    >>> wav = WavFile('archive.wav')
+    >>> wav.time_slice(3600., 3610.)  # (channel, time) float tensor of 10 seconds
+    >>> for block in wav.iter_blocks(fft_len=2048, hop_len=512):
+    ...     spec = stft_layer(block)
+
+Nothing is read until it is asked for: the samples are a zero-copy view of the file, and
+only the requested ranges are converted to float, so the resident set stays small.
+"""
+import struct
+
+import numpy as np
+import torch
+
+_PCM = 1
+_IEEE_FLOAT = 3
+_EXTENSIBLE = 0xFFFE
+_DTYPES = {(_PCM, 16): '<i2', (_PCM, 24): 'u1', (_PCM, 32): '<i4', (_IEEE_FLOAT, 32): '<f4'}
+
+
+def _parse_header(f):
+    riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+    if riff != b'RIFF' or wave != b'WAVE':
+        raise ValueError('Not a RIFF WAVE file.')
+    fmt = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            raise ValueError('The WAV file has no data chunk.')
+        chunk_id, chunk_size = struct.unpack('<4sI', header)
+        if chunk_id == b'fmt ':
+            fmt = f.read(chunk_size)
+            chunk_size = 0
+        elif chunk_id == b'data':
+            if fmt is None:
+                raise ValueError('The data chunk of the WAV file precedes its fmt chunk.')
+            return fmt, f.tell(), chunk_size
+        f.seek(chunk_size + chunk_size % 2, 1)  # chunks are padded to an even size
+
+
+class WavFile(object):
+    """
+    Read-only, memory-mapped PCM WAV file of 16, 24 or 32 bit integer or 32 bit float
+    samples.
+
+    The file is mapped lazily in every process, so a `WavFile` can be handed to
+    DataLoader workers.
+
+    Args:
+        path (str): Path of the file.
+
+    Attributes:
+        sample_rate (int): Sampling rate in Hz.
+        num_channels (int): Number of channels.
+        num_samples (int): Number of samples per channel.
+        bits_per_sample (int): 16, 24 or 32.
+        is_float (bool): Whether the samples are floats.
+    """
+
+    def __init__(self, path):
+        super(WavFile, self).__init__()
+        self.path = path
+        with open(path, 'rb') as f:
+            fmt, self._data_offset, data_size = _parse_header(f)
+            file_size = f.seek(0, 2)
+
+        format_tag, self.num_channels, self.sample_rate, _, block_align, \
+            self.bits_per_sample = struct.unpack('<HHIIHH', fmt[:16])
+        if format_tag == _EXTENSIBLE:
+            format_tag, = struct.unpack('<H', fmt[24:26])  # first bytes of the subformat guid
+        if (format_tag, self.bits_per_sample) not in _DTYPES:
+            raise ValueError('Unsupported WAV format {} with {} bits per sample.'.format(
+                format_tag, self.bits_per_sample))
+        self.is_float = format_tag == _IEEE_FLOAT
+        self._dtype = _DTYPES[(format_tag, self.bits_per_sample)]
+        # a truncated file has less data than announced
+        data_size = min(data_size, file_size - self._data_offset)
+        self.num_samples = data_size // block_align
+        self._samples = None
+
+    @property
+    def samples(self):
+        """
+        The samples as a zero-copy (time, channel) numpy view of the file, or
+        (time, channel, 3) bytes for 24 bit samples.
+        """
+        if self._samples is None:
+            shape = (self.num_samples, self.num_channels)
+            if self.bits_per_sample == 24:
+                shape += (3,)
+            if self.num_samples == 0:
+                self._samples = np.zeros(shape, dtype=self._dtype)
+            else:
+                # copy-on-write, so that torch.from_numpy gets a writable array
+                self._samples = np.memmap(self.path, dtype=self._dtype, mode='c',
+                                          offset=self._data_offset, shape=shape)
+        return self._samples
+
+    def raw(self):
+        """
+        Return the samples as a (channel, time) tensor viewing the file without a copy,
+        of dtype int16, int32 or float32, or uint8 of shape (channel, time, 3) for
+        24 bit samples.
+        """
+        return torch.from_numpy(self.samples).transpose(0, 1)
+
+    @property
+    def duration(self):
+        return self.num_samples / float(self.sample_rate)
+
+    def read(self, start=0, stop=None):
+        """
+        Return the samples [start, stop) as a (channel, time) float32 tensor in [-1, 1).
+        Only this range is read and converted.
+        """
+        start, stop, _ = slice(start, stop).indices(self.num_samples)
+        samples = self.samples[start:max(start, stop)]
+        if self.bits_per_sample == 24:
+            # sign-extend the little-endian 3 bytes into the top of an int32
+            as_int32 = np.zeros(samples.shape[:2] + (4,), dtype=np.uint8)
+            as_int32[..., 1:] = samples
+            samples = as_int32.view('<i4')[..., 0]
+        waveform = torch.from_numpy(samples).transpose(0, 1)
+        if self.is_float:
+            return waveform
+        return waveform.to(torch.float32).div_(2. ** 31 if self.bits_per_sample != 16 else 2. ** 15)
+
+    def __getitem__(self, index):
+        """
+        Slice the samples in time, e.g. `wav[16000:32000]`.
+        """
+        if not isinstance(index, slice) or index.step not in (None, 1):
+            raise TypeError('WavFile only supports contiguous slices in time.')
+        return self.read(index.start, index.stop)
+
+    def time_slice(self, start=0., stop=None):
+        """
+        Return the samples between `start` and `stop` seconds, like `read`.
+        """
+        return self.read(int(round(start * self.sample_rate)),
+                         None if stop is None else int(round(stop * self.sample_rate)))
+
+    def iter_blocks(self, fft_len, hop_len, frames_per_block=256, start=0, stop=None):
+        """
+        Yield overlapping (channel, time) float blocks of samples, such that the stft
+        (without padding) of every block gives `frames_per_block` consecutive frames
+        of the stft of the whole file, and the last block the remaining ones.
+
+        Args:
+            fft_len (int): FFT window size, as in `STFT`.
+            hop_len (int): Hop length, as in `STFT`.
+            frames_per_block (int): Number of stft frames per block. Defaults to 256.
+            start, stop (int, optional): Range of samples to process.
+        """
+        start, stop, _ = slice(start, stop).indices(self.num_samples)
+        block_len = fft_len + (frames_per_block - 1) * hop_len
+        step = frames_per_block * hop_len
+        offset = start
+        while offset + fft_len <= stop:
+            yield self.read(offset, min(offset + block_len, stop))
+            offset += step
+
+    def __len__(self):
+        return self.num_samples
+
+    def __getstate__(self):
+        # workers map the file themselves instead of receiving a pickled copy of it
+        state = self.__dict__.copy()
+        state['_samples'] = None
+        return state
+
+    def __repr__(self):
+        return '{}(path={!r}, sample_rate={}, num_channels={}, num_samples={}, {})'.format(
+            self.__class__.__name__, self.path, self.sample_rate, self.num_channels,
+            self.num_samples, '{}-bit {}'.format(self.bits_per_sample,
+                                                 'float' if self.is_float else 'pcm'))